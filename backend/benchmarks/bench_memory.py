@@ -0,0 +1,167 @@
+"""
+Peak-memory benchmark for tree construction on a synthetic dataset.
+
+Grows one bootstrap tree the way RandomForest.fit does, two ways: with
+build_tree and best_split_sorted as they were before the in-place
+partition (copied below unchanged: the bootstrap sample X[indices] is
+materialised, then every node copies X[left]/X[right] via split_dataset),
+and with the current build_tree, which grows from the drawn indices and
+partitions that one index array in place. Each mode runs in a fresh
+interpreter so peak RSS is not shared.
+
+Usage (from backend/, Linux/macOS):
+    python benchmarks/bench_memory.py [--rows 1000000] [--depth 10]
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from custom_rf import TreeNode, best_split, build_tree, gini, split_dataset
+
+MODES = ("baseline", "inplace")
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def make_data(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, 8))
+    y = ((X[:, 0] + X[:, 2] - X[:, 5] + rng.normal(scale=0.5, size=rows)) > 0).astype(int)
+    return X, y
+
+
+# ---- build_tree and best_split_sorted as they were before the in-place partition, unchanged ----
+
+def baseline_best_split_sorted(X, y, features):
+    """
+    Same search as best_split, but each candidate feature is sorted once and
+    every threshold is scored in a single NumPy pass from cumulative class
+    counts. Candidates are visited in the same order and compared with the
+    same strict '>' so both engines pick the same (feature, threshold).
+    """
+    best_gain = 0
+    best_feature, best_threshold = None, None
+    current_gini = gini(y)
+
+    n = len(y)
+    classes, y_codes = np.unique(y, return_inverse=True)
+    class_ids = np.arange(len(classes))
+    n_left = np.arange(1, n)
+    n_right = n - n_left
+
+    for feature_idx in features:
+        order = np.argsort(X[:, feature_idx], kind="stable")
+        values = X[order, feature_idx]
+
+        # Class counts of the rows at or below each sorted position
+        cum_counts = np.cumsum(y_codes[order][:, None] == class_ids, axis=0)
+        left_counts = cum_counts[:-1]
+        right_counts = cum_counts[-1] - left_counts
+
+        # A threshold is only valid at the last occurrence of a value
+        valid = values[:-1] < values[1:]
+        if not valid.any():
+            continue
+
+        gini_left = 1 - np.sum((left_counts / n_left[:, None]) ** 2, axis=1)
+        gini_right = 1 - np.sum((right_counts / n_right[:, None]) ** 2, axis=1)
+        gain = current_gini - ((n_left / n) * gini_left + (n_right / n) * gini_right)
+        gain[~valid] = -np.inf
+
+        pos = int(np.argmax(gain))
+        if gain[pos] > best_gain:
+            best_gain = gain[pos]
+            best_feature = feature_idx
+            best_threshold = values[pos]
+    return best_feature, best_threshold
+
+
+BASELINE_SPLITTERS = {"naive": best_split, "sorted": baseline_best_split_sorted}
+
+
+def baseline_build_tree(X, y, depth=0, max_depth=10, min_samples=5, num_features=None, splitter="sorted", rng=None):
+    # rng: np.random.Generator for feature bagging; None uses the global np.random state
+    rng = np.random if rng is None else rng
+
+    # Stop splitting if conditions are met
+    if len(y) == 0:
+        # Return a leaf node with a default value (e.g., 0)
+        return TreeNode(value=0)
+    if len(set(y)) == 1 or len(y) < min_samples or depth >= max_depth:
+        # Return leaf node with most common class
+        return TreeNode(value=Counter(y).most_common(1)[0][0])
+
+    n_features = X.shape[1]
+    # Select a subset of features for Random Forest (feature bagging)
+    features_to_consider = rng.choice(n_features, num_features or n_features, replace=False)
+    
+    best_feat, best_thresh = BASELINE_SPLITTERS[splitter](X, y, features_to_consider)
+
+    # If no split improves Gini impurity, make it a leaf node
+    if best_feat is None:
+        return TreeNode(value=Counter(y).most_common(1)[0][0])
+
+    (X_left, y_left), (X_right, y_right) = split_dataset(X, y, best_feat, best_thresh)
+    
+    # If either split is empty, return a leaf node with the most common class
+    if len(y_left) == 0 or len(y_right) == 0:
+        return TreeNode(value=Counter(y).most_common(1)[0][0])
+
+    # Recursively build left and right sub-trees
+    left_branch = baseline_build_tree(X_left, y_left, depth + 1, max_depth, min_samples, num_features, splitter, rng)
+    right_branch = baseline_build_tree(X_right, y_right, depth + 1, max_depth, min_samples, num_features, splitter, rng)
+
+    return TreeNode(feature=best_feat, threshold=best_thresh, left=left_branch, right=right_branch)
+
+# ----
+
+
+def run(mode, rows, depth):
+    X, y = make_data(rows)
+    rng = np.random.default_rng(1)
+    baseline = peak_rss_mb()
+
+    # One tree as RandomForest.fit grows it (bootstrap="sample"), from the bootstrap draw on
+    start = time.perf_counter()
+    indices = rng.choice(len(X), len(X), replace=True)
+    if mode == "baseline":
+        baseline_build_tree(X[indices], y[indices], max_depth=depth, num_features=2, rng=rng)
+    else:
+        build_tree(X, y, max_depth=depth, num_features=2, rng=rng, rows=indices)
+    elapsed = time.perf_counter() - start
+
+    peak = peak_rss_mb()
+    print(f"{mode:>8}: peak RSS {peak:8.1f} MB  (+{peak - baseline:7.1f} MB while building)  {elapsed:6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--depth", type=int, default=10)
+    parser.add_argument("--mode", choices=MODES, help="run a single mode in this process")
+    args = parser.parse_args()
+
+    if args.mode:
+        run(args.mode, args.rows, args.depth)
+        return
+
+    print(f"{args.rows} rows x 8 features, max_depth={args.depth}")
+    for mode in MODES:
+        subprocess.run([sys.executable, __file__, "--mode", mode,
+                        "--rows", str(args.rows), "--depth", str(args.depth)], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Per-request overhead of the /metrics instrumentation.
+
+Sends requests straight into a bare ASGI endpoint (no network, no FastAPI)
+with and without MetricsMiddleware and the stage timers and counters a
+/predict-manual request records, and prints the difference per request.
+
+Usage (from backend/):
+    python benchmarks/bench_metrics.py [--requests 200000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services import metrics
+
+# Stages recorded by one uncached /predict-manual request scored in-process
+# (on the inference pool, "model" replaces "forest" and the worker's forest time is observed without a timer)
+STAGES = ("features", "forest", "explain")
+
+
+class Route:
+    path = "/predict-manual"
+
+
+async def endpoint(scope, receive, send):
+    scope["route"] = Route
+    for name in STAGES:
+        with metrics.stage(name):
+            pass
+    metrics.count_model_call(1)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def run(app, n):
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(n):
+        await app({"type": "http", "method": "POST", "path": "/predict-manual"}, receive, send)
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200000)
+    args = parser.parse_args()
+
+    results = {}
+    for enabled in (False, True, False, True):  # interleaved to even out warm-up
+        metrics.METRICS_ENABLED = enabled
+        app = metrics.MetricsMiddleware(endpoint)
+        seconds = asyncio.run(run(app, args.requests))
+        results[enabled] = min(results.get(enabled, seconds), seconds)
+
+    print(f"{args.requests} requests, {len(STAGES)} stage timers + model counters each")
+    print(f"  metrics off  {results[False] * 1e6:6.2f} us/request")
+    print(f"  metrics on   {results[True] * 1e6:6.2f} us/request")
+    print(f"  overhead     {(results[True] - results[False]) * 1e6:6.2f} us/request")
+
+
+if __name__ == "__main__":
+    main()
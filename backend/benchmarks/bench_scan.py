@@ -0,0 +1,91 @@
+"""
+Per-district vs vectorized scoring for the Nepal scan.
+
+Scores random points inside Nepal's bounding box with random weather two
+ways: the old scan path (predict_fire_risk once per point, then a Python
+sort) and the current one (one feature matrix, one model call, argsort),
+checks both rank the points the same and prints the time per scan.
+
+The prediction cache is turned off so both paths run the model for every
+point; the model runs in this process (no inference workers). Importing
+the admin routes needs MONGO_URI set, but no connection is made.
+
+Usage (from backend/):
+    python benchmarks/bench_scan.py [--sizes 60,1000,100000] [--repeat 3]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from routes.admin_routes import (DEFAULT_VPD, fire_risk_levels, predict_fire_risk,
+                                 predict_fire_risk_many)
+from services.model_registry import model_registry
+from services.prediction_cache import prediction_cache
+from utils.features import assemble_features
+
+
+def random_inputs(n, seed=0):
+    """(n, 7) latitude, longitude, temperature, humidity, wind_speed, precipitation, elevation"""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.uniform(26.4, 30.4, n), rng.uniform(80.1, 88.2, n),
+        rng.uniform(0, 42, n), rng.uniform(5, 100, n), rng.uniform(0, 40, n),
+        rng.choice([0.0, 0.0, 0.0, 0.5, 4.0], n), rng.uniform(60, 4000, n),
+    ])
+
+
+def per_district(inputs):
+    results = []
+    for lat, lng, temperature, humidity, wind_speed, precipitation, elevation in inputs.tolist():
+        prediction = predict_fire_risk(lat, lng, elevation, temperature, humidity, wind_speed, precipitation)
+        results.append(prediction)
+    results.sort(key=lambda x: x["probability"], reverse=True)
+    return [result["probability"] for result in results]
+
+
+def vectorized(handle, inputs):
+    X = assemble_features(*inputs.T)
+    X[np.isnan(X[:, -1]), -1] = DEFAULT_VPD
+    proba = asyncio.run(predict_fire_risk_many(handle, X))
+    fire_risk_levels(proba)
+    return proba[np.argsort(-proba, kind="stable")].tolist()
+
+
+def best_of(repeat, fn, *args):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="60,1000,100000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    prediction_cache.max_size = 0
+    handle = model_registry.load()
+    if handle is None:
+        sys.exit(f"Model not loaded: {model_registry.load_error}")
+
+    print(f"{'points':>8} {'per-district':>14} {'vectorized':>12} {'speed-up':>9}  same ranking")
+    for n in (int(size) for size in args.sizes.split(",")):
+        inputs = random_inputs(n)
+        repeat = args.repeat if n <= 10000 else 1
+        loop_seconds, loop_ranking = best_of(repeat, per_district, inputs)
+        vector_seconds, vector_ranking = best_of(repeat, vectorized, handle, inputs)
+        print(f"{n:>8} {loop_seconds * 1000:>11.1f} ms {vector_seconds * 1000:>9.1f} ms "
+              f"{loop_seconds / vector_seconds:>8.1f}x  {loop_ranking == vector_ranking}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark the split engines of custom_rf on the enriched fire dataset.
+
+Builds the same trees with every engine (same seed) and reports fit time and
+whether the resulting forests are identical.
+
+Usage (from backend/):
+    python benchmarks/bench_split.py [--trees 5] [--csv ../fire_dataset_enriched.csv]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from custom_rf import RandomForest, SPLITTERS
+from utils.features import FEATURES, features_from
+
+
+def tree_signature(node):
+    if node.is_leaf():
+        return ("leaf", node.value)
+    return (int(node.feature), float(node.threshold),
+            tree_signature(node.left), tree_signature(node.right))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--csv", default=os.path.join(os.path.dirname(__file__), "..", "..", "fire_dataset_enriched.csv"))
+    parser.add_argument("--trees", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv).dropna(subset=FEATURES + ["fire_occurred"])
+    X = features_from(df)
+    y = df["fire_occurred"].to_numpy(dtype=int)
+    print(f"{len(X)} rows, {args.trees} trees")
+
+    signatures = {}
+    for name in SPLITTERS:
+        np.random.seed(args.seed)
+        forest = RandomForest(n_trees=args.trees, splitter=name)
+        start = time.perf_counter()
+        forest.fit(X, y)
+        elapsed = time.perf_counter() - start
+        signatures[name] = [tree_signature(t) for t in forest.trees]
+        print(f"  {name:>8}: {elapsed:8.2f}s")
+
+    reference = signatures["naive"]
+    for name, sig in signatures.items():
+        print(f"  {name:>8} same trees as naive: {sig == reference}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Startup-time benchmark for the API process.
+
+Runs `import main` in a fresh interpreter (with -X importtime) and then the
+app's startup steps, once with FAST_START off and once with it on, and
+prints how long each mode takes to be live (answering requests) and ready
+(every startup step done), plus the import time of main's direct imports.
+
+The admin_user step needs MongoDB and is skipped here.
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py [--top 15] [--workers 2]
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)")
+
+
+def child():
+    """Runs inside the measured interpreter; prints a JSON line with the timings."""
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+    start = time.perf_counter()
+    import main
+    timings = {"import": time.perf_counter() - start}
+
+    steps = [(name, fn) for name, fn in main.STARTUP_STEPS if name != "admin_user"]
+    main.startup_state.steps.pop("admin_user", None)
+    asyncio.run(main.startup_state.run_all(steps))
+    for name, step in main.startup_state.steps.items():
+        timings[name] = step["seconds"]
+    main.model_registry.shutdown()
+    print("TIMINGS " + json.dumps(timings))
+
+
+def measure(fast_start, workers):
+    env = dict(os.environ, FAST_START="1" if fast_start else "0", INFERENCE_WORKERS=str(workers))
+    env.setdefault("MONGO_URI", "mongodb://localhost:27017")
+    env.setdefault("SECRET_KEY", "benchmark")
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", __file__, "--child"],
+                          env=env, capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - start
+
+    timings = json.loads(next(line for line in proc.stdout.splitlines()
+                              if line.startswith("TIMINGS "))[len("TIMINGS "):])
+    # Direct imports of main: importtime lists children before their parent,
+    # so collect each top-level import's children and keep main's
+    modules, children = [], []
+    for line in proc.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        _, cumulative, indent, name = match.groups()
+        if len(indent) == 1:
+            if name == "main":
+                modules = children
+                break
+            children = []
+        elif len(indent) == 3:
+            children.append((int(cumulative) / 1e6, name))
+    return wall, timings, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--top", type=int, default=15, help="number of imports to list")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("INFERENCE_WORKERS", "2")))
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child()
+        return
+
+    for fast_start in (False, True):
+        wall, timings, modules = measure(fast_start, args.workers)
+        steps = {name: seconds for name, seconds in timings.items() if name != "import"}
+        ready = timings["import"] + sum(steps.values())
+        live = timings["import"] if fast_start else ready
+
+        print(f"\nFAST_START={int(fast_start)} (INFERENCE_WORKERS={args.workers})")
+        print(f"  live after  {live:7.3f}s   (import main{'' if fast_start else ' + startup steps'})")
+        print(f"  ready after {ready:7.3f}s   (process wall time incl. interpreter: {wall:.3f}s)")
+        print(f"  {'import main':<32}{timings['import']:7.3f}s")
+        for name, seconds in steps.items():
+            print(f"  {'step ' + name:<32}{seconds:7.3f}s" + ("   (background)" if fast_start else ""))
+        print("  slowest imports of main (cumulative):")
+        for seconds, name in sorted(modules, reverse=True)[:args.top]:
+            print(f"    {name:<30}{seconds:7.3f}s")
+
+
+if __name__ == "__main__":
+    main()
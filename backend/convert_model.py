@@ -0,0 +1,95 @@
+"""
+Convert the joblib RandomForest + StandardScaler pickles into the compact
+.rfm model file (see FlatForest.save) that the API memory-maps at startup.
+
+Usage (from backend/):
+    python convert_model.py [--model model/random_forest_final_model.pkl]
+                            [--scaler model/scaler.pkl]
+                            [--out model/random_forest_final_model.rfm]
+                            [--check-csv ../fire_test_dataset.csv]
+                            [--fold-scaler] [--verify]
+
+--fold-scaler rewrites every split threshold into raw feature units so the
+API can skip StandardScaler.transform; --verify only re-checks an existing
+--out file against the pickles without rewriting it.
+"""
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from custom_rf import FlatForest, RandomForest
+from utils.features import FEATURES, features_from
+from utils.model_loader import ScalerParams, scaler_params
+
+
+def load_pickles(model_path, scaler_path):
+    # Models pickled from a notebook reference __main__.RandomForest
+    import __main__
+    __main__.RandomForest = RandomForest
+
+    model = joblib.load(model_path)
+    scaler = joblib.load(scaler_path)
+    return model, scaler
+
+
+def convert(model, scaler, model_path, out_path, fold_scaler=False):
+    forest = FlatForest.from_forest(model)
+    forest.metadata = {
+        "features": FEATURES,
+        "scaler": scaler_params(scaler),
+        "thresholds": {"fire": 0.5},
+        "source": os.path.basename(model_path),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    if fold_scaler:
+        forest = forest.fold_scaler(**forest.metadata["scaler"])
+    forest.save(out_path)
+    print(f"Wrote {out_path}: {forest.n_trees} trees, {len(forest.feature)} nodes, "
+          f"{os.path.getsize(out_path) / 1024:.0f} KiB"
+          + (", scaler folded into thresholds" if fold_scaler else ""))
+
+
+def check(model, scaler, out_path, csv_path):
+    """Assert the .rfm file predicts exactly like the pickles on csv_path."""
+    X = features_from(pd.read_csv(csv_path))
+    expected = model.predict_proba(scaler.transform(X))
+
+    loaded = FlatForest.load(out_path)
+    if loaded.metadata.get("scaler_folded"):
+        actual = loaded.predict_proba(X)
+    else:
+        actual = loaded.predict_proba(ScalerParams(**loaded.metadata["scaler"]).transform(X))
+    np.testing.assert_array_equal(actual, expected)
+    print(f"Predictions identical on {len(X)} rows of {csv_path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--model", default="model/random_forest_final_model.pkl")
+    parser.add_argument("--scaler", default="model/scaler.pkl")
+    parser.add_argument("--out", default="model/random_forest_final_model.rfm")
+    parser.add_argument("--check-csv", default="../fire_test_dataset.csv",
+                        help="compare predictions on this CSV after converting ('' to skip)")
+    parser.add_argument("--fold-scaler", action="store_true",
+                        help="store thresholds in raw feature units (no scaler at serving time)")
+    parser.add_argument("--verify", action="store_true",
+                        help="only check an existing --out file against the pickles")
+    args = parser.parse_args()
+
+    model, scaler = load_pickles(args.model, args.scaler)
+    if not args.verify:
+        convert(model, scaler, args.model, args.out, fold_scaler=args.fold_scaler)
+    if args.check_csv:
+        check(model, scaler, args.out, args.check_csv)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,31 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
 from dotenv import load_dotenv
 import os
 
+from services.metrics import count_failure, observe_stage
+
 load_dotenv()
 
 MONGO_URI = os.getenv("MONGO_URI")
 if not MONGO_URI:
     raise ValueError("MONGO_URI not found in environment variables")
 
-client = AsyncIOMotorClient(MONGO_URI)
+
+class CommandMetrics(monitoring.CommandListener):
+    """Times every MongoDB command as the "mongo" stage on /metrics"""
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        observe_stage("mongo", event.duration_micros / 1e6)
+
+    def failed(self, event):
+        observe_stage("mongo", event.duration_micros / 1e6)
+        count_failure("mongo")
+
+
+client = AsyncIOMotorClient(MONGO_URI, event_listeners=[CommandMetrics()])
 db = client["wildfire_db"]
 alerts_collection = db["fire_alerts"]
 fire_reports = db["fire_reports"]
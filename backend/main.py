@@ -1,10 +1,9 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-import joblib
-import pandas as pd
 import math
+import asyncio
 from dotenv import load_dotenv
 import os
 from fastapi_jwt_auth import AuthJWT
@@ -12,10 +11,22 @@ from routes import contact_routes, fire_report_routes, fire_routes, admin_routes
 from models.admin import ensure_admin_exists
 
 # --- NEW IMPORTS REQUIRED FOR CUSTOM RANDOM FOREST ---
-import numpy as np
 import sys
 
 from custom_rf import RandomForest
+from services.batcher import PredictionBatcher
+from services import metrics
+from services.explanations import explain_codes
+from services.prediction import describe_prediction
+from services.batch_predict import open_records, stream_predictions
+from services.model_registry import model_registry
+from services.prediction_cache import prediction_cache
+from services.profiler import ProfilerMiddleware
+from services.weather_cache import weather_cache
+from services.weather_client import weather_client
+from services.startup import FAST_START, StartupState, preload_modules
+from utils.features import features_from
+from starlette.concurrency import run_in_threadpool
 _ = RandomForest
 
 
@@ -33,6 +44,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Per-route latency histograms for /metrics (METRICS_ENABLED=0 turns them off)
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Hands requests to the admin sampling profiler (/admin/profile) while one is attached
+app.add_middleware(ProfilerMiddleware)
+
 # Include additional route files
 app.include_router(fire_routes.router)
 app.include_router(admin_routes.router)
@@ -41,25 +58,22 @@ app.include_router(auth_routes.router)
 app.include_router(contact_routes.router)
 app.include_router(fire_report_routes.router) 
 
-# It's recommended to load the model and scaler once at startup
-# and inject them as dependencies rather than loading them in multiple route files.
-model = None
-scaler = None # Initialize scaler to None
-try:
-    # This loading logic is duplicated in admin_routes.py. Centralize it.
-    model = joblib.load("./model/random_forest_final_model.pkl") # Load the Random Forest model
-    if model is None:
-        raise ValueError("Model is None, check the file path or model format.")
-    scaler = joblib.load("./model/scaler.pkl") # Load the scaler
+# The model and scaler are loaded once by the model registry during startup (below)
+# and shared by every route; until then, routes that need the model answer 503
+def load_model_step():
+    if model_registry.load() is None:
+        raise RuntimeError(model_registry.load_error)
     print("Random Forest model and scaler loaded.")
-except Exception as e:
-    print(f"[ERROR] Could not load model or scaler: {e}")
 
-# Feature list expected by the model (matches the order in which X was created in notebook)
-features = [
-    'latitude', 'longitude', 'temperature', 'humidity',
-    'wind_speed', 'precipitation', 'elevation', 'vpd'
-]
+
+async def predict_fire_proba_async(X):
+    """Fire probability per row of X with the active model, without blocking the event loop"""
+    return await model_registry.require().predict_proba_async(X)
+
+
+# Concurrent /predict-manual calls are scored together in one forest call
+# (window and size come from PREDICT_BATCH_WINDOW_MS / PREDICT_BATCH_MAX_ROWS)
+batcher = PredictionBatcher(predict_fire_proba_async)
 
 # Schema for manual prediction input
 class ManualInput(BaseModel):
@@ -78,152 +92,137 @@ async def root():
     return {"message": "API is running!"}
 
 
+# Liveness: the process is up and serving. Readiness: every startup step has finished.
+@app.get("/health/live")
+async def liveness():
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    status = {**startup_state.status(), "load_error": model_registry.load_error}
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+
+# Startup steps, in order. Inference worker processes (INFERENCE_WORKERS) start
+# after the model; until they are running, predictions are made in this process.
+STARTUP_STEPS = [
+    ("model", lambda: run_in_threadpool(load_model_step)),
+    ("inference_pool", lambda: run_in_threadpool(model_registry.start_workers)),
+    ("admin_user", ensure_admin_exists),
+    ("modules", lambda: run_in_threadpool(preload_modules)),
+]
+startup_state = StartupState([name for name, _ in STARTUP_STEPS])
+
+# Steps the app can serve without: a missing or broken model file is reported by
+# /health/ready (503 with load_error) and predictions answer "Model not loaded"
+OPTIONAL_STEPS = ("model", "inference_pool")
+
 
 @app.on_event("startup")
 async def init_app():
-    await ensure_admin_exists()
+    if FAST_START:
+        # Serve straight away; /health/ready reports 503 until warm-up is done
+        startup_state.task = asyncio.create_task(startup_state.run_all(STARTUP_STEPS, raise_errors=False))
+    else:
+        await startup_state.run_all(STARTUP_STEPS, optional=OPTIONAL_STEPS)
+
+
+@app.on_event("shutdown")
+def stop_inference_pool():
+    model_registry.shutdown()
+
+
+@app.on_event("shutdown")
+async def close_weather_client():
+    await weather_client.aclose()
 
     
 # Predict route
 @app.post("/predict-manual")
-def predict_manual(data: ManualInput):
-    if model is None or scaler is None: # Check if scaler is loaded too
-        raise HTTPException(status_code=500, detail="Model or scaler not loaded")
-
-    # Calculate VPD (Vapor Pressure Deficit)
-    # Using the same formula as in the notebook's calculate_vpd function
-    try:
-        es = 0.6108 * math.exp((17.27 * data.temperature) / (data.temperature + 237.3))
-        ea = (data.humidity / 100) * es
-        vpd = round(es - ea, 3)
-    except Exception:
-        vpd = None # Or handle more robustly if VPD calculation fails
-
-    enriched = {
-        "latitude": data.latitude,
-        "longitude": data.longitude,
-        "temperature": data.temperature,
-        "humidity": data.humidity,
-        "wind_speed": data.wind_speed,
-        "precipitation": data.precipitation,
-        "elevation": data.elevation,
-        "vpd": vpd
-    }
-
-    # DataFrame for prediction - Ensure column order matches training
-    X_input = pd.DataFrame([enriched], columns=features) # Use the defined 'features' list for column order
-
-    # IMPORTANT: Scale the input data before prediction
-    try:
-        X_scaled = scaler.transform(X_input)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error scaling input data: {e}")
-
-
-    # Predict fire probability
-    # Assuming your custom RandomForest model has predict_proba
-    proba = model.predict_proba(X_scaled)[0][1]
-    fire_flag = int(proba >= 0.5)
-
-    # Risk classification
-    # NOTE: This logic is inconsistent with the logic in admin_routes.py.
-    # This should be centralized in a single utility function.
-    if proba >= 0.75:
-        risk_level = "High"
-    elif proba >= 0.40:
-        risk_level = "Moderate"
-    else:
-        risk_level = "Low"
-
-    # Natural-language confidence level
-    confidence = (
-        "High confidence" if proba > 0.75 else
-        "Moderate confidence" if proba > 0.50 else
-        "Low confidence" if proba > 0.25 else
-        "Very low confidence"
-    )
-
-    # Explanation engine - Enhanced
-    explanation_points = []
-    
-    # Temperature
-    if data.temperature >= 35:
-        explanation_points.append("Extremely high temperatures significantly increase the likelihood of ignition and rapid spread.")
-    elif data.temperature > 30:
-        explanation_points.append("High temperatures increase the likelihood of ignition.")
-    elif data.temperature < 15:
-        explanation_points.append("Lower temperatures reduce the chances of fire ignition.")
-
-    # Humidity
-    if data.humidity <= 20:
-        explanation_points.append("Very low humidity leads to extremely dry fuels, accelerating fire spread.")
-    elif data.humidity < 40:
-        explanation_points.append("Low humidity indicates dry air, increasing fire risk.")
-    elif data.humidity > 80:
-        explanation_points.append("High humidity helps suppress fire spread due to moisture in the air.")
-    elif data.humidity > 60:
-        explanation_points.append("Moderate to high humidity conditions somewhat reduce fire risk.")
-
-    # Wind Speed
-    if data.wind_speed >= 15:
-        explanation_points.append("Very strong winds can fan flames, carry embers, and drastically aid fire growth.")
-    elif data.wind_speed > 8:
-        explanation_points.append("Strong winds can fan flames and aid fire growth.")
-    elif data.wind_speed < 2:
-        explanation_points.append("Calm winds help limit fire spread.")
-
-    # Precipitation
-    if data.precipitation >= 25:
-        explanation_points.append("Significant recent rainfall (heavy) almost eliminates immediate ignition chances.")
-    elif data.precipitation >= 5:
-        explanation_points.append("Recent precipitation helps lower ignition chances.")
-    elif data.precipitation == 0:
-        explanation_points.append("No recent precipitation contributes to drier conditions.")
-
-    # VPD
-    if vpd is not None:
-        if vpd >= 3.0:
-            explanation_points.append(f"VPD value of {vpd} kPa indicates extremely dry air and vegetation.")
-        elif vpd >= 1.8:
-            explanation_points.append(f"VPD value of {vpd} kPa indicates very dry air conditions, highly conducive to fire.")
-        elif vpd >= 0.8:
-            explanation_points.append(f"VPD value of {vpd} kPa indicates moderately dry air conditions.")
-        else:
-            explanation_points.append(f"VPD value of {vpd} kPa indicates moist air conditions, reducing fire risk.")
-    
-    # Elevation - Could add rules based on elevation and typical vegetation for that elevation
-    # Example: if data.elevation > 1500: explanation_points.append("Higher elevations might have different vegetation types and weather patterns affecting fire risk.")
-
-    # Summary headline (keep existing)
-    summary = {
-        "High": "Multiple dry‑and‑windy indicators suggest rapid ignition and spread.",
-        "Moderate": "Some dryness exists, but moderating influences are present.",
-        "Low": "Moist conditions or recent rain keep fire risk minimal."
-    }[risk_level]
-
-    # Risk message
-    risk_message = {
-        "High": " High fire risk! Take precautions.",
-        "Moderate": "Moderate risk: Be alert.",
-        "Low": "Your forest is safe. Low fire risk."
-    }[risk_level]
-
-    # Final explanation sentence
-    explanation_text = (
-        f"{summary} " +
-        (" ".join(explanation_points) if explanation_points else "No specific dominant factors observed based on current rules.") +
-        f" Overall, the fire risk here is {risk_level.lower()}."
-    )
-
-    return {
-        "fire_occurred": fire_flag,
-        "risk_level": risk_level,
-        "confidence": confidence,
-        "probability": float(proba),
-        "input": enriched,
-        "explanation": explanation_text,
-        "risk_message": risk_message
-    }
+async def predict_manual(data: ManualInput):
+    model_registry.require()
+
+    # Feature row in training column order, with VPD (Vapor Pressure Deficit) computed
+    with metrics.stage("features"):
+        row = features_from(data.dict())[0]
+    vpd = None if math.isnan(row[-1]) else float(row[-1])  # None if VPD calculation fails
+    enriched = {**data.dict(), "vpd": vpd}
+
+    # Predict fire probability: cached for near-identical inputs, otherwise
+    # batched with any other requests in flight
+    proba = prediction_cache.get(row)
+    if proba is None:
+        generation = prediction_cache.generation
+        try:
+            proba = await batcher.submit(row)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error predicting fire risk: {e}")
+        prediction_cache.put(row, proba, generation)
+    with metrics.stage("explain"):
+        return describe_prediction(enriched, proba, explain_codes(row)[0])
+
+
+# Batch predict route
+@app.post("/predict-batch")
+async def predict_batch(request: Request, format: str = None):
+    """
+    Score many points at once. Accepts a JSON array, NDJSON or CSV body (or a
+    multipart file upload) with the ManualInput fields, and streams back one
+    predict_manual result per row as NDJSON (default) or CSV (?format=csv or
+    Accept: text/csv), chunk by chunk.
+    """
+    handle = model_registry.require()
+
+    if format is None:
+        format = "csv" if "text/csv" in request.headers.get("accept", "") else "ndjson"
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+
+    records = await open_records(request)
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(stream_predictions(records, handle.predict_proba, format), media_type=media_type)
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Latency histograms per route and pipeline stage, model and failure counters (Prometheus format)"""
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/predict-manual/stats")
+async def predict_manual_stats():
+    """Batch fill and queue wait of the /predict-manual batcher"""
+    return batcher.stats()
+
+
+@app.get("/predict-cache/stats")
+async def predict_cache_stats():
+    """Hits, misses and evictions of the shared prediction cache"""
+    return prediction_cache.stats()
+
+
+@app.get("/weather-cache/stats")
+async def weather_cache_stats():
+    """Hits, misses and merged fetches of the shared weather cache"""
+    return weather_cache.stats()
+
+
+@app.get("/inference/stats")
+async def inference_stats():
+    """Pool size, queue depth and per-worker utilisation of the inference pool"""
+    handle = model_registry.current
+    if handle is None or handle.pool is None:
+        return {"running": False, "pool_size": 0, "in_flight": 0, "queue_depth": 0, "completed": 0, "restarts": 0,
+                "workers": []}
+    return handle.pool.stats()
+
+
+@app.get("/model")
+async def model_info():
+    """Version (content hash) and load time of the active model"""
+    return model_registry.status()
 
 
 class Settings(BaseModel):
@@ -1,5 +1,6 @@
 import datetime
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import PlainTextResponse, Response
 from fastapi_jwt_auth import AuthJWT
 from models.alert_model import FireAlert, UpdateAlert, CreateAlertRequest
 from database.mongo import alerts_collection
@@ -13,12 +14,19 @@ from database.mongo import db
 from services.scan import scan_nepal_and_generate_alerts
 from auth.dependencies import admin_required
 from services.scan import scan_nepal_only
-import pandas as pd
 import numpy as np
 import math
-import joblib
-from typing import List, Dict, Any
-import requests
+from services.model_registry import model_registry
+from services.prediction_cache import prediction_cache
+from services.explanations import explain_codes, fire_risk_levels, render_explanation
+from services.metrics import stage
+from services.grid_scan import (GRID_ELEVATION_FILE, GRID_SCAN_CHUNK_CELLS, GRID_SCAN_RESOLUTION, GRID_WEATHER_STEP,
+                               GRID_WINDOW_MAX_CELLS, MIN_RESOLUTION, NEPAL_BBOX, Raster, cell_centers, colourize,
+                               encode_png, grid_header, grid_scanner)
+from services.profiler import profiler_control
+from services.weather_providers import weather_provider
+from utils.features import assemble_features
+from typing import List, Dict, Any, Optional
 import time
 
 
@@ -60,7 +68,7 @@ def send_reply_email(payload: EmailReply):
         msg['From'] = sender
         msg['To'] = payload.to_email
 
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
+        with stage("smtp", api="smtp"), smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
             server.login(sender, password)
             server.send_message(msg)
 
@@ -89,7 +97,7 @@ async def send_report_reply(payload: ReportEmailReply, user=Depends(admin_requir
         msg['From'] = sender
         msg['To'] = report['email']
 
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
+        with stage("smtp", api="smtp"), smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
             server.login(sender, password)
             server.send_message(msg)
 
@@ -99,28 +107,10 @@ async def send_report_reply(payload: ReportEmailReply, user=Depends(admin_requir
         raise HTTPException(status_code=500, detail=f"Failed to send email: {str(e)}")
 
 
-# Load model and scaler
-try:
-    model = joblib.load("model/random_forest_final_model.pkl")
-    scaler = joblib.load("model/scaler.pkl")
-    print("Model and scaler loaded for admin routes")
-except Exception as e:
-    print(f"Error loading model: {e}")
-    try:
-        # Try alternative path
-        model = joblib.load("./model/random_forest_final_model.pkl")
-        scaler = joblib.load("./model/scaler.pkl")
-        print("Model and scaler loaded with alternative path")
-    except Exception as e2:
-        print(f"Error loading model with alternative path: {e2}")
-        model = None
-        scaler = None
-
-# Features expected by the model
-features = [
-    'latitude', 'longitude', 'temperature', 'humidity',
-    'wind_speed', 'precipitation', 'elevation', 'vpd'
-]
+# Model and scaler come from the shared model registry (loaded once for all routes)
+
+# VPD used when it cannot be calculated from the weather data
+DEFAULT_VPD = 1.5
 
 # Nepal forest/rural districts with coordinates and typical weather data for forest fire prediction
 NEPAL_DISTRICTS = [
@@ -214,45 +204,28 @@ NEPAL_DISTRICTS = [
     {"district": "Nawalpur", "lat": 27.8667, "lng": 84.2667, "elevation": 457},
 ]
 
-def calculate_vpd(temperature, humidity):
-    """Calculate Vapor Pressure Deficit"""
-    try:
-        es = 0.6108 * math.exp((17.27 * temperature) / (temperature + 237.3))
-        ea = (humidity / 100) * es
-        vpd = round(es - ea, 3)
-        return vpd
-    except:
-        return 1.5  # Default value
-
 def predict_fire_risk(lat, lng, elevation, temperature, humidity, wind_speed, precipitation):
     """Predict fire risk for a given location"""
-    if model is None or scaler is None:
+    handle = model_registry.current
+    if handle is None:
         return {"error": "Model not loaded"}
     
     try:
-        # Calculate VPD
-        vpd = calculate_vpd(temperature, humidity)
-        
-        # Prepare input data
-        input_data = {
-            'latitude': lat,
-            'longitude': lng,
-            'temperature': temperature,
-            'humidity': humidity,
-            'wind_speed': wind_speed,
-            'precipitation': precipitation,
-            'elevation': elevation,
-            'vpd': vpd
-        }
-        
-        # Create DataFrame
-        X_input = pd.DataFrame([input_data], columns=features)
-        
-        # Scale the input
-        X_scaled = scaler.transform(X_input)
-        
-        # Predict probability
-        proba = model.predict_proba(X_scaled)[0][1]
+        # Prepare input data (VPD is calculated from temperature and humidity)
+        with stage("features"):
+            X = assemble_features(lat, lng, temperature, humidity, wind_speed, precipitation, elevation)
+            if math.isnan(X[0, -1]):
+                X[0, -1] = DEFAULT_VPD
+        row = X[0]
+
+        # Reuse the prediction for near-identical inputs (shared with /predict-manual)
+        proba = prediction_cache.get(row)
+        if proba is None:
+            generation = prediction_cache.generation
+
+            # Predict probability (the handle applies the scaler, if it is not folded into the model)
+            proba = handle.predict_proba(X)[0]
+            prediction_cache.put(row, proba, generation)
         
         return {
             'probability': float(proba),
@@ -262,45 +235,40 @@ def predict_fire_risk(lat, lng, elevation, temperature, humidity, wind_speed, pr
     except Exception as e:
         return {"error": f"Prediction failed: {str(e)}"}
 
-def get_real_weather_data(lat: float, lng: float) -> Dict[str, float]:
+async def predict_fire_risk_many(handle, X):
     """
-    Get real-time weather data for a location using OpenWeatherMap API
-    Returns: temperature, humidity, wind_speed, precipitation
+    Fire probability per row of feature matrix X: rows predicted recently come
+    from the prediction cache, all the others are scored in one model call
     """
-    try:
-        # Use the API key from your frontend config
-        API_KEY = "5341c37b13eb4a2994bda9c8d710103a"
-        
-        # Get current weather
-        weather_url = f"http://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lng}&appid={API_KEY}&units=metric"
-        response = requests.get(weather_url, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            
-            # Extract weather data
-            temperature = data["main"]["temp"]
-            humidity = data["main"]["humidity"]
-            wind_speed = data["wind"]["speed"]  # m/s, convert to km/h
-            wind_speed_kmh = wind_speed * 3.6
-            
-            # Get precipitation (rain in last hour)
-            precipitation = data.get("rain", {}).get("1h", 0)  # mm in last hour
-            
-            return {
-                "temperature": temperature,
-                "humidity": humidity,
-                "wind_speed": wind_speed_kmh,
-                "precipitation": precipitation
-            }
+    proba = np.empty(len(X))
+    missing = []
+    for i, row in enumerate(X):
+        cached = prediction_cache.get(row)
+        if cached is None:
+            missing.append(i)
         else:
+            proba[i] = cached
+    if missing:
+        generation = prediction_cache.generation
+        proba[missing] = await handle.predict_proba_async(X[missing])
+        for i in missing:
+            prediction_cache.put(X[i], proba[i], generation)
+    return proba
+
+async def get_real_weather_many(points: List[tuple]) -> List[Dict[str, float]]:
+    """
+    Get real-time weather data for many (lat, lng) points from the configured
+    weather provider (Open-Meteo by default: one request per 100 points), through
+    the weather cache, so points in a recently fetched grid cell are not fetched again
+    Returns per point: temperature, humidity, wind_speed, precipitation
+    """
+    all_weather = await weather_provider.get_weather_many(points)
+    for i, ((lat, lng), data) in enumerate(zip(points, all_weather)):
+        if isinstance(data, Exception):
             # Fallback to simulated data if API fails
-            print(f"Weather API failed for {lat}, {lng}. Using simulated data.")
-            return get_simulated_weather_data(lat, lng)
-            
-    except Exception as e:
-        print(f"Error fetching weather data: {e}. Using simulated data.")
-        return get_simulated_weather_data(lat, lng)
+            print(f"Weather API failed for {lat}, {lng}: {data!r}. Using simulated data.")
+            all_weather[i] = get_simulated_weather_data(lat, lng)
+    return all_weather
 
 def get_simulated_weather_data(lat: float, lng: float) -> Dict[str, float]:
     """
@@ -395,7 +363,7 @@ async def mark_report_resolved(report_id: str, status: UpdateReportStatus):
                 msg['From'] = sender
                 msg['To'] = report['email']
                 
-                with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
+                with stage("smtp", api="smtp"), smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
                     server.login(sender, password)
                     server.send_message(msg)
                     
@@ -421,60 +389,124 @@ async def get_all_reports():
 @router.get("/test-model")
 async def test_model(user=Depends(admin_required)):
     """Test if the model is loaded correctly"""
-    if model is None or scaler is None:
-        return {"status": "error", "message": "Model not loaded"}
-    return {"status": "success", "message": "Model loaded successfully"}
+    if model_registry.current is None:
+        message = "Model is still loading" if model_registry.loading else "Model not loaded"
+        return {"status": "error", "message": message}
+    return {"status": "success", "message": "Model loaded successfully", **model_registry.status()}
+
+
+# Active model version, and zero-downtime reload of the model file on disk
+@router.get("/admin/model")
+async def model_status(user=Depends(admin_required)):
+    return model_registry.status()
+
+
+@router.post("/admin/model/reload", status_code=202)
+async def reload_model(user=Depends(admin_required)):
+    """Load and warm the model currently on disk in the background, then swap it in"""
+    started = model_registry.reload_in_background()
+    return {"status": "reloading" if started else "already reloading", **model_registry.status()}
+
+
+# On-demand sampling profiler for live requests
+class ProfileRequest(BaseModel):
+    route: Optional[str] = None        # request path or glob, e.g. /scan-nepal or /reports/*
+    requests: Optional[int] = None     # profile the next N requests matching route...
+    seconds: Optional[float] = None    # ...or every thread for this many seconds
+    interval_ms: float = 5.0
+
+
+@router.post("/admin/profile", status_code=202)
+async def start_profile(request: ProfileRequest, user=Depends(admin_required)):
+    """Attach the sampling profiler to the next N matching requests or to a time window"""
+    if request.requests is not None and request.requests < 1:
+        raise HTTPException(400, detail="requests must be at least 1")
+    if request.seconds is not None and not 0 < request.seconds <= 600:
+        raise HTTPException(400, detail="seconds must be between 0 and 600")
+    if not 0.5 <= request.interval_ms <= 1000:
+        raise HTTPException(400, detail="interval_ms must be between 0.5 and 1000")
+    try:
+        session = profiler_control.start(route=request.route, requests=request.requests,
+                                         seconds=request.seconds, interval=request.interval_ms / 1000)
+    except ValueError as e:
+        raise HTTPException(400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(409, detail=str(e))
+    return session.status()
+
+
+@router.get("/admin/profile")
+async def profile_status(user=Depends(admin_required)):
+    session = profiler_control.last
+    return session.status() if session is not None else {"state": "idle"}
+
+
+@router.delete("/admin/profile")
+async def stop_profile(user=Depends(admin_required)):
+    """Finish the running profile now; its report covers the samples taken so far"""
+    session = profiler_control.stop()
+    return session.status() if session is not None else {"state": "idle"}
+
+
+@router.get("/admin/profile/report", response_class=PlainTextResponse)
+async def profile_report(user=Depends(admin_required)):
+    """The last finished profile as collapsed stacks (flamegraph.pl, speedscope, inferno)"""
+    session = profiler_control.last
+    if session is None:
+        raise HTTPException(404, detail="No profile has been taken")
+    if not session.finished:
+        raise HTTPException(409, detail="The profile is still running")
+    return PlainTextResponse(session.profiler.collapsed())
 
 # Full Nepal Fire Risk Scan
 @router.post("/scan-nepal")
 async def scan_nepal_fire_risk(user=Depends(admin_required)):
     """Scan all Nepal districts for fire risk"""
+    handle = model_registry.require("Fire prediction model not loaded")
     try:
-        if model is None or scaler is None:
-            raise HTTPException(500, detail="Fire prediction model not loaded")
-        
+        # Get real weather data for every district in bulk (with fallback to simulation)
+        all_weather = await get_real_weather_many([(district["lat"], district["lng"]) for district in NEPAL_DISTRICTS])
+
+        # One feature matrix for every district (VPD is calculated from temperature and humidity)
+        with stage("features"):
+            inputs = np.array([
+                (district["lat"], district["lng"], weather_data["temperature"], weather_data["humidity"],
+                 weather_data["wind_speed"], weather_data["precipitation"], district["elevation"])
+                for district, weather_data in zip(NEPAL_DISTRICTS, all_weather)
+            ], dtype=float).reshape(-1, 7)
+            X = assemble_features(*inputs.T)
+            X[np.isnan(X[:, -1]), -1] = DEFAULT_VPD
+
+        # Predict and explain every district at once
+        proba = await predict_fire_risk_many(handle, X)
+        risk_levels = fire_risk_levels(proba).tolist()
+        with stage("explain"):
+            codes = explain_codes(X)
+        vpds = X[:, -1].tolist()
+
+        # Sort by probability (highest risk first; ties keep the district order)
         results = []
-        
-        # Get real-time weather data for each district
-        for district in NEPAL_DISTRICTS:
-            elevation = district["elevation"]
-            
-            # Get real weather data (with fallback to simulation)
-            weather_data = get_real_weather_data(district["lat"], district["lng"])
-            
-            temperature = weather_data["temperature"]
-            humidity = weather_data["humidity"]
-            wind_speed = weather_data["wind_speed"]
-            precipitation = weather_data["precipitation"]
-            
-            # Predict fire risk
-            prediction = predict_fire_risk(
-                district["lat"], district["lng"], elevation,
-                temperature, humidity, wind_speed, precipitation
-            )
-            
-            if "error" not in prediction:
-                results.append({
-                    "forest": district.get("forest", district.get("district", "Unknown Forest")),
-                    "district": district.get("district", "Unknown District"),
-                    "latitude": district["lat"],
-                    "longitude": district["lng"],
-                    "elevation": elevation,
-                    "province": district.get("province", "Unknown"),
-                    "location_details": district.get("location_details", "Nepal"),
-                    "weather_data": {
-                        "temperature": round(temperature, 1),
-                        "humidity": round(humidity, 1),
-                        "wind_speed": round(wind_speed, 1),
-                        "precipitation": round(precipitation, 1)
-                    },
-                    "fire_risk": prediction["risk_level"],
-                    "probability": prediction["probability"],
-                    "fire_flag": prediction["fire_flag"]
-                })
-        
-        # Sort by probability (highest risk first)
-        results.sort(key=lambda x: x["probability"], reverse=True)
+        for i in np.argsort(-proba, kind="stable").tolist():
+            district, weather_data = NEPAL_DISTRICTS[i], all_weather[i]
+            results.append({
+                "forest": district.get("forest", district.get("district", "Unknown Forest")),
+                "district": district.get("district", "Unknown District"),
+                "latitude": district["lat"],
+                "longitude": district["lng"],
+                "elevation": district["elevation"],
+                "province": district.get("province", "Unknown"),
+                "location_details": district.get("location_details", "Nepal"),
+                "weather_data": {
+                    "temperature": round(weather_data["temperature"], 1),
+                    "humidity": round(weather_data["humidity"], 1),
+                    "wind_speed": round(weather_data["wind_speed"], 1),
+                    "precipitation": round(weather_data["precipitation"], 1)
+                },
+                "fire_risk": risk_levels[i],
+                "probability": float(proba[i]),
+                "fire_flag": int(proba[i] >= 0.5),
+                "explanation": render_explanation(codes[i], risk_levels[i], vpds[i]),
+            })
         
         # Separate high and moderate risk districts
         high_risk_districts = [
@@ -501,6 +533,95 @@ async def scan_nepal_fire_risk(user=Depends(admin_required)):
     except Exception as e:
         raise HTTPException(500, detail=f"Scan failed: {str(e)}")
 
+# High-resolution grid scan: a fire-risk raster over Nepal's bounding box
+class GridScanRequest(BaseModel):
+    resolution: float = GRID_SCAN_RESOLUTION   # cell size in degrees (0.01 and up)
+    chunk_cells: int = GRID_SCAN_CHUNK_CELLS   # cells scored per model call
+
+
+def nearest_district_elevation(lats, lngs):
+    """Elevation of the nearest district centre to each point (used when no elevation raster is configured)"""
+    centres = np.array([(d["lat"], d["lng"], d["elevation"]) for d in NEPAL_DISTRICTS], dtype=float)
+    distance = (lats[:, None] - centres[:, 0]) ** 2 + (lngs[:, None] - centres[:, 1]) ** 2
+    return centres[distance.argmin(axis=1), 2]
+
+
+async def get_grid_conditions():
+    """
+    Weather (and elevation) on a GRID_WEATHER_STEP-degree grid over Nepal, in bulk
+    from the weather provider (with fallback to simulation), as a 3-D Raster
+    """
+    header = grid_header(NEPAL_BBOX, GRID_WEATHER_STEP)
+    lats, lngs = cell_centers(header, np.arange(header["rows"] * header["cols"]))
+    all_weather = await get_real_weather_many(list(zip(lats.tolist(), lngs.tolist())))
+    conditions = np.empty((len(all_weather), 5), dtype=np.float32)
+    for i, weather_data in enumerate(all_weather):
+        conditions[i, :4] = (weather_data["temperature"], weather_data["humidity"],
+                             weather_data["wind_speed"], weather_data["precipitation"])
+    conditions[:, 4] = nearest_district_elevation(lats, lngs)
+    return Raster(header, conditions.reshape(header["rows"], header["cols"], 5))
+
+
+@router.post("/admin/grid-scan", status_code=202)
+async def start_grid_scan(request: GridScanRequest, user=Depends(admin_required)):
+    """Score every cell of a grid over Nepal in the background and write the risk raster"""
+    if request.resolution < MIN_RESOLUTION:
+        raise HTTPException(400, detail=f"resolution must be at least {MIN_RESOLUTION} degrees")
+    if request.chunk_cells < 1:
+        raise HTTPException(400, detail="chunk_cells must be at least 1")
+    handle = model_registry.require("Fire prediction model not loaded")
+    if grid_scanner.running:
+        raise HTTPException(409, detail="A grid scan is already running")
+
+    conditions = await get_grid_conditions()
+    elevation = Raster.load(GRID_ELEVATION_FILE) if GRID_ELEVATION_FILE else None
+    if not grid_scanner.start(handle.predict_proba, conditions, request.resolution, request.chunk_cells,
+                              elevation=elevation, default_vpd=DEFAULT_VPD):
+        raise HTTPException(409, detail="A grid scan is already running")
+    return grid_scanner.status()
+
+
+@router.get("/admin/grid-scan")
+async def grid_scan_status(user=Depends(admin_required)):
+    """Progress of the last grid scan and the header of the raster being served"""
+    return grid_scanner.status()
+
+
+def latest_raster():
+    raster = grid_scanner.raster()
+    if raster is None:
+        raise HTTPException(404, detail="No grid scan has been run yet")
+    return raster
+
+
+@router.get("/grid-scan/tiles/{z}/{x}/{y}.png")
+async def grid_scan_tile(z: int, x: int, y: int):
+    """Web-mercator map tile of the latest risk raster (transparent where there is no data)"""
+    if not 0 <= z <= 18 or not 0 <= x < 2 ** z or not 0 <= y < 2 ** z:
+        raise HTTPException(404, detail="No such tile")
+    raster = latest_raster()
+    png = encode_png(colourize(raster.tile(z, x, y)))
+    return Response(png, media_type="image/png", headers={"Cache-Control": "public, max-age=300"})
+
+
+@router.get("/grid-scan/window")
+async def grid_scan_window(min_lat: float, max_lat: float, min_lng: float, max_lng: float, stride: int = 1):
+    """Risk values of the latest raster inside a lat/lng box (every stride-th cell; null where there is no data)"""
+    if min_lat >= max_lat or min_lng >= max_lng:
+        raise HTTPException(400, detail="The window is empty")
+    if stride < 1:
+        raise HTTPException(400, detail="stride must be at least 1")
+    raster = latest_raster()
+    window, values = raster.window(min_lat, max_lat, min_lng, max_lng, stride)
+    if window["rows"] * window["cols"] > GRID_WINDOW_MAX_CELLS:
+        raise HTTPException(400, detail=f"The window has {window['rows'] * window['cols']} cells; "
+                                        f"use a smaller box or a larger stride (at most {GRID_WINDOW_MAX_CELLS})")
+    values = np.round(values.astype(float), 4)
+    return {
+        **window,
+        "values": [[None if math.isnan(v) else v for v in row] for row in values.tolist()],
+    }
+
 # Alert Management
 @router.post("/alerts")
 async def create_alert(alert_data: CreateAlertRequest, user=Depends(admin_required)):
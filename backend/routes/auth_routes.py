@@ -15,6 +15,7 @@ from utils.jwt import create_jwt
 from email.mime.text import MIMEText
 import os
 import smtplib
+from services.metrics import stage
 
 router = APIRouter(tags=["Auth"])
 admins_collection = db["admins"]
@@ -115,7 +116,7 @@ async def register_user(user: UserRegisterRequest):
         msg['Subject'] = subject
         msg['From'] = sender
         msg['To'] = user.email
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
+        with stage("smtp", api="smtp"), smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
             server.login(sender, password)
             server.send_message(msg)
     except Exception as e:
@@ -183,7 +184,7 @@ async def resend_otp(payload: ResendOTPRequest):
         msg['Subject'] = subject
         msg['From'] = sender
         msg['To'] = user["email"]
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
+        with stage("smtp", api="smtp"), smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
             server.login(sender, password)
             server.send_message(msg)
     except Exception as e:
@@ -265,7 +266,7 @@ async def forgot_password(payload: ForgotPasswordRequest):
         msg['Subject'] = subject
         msg['From'] = sender
         msg['To'] = user["email"]
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
+        with stage("smtp", api="smtp"), smtplib.SMTP_SSL("smtp.gmail.com", 465) as server:
             server.login(sender, password)
             server.send_message(msg)
     except Exception as e:
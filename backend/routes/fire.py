@@ -1,6 +1,5 @@
 
 from fastapi import APIRouter
-import requests
 import csv
 import io
 
@@ -8,6 +7,7 @@ router = APIRouter()
 
 @router.get("/fires")
 def get_fires():
+    import requests
     url = "https://firms.modaps.eosdis.nasa.gov/api/area/csv/?bbox=80,26,89,30"
     auth = ("your_earthdata_username", "your_earthdata_password")
     response = requests.get(url, auth=auth)
@@ -1,10 +1,10 @@
 
 from fastapi import APIRouter
 from fastapi.responses import JSONResponse
-import requests
 import csv
 import io
 
+from services.metrics import count_failure, stage
 from services.fire_stats import (
     get_confidence_level_counts,
     get_elevation_fire_counts,
@@ -18,11 +18,14 @@ router = APIRouter()
 #  Live NASA FIRMS API (real-time fires)
 @router.get("/fires")
 def get_fires():
+    import requests
     url = "https://firms.modaps.eosdis.nasa.gov/api/area/csv/?bbox=80,26,89,30"
     auth = ("your_earthdata_username", "your_earthdata_password")
-    response = requests.get(url, auth=auth)
+    with stage("firms", api="firms"):
+        response = requests.get(url, auth=auth)
     
     if response.status_code != 200:
+        count_failure("firms")
         return {"error": "Failed to fetch fire data"}
     
     csv_text = response.text
@@ -0,0 +1,255 @@
+import codecs
+import csv
+import io
+import json
+import math
+import os
+import tempfile
+
+import numpy as np
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import UploadFile
+
+from services.explanations import explain_codes
+from services.metrics import stage
+from services.prediction import describe_prediction
+from utils.features import INPUT_FIELDS, assemble_features
+
+load_dotenv()
+
+# Rows scored per forest call by /predict-batch (override in .env)
+CHUNK_ROWS = int(os.getenv("PREDICT_BATCH_CHUNK_ROWS", "4096"))
+
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"}
+CSV_COLUMNS = (["row"] + INPUT_FIELDS + ["vpd", "fire_occurred", "risk_level", "confidence", "probability",
+                                         "explanation", "risk_message", "error"])
+
+
+class BatchInputError(ValueError):
+    """The request body cannot be parsed any further"""
+
+
+# ---- Input parsing (all incremental, so memory does not grow with the input) ----
+
+async def _decode(byte_chunks):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    async for chunk in byte_chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def _lines(byte_chunks):
+    pending = ""
+    async for text in _decode(byte_chunks):
+        pending += text
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    if pending.strip():
+        yield pending.rstrip("\r")
+
+
+async def _ndjson_records(byte_chunks):
+    async for line in _lines(byte_chunks):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"invalid JSON: {e}")
+
+
+async def _json_array_records(byte_chunks):
+    """Yield the elements of a top-level JSON array without reading it all at once."""
+    decoder = json.JSONDecoder()
+    buffer, pos, started = "", 0, False
+    async for text in _decode(byte_chunks):
+        buffer = buffer[pos:] + text
+        pos = 0
+        while True:
+            while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ",")):
+                pos += 1
+            if pos == len(buffer):
+                break
+            if not started:
+                if buffer[pos] != "[":
+                    raise BatchInputError("expected a JSON array of objects")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                record, pos = decoder.raw_decode(buffer, pos)
+            except ValueError:
+                break  # element continues in the next chunk
+            yield record
+    raise BatchInputError("JSON array is truncated or malformed")
+
+
+async def _csv_records(byte_chunks):
+    header = None
+    async for line in _lines(byte_chunks):
+        if not line.strip():
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+        else:
+            yield dict(zip(header, values))
+
+
+async def _spool_body(request, max_memory=1 << 20):
+    """
+    Copy the request body to a temporary file (kept in memory up to
+    max_memory bytes). The body has to be consumed before the response
+    starts streaming, because StreamingResponse also reads from the
+    connection to watch for disconnects.
+    """
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+    return UploadFile(file=spool)
+
+
+async def _upload_bytes(upload, size=1 << 16):
+    while True:
+        chunk = await upload.read(size)
+        if not chunk:
+            break
+        yield chunk
+    await upload.close()
+
+
+async def open_records(request):
+    """
+    Pick the record parser for a /predict-batch request: a JSON array
+    (application/json), NDJSON (application/x-ndjson), a CSV body (text/csv)
+    or a multipart upload (CSV unless the file name ends in .json/.ndjson/.jsonl).
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in NDJSON_TYPES | {"application/json", "text/csv", "multipart/form-data"}:
+        raise HTTPException(415, detail="Send a JSON array, NDJSON, CSV, or a multipart file upload")
+
+    if content_type == "multipart/form-data":
+        form = await request.form()
+        upload = form.get("file") or next((v for v in form.values() if isinstance(v, UploadFile)), None)
+        if not isinstance(upload, UploadFile):
+            raise HTTPException(400, detail="Upload the input as a 'file' form field")
+        name = (upload.filename or "").lower()
+        byte_chunks = _upload_bytes(upload)
+        if name.endswith((".ndjson", ".jsonl")):
+            return _ndjson_records(byte_chunks)
+        if name.endswith(".json"):
+            return _json_array_records(byte_chunks)
+        return _csv_records(byte_chunks)
+
+    byte_chunks = _upload_bytes(await _spool_body(request))
+    if content_type == "application/json":
+        return _json_array_records(byte_chunks)
+    if content_type in NDJSON_TYPES:
+        return _ndjson_records(byte_chunks)
+    return _csv_records(byte_chunks)
+
+
+# ---- Scoring ----
+
+def _parse_record(record):
+    if isinstance(record, Exception):
+        raise record
+    if not isinstance(record, dict):
+        raise ValueError("each row must be an object with the ManualInput fields")
+    values = []
+    for name in INPUT_FIELDS:
+        value = record.get(name)
+        if value is None or value == "":
+            raise ValueError(f"missing field '{name}'")
+        try:
+            values.append(float(value))
+        except (TypeError, ValueError):
+            raise ValueError(f"field '{name}' is not a number: {value!r}")
+    return values
+
+
+def score_records(records, first_row, predict_fn):
+    """
+    Score one chunk of input records with a single forest call.
+    Returns one result per record: the /predict-manual response plus its
+    row number, or {"row": ..., "error": ...} for rows that could not be parsed.
+    """
+    with stage("features"):
+        rows, errors = [], {}
+        for i, record in enumerate(records):
+            try:
+                rows.append(_parse_record(record))
+            except ValueError as e:
+                errors[i] = str(e)
+        X = assemble_features(*np.array(rows, dtype=np.float64).reshape(len(rows), len(INPUT_FIELDS)).T)
+        vpd = X[:, -1]
+
+    proba = predict_fn(X) if len(rows) else []
+
+    with stage("explain"):
+        codes = explain_codes(X)
+        results, valid = [], 0
+        for i in range(len(records)):
+            if i in errors:
+                results.append({"row": first_row + i, "error": errors[i]})
+                continue
+            enriched = dict(zip(INPUT_FIELDS, rows[valid]))
+            enriched["vpd"] = None if math.isnan(vpd[valid]) else float(vpd[valid])
+            results.append({"row": first_row + i, **describe_prediction(enriched, float(proba[valid]), codes[valid])})
+            valid += 1
+    return results
+
+
+def _to_ndjson(results):
+    return "".join(json.dumps(result) + "\n" for result in results)
+
+
+def _to_csv(results, header=False):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    for result in results:
+        flat = {**result.get("input", {}), **result}
+        writer.writerow(["" if flat.get(name) is None else flat[name] for name in CSV_COLUMNS])
+    return out.getvalue()
+
+
+def _score_and_encode(records, first_row, predict_fn, output):
+    results = score_records(records, first_row, predict_fn)
+    return _to_csv(results, header=first_row == 0) if output == "csv" else _to_ndjson(results)
+
+
+async def stream_predictions(records, predict_fn, output="ndjson", chunk_rows=CHUNK_ROWS):
+    """
+    Read records in chunks of chunk_rows, score each chunk off the event loop
+    and yield the encoded results as soon as the chunk is done.
+    """
+    chunk, first_row, error = [], 0, None
+    try:
+        async for record in records:
+            chunk.append(record)
+            if len(chunk) >= chunk_rows:
+                yield await run_in_threadpool(_score_and_encode, chunk, first_row, predict_fn, output)
+                first_row += len(chunk)
+                chunk = []
+    except BatchInputError as e:
+        error = str(e)
+
+    if chunk or first_row == 0:
+        yield await run_in_threadpool(_score_and_encode, chunk, first_row, predict_fn, output)
+        first_row += len(chunk)
+    if error is not None:
+        # The response has already started, so a broken input is reported inline
+        result = [{"row": first_row, "error": error}]
+        yield _to_csv(result) if output == "csv" else _to_ndjson(result)
@@ -0,0 +1,113 @@
+import asyncio
+import inspect
+import os
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Batch window / size for /predict-manual (override in .env)
+BATCH_WINDOW_MS = float(os.getenv("PREDICT_BATCH_WINDOW_MS", "2"))
+BATCH_MAX_ROWS = int(os.getenv("PREDICT_BATCH_MAX_ROWS", "64"))
+
+
+class PredictionBatcher:
+    """
+    Coalesces concurrent single-row predictions into one vectorized call.
+
+    The first request to arrive opens a batch; the batch is flushed when
+    window_ms has passed or max_rows rows are waiting, whichever comes first.
+    predict_fn takes a 2D array and returns (or, if it is async, resolves to)
+    one value per row, and each caller gets back the value for its own row.
+    """
+    def __init__(self, predict_fn, window_ms=BATCH_WINDOW_MS, max_rows=BATCH_MAX_ROWS):
+        if max_rows < 1:
+            raise ValueError("max_rows must be at least 1")
+        self.predict_fn = predict_fn
+        self.window = max(window_ms, 0) / 1000
+        self.max_rows = max_rows
+        self._pending = []
+        self._timer = None
+        self._resolving = set()  # the loop only keeps weak references to tasks
+
+        # Metrics
+        self.batches = 0
+        self.rows = 0
+        self.full_batches = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def submit(self, row):
+        """Queue one feature row and wait for its prediction."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_rows or self.window == 0:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        now = time.perf_counter()
+        waits = [now - queued for _, _, queued in batch]
+        self.batches += 1
+        self.rows += len(batch)
+        self.full_batches += len(batch) >= self.max_rows
+        self.total_wait += sum(waits)
+        self.max_wait = max(self.max_wait, max(waits))
+
+        try:
+            results = self.predict_fn(np.array([row for row, _, _ in batch], dtype=np.float64))
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        if inspect.isawaitable(results):
+            task = asyncio.ensure_future(self._resolve(batch, results))
+            self._resolving.add(task)
+            task.add_done_callback(self._resolving.discard)
+        else:
+            self._deliver(batch, results)
+
+    async def _resolve(self, batch, pending):
+        try:
+            results = await pending
+        except Exception as e:
+            self._fail(batch, e)
+            return
+        self._deliver(batch, results)
+
+    @staticmethod
+    def _deliver(batch, results):
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():  # caller may have been cancelled
+                future.set_result(result)
+
+    @staticmethod
+    def _fail(batch, error):
+        for _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def stats(self):
+        return {
+            "window_ms": self.window * 1000,
+            "max_rows": self.max_rows,
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+            "mean_batch_fill": self.rows / (self.batches * self.max_rows) if self.batches else 0.0,
+            "full_batches": self.full_batches,
+            "mean_queue_wait_ms": 1000 * self.total_wait / self.rows if self.rows else 0.0,
+            "max_queue_wait_ms": 1000 * self.max_wait,
+        }
@@ -0,0 +1,98 @@
+"""
+Rule-based explanations of fire predictions.
+
+The rules are a table evaluated with NumPy masks over a whole feature matrix:
+explain_codes() returns one small integer per rule group and row (0 = no rule
+of that group applies, otherwise the 1-based index of the first matching
+rule), and the text is only rendered from those codes when a response is
+serialised.
+"""
+import numpy as np
+
+from utils.features import FEATURES
+
+OPERATORS = {
+    ">=": np.greater_equal,
+    ">": np.greater,
+    "<=": np.less_equal,
+    "<": np.less,
+    "==": np.equal,
+}
+
+# (feature, [(operator, threshold, text), ...]): the first matching rule of each group wins
+EXPLANATION_RULES = [
+    ("temperature", [
+        (">=", 35, "Extremely high temperatures significantly increase the likelihood of ignition and rapid spread."),
+        (">", 30, "High temperatures increase the likelihood of ignition."),
+        ("<", 15, "Lower temperatures reduce the chances of fire ignition."),
+    ]),
+    ("humidity", [
+        ("<=", 20, "Very low humidity leads to extremely dry fuels, accelerating fire spread."),
+        ("<", 40, "Low humidity indicates dry air, increasing fire risk."),
+        (">", 80, "High humidity helps suppress fire spread due to moisture in the air."),
+        (">", 60, "Moderate to high humidity conditions somewhat reduce fire risk."),
+    ]),
+    ("wind_speed", [
+        (">=", 15, "Very strong winds can fan flames, carry embers, and drastically aid fire growth."),
+        (">", 8, "Strong winds can fan flames and aid fire growth."),
+        ("<", 2, "Calm winds help limit fire spread."),
+    ]),
+    ("precipitation", [
+        (">=", 25, "Significant recent rainfall (heavy) almost eliminates immediate ignition chances."),
+        (">=", 5, "Recent precipitation helps lower ignition chances."),
+        ("==", 0, "No recent precipitation contributes to drier conditions."),
+    ]),
+    ("vpd", [
+        (">=", 3.0, "VPD value of {vpd} kPa indicates extremely dry air and vegetation."),
+        (">=", 1.8, "VPD value of {vpd} kPa indicates very dry air conditions, highly conducive to fire."),
+        (">=", 0.8, "VPD value of {vpd} kPa indicates moderately dry air conditions."),
+        ("<", 0.8, "VPD value of {vpd} kPa indicates moist air conditions, reducing fire risk."),
+    ]),
+]
+
+# Summary headline and overall wording per risk level
+SUMMARIES = {
+    "High": "Multiple dry‑and‑windy indicators suggest rapid ignition and spread.",
+    "Moderate": "Some dryness exists, but moderating influences are present.",
+    "Low": "Moist conditions or recent rain keep fire risk minimal."
+}
+NO_FACTORS = "No specific dominant factors observed based on current rules."
+
+
+def fire_risk_levels(proba):
+    """Risk level per fire probability, with the cut-offs of the admin and alert scans"""
+    return np.where(proba >= 0.60, "High", np.where(proba >= 0.30, "Moderate", "Low"))
+
+
+def explain_codes(X):
+    """
+    Explanation codes for the rows of feature matrix X (FEATURES order):
+    a uint8 array of shape (n, len(EXPLANATION_RULES)). NaN never matches a rule.
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    codes = np.zeros((len(X), len(EXPLANATION_RULES)), dtype=np.uint8)
+    with np.errstate(invalid="ignore"):
+        for group, (feature, rules) in enumerate(EXPLANATION_RULES):
+            column = X[:, FEATURES.index(feature)]
+            masks = [OPERATORS[op](column, threshold) for op, threshold, _ in rules]
+            codes[:, group] = np.select(masks, np.arange(1, len(rules) + 1), default=0)
+    return codes
+
+
+def explanation_points(codes, vpd=None):
+    """Sentences for one row of explanation codes (vpd fills in the VPD rules' value)."""
+    return [
+        rules[code - 1][2].format(vpd=vpd)
+        for (_, rules), code in zip(EXPLANATION_RULES, codes.tolist())
+        if code
+    ]
+
+
+def render_explanation(codes, risk_level, vpd=None):
+    """The full explanation text for one row: summary, matching rules and overall risk."""
+    points = explanation_points(codes, vpd)
+    return (
+        f"{SUMMARIES[risk_level]} " +
+        (" ".join(points) if points else NO_FACTORS) +
+        f" Overall, the fire risk here is {risk_level.lower()}."
+    )
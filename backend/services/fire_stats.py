@@ -1,16 +1,18 @@
 import os
-import pandas as pd
 
 # Base directory of the backend
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DATA_PATH = os.path.join(BASE_DIR, "data", "nepal_fire_data_cleaned.csv")
 
 def load_fire_data():
+    # pandas is imported on first use so it stays out of app startup
+    import pandas as pd
     if not os.path.exists(DATA_PATH):
         raise FileNotFoundError(f"🔥 File not found at: {DATA_PATH}")
     return pd.read_csv(DATA_PATH)
 
 def get_yearly_fire_counts():
+    import pandas as pd
     df = load_fire_data()
     
     # Convert 'acq_date' to datetime
@@ -25,6 +27,7 @@ def get_yearly_fire_counts():
     return yearly_counts.to_dict(orient='records')
 
 def get_monthly_fire_counts():
+    import pandas as pd
     df = load_fire_data()
     df['acq_date'] = pd.to_datetime(df['acq_date'], errors='coerce')
     df['month'] = df['acq_date'].dt.month
@@ -43,6 +46,7 @@ def get_confidence_level_counts():
 
 
 def get_elevation_fire_counts():
+    import pandas as pd
     df = load_fire_data()
 
     bins = [0, 500, 1000, 2000, 3000, 4000, 9000]
@@ -0,0 +1,278 @@
+import json
+import math
+import os
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+from dotenv import load_dotenv
+
+from utils.features import assemble_features
+
+load_dotenv()
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Nepal's bounding box (degrees)
+NEPAL_BBOX = {"min_lat": 26.35, "max_lat": 30.45, "min_lon": 80.05, "max_lon": 88.20}
+
+MIN_RESOLUTION = 0.01
+GRID_SCAN_DIR = os.getenv("GRID_SCAN_DIR", os.path.join(BACKEND_DIR, "data", "grid_scan"))
+GRID_SCAN_RESOLUTION = float(os.getenv("GRID_SCAN_RESOLUTION", "0.01"))
+# Cells assembled and scored at once: peak memory scales with this, not with the grid
+GRID_SCAN_CHUNK_CELLS = int(os.getenv("GRID_SCAN_CHUNK_CELLS", "65536"))
+# Spacing of the weather points the grid takes its weather from (one provider lookup each)
+GRID_WEATHER_STEP = float(os.getenv("GRID_WEATHER_STEP", "0.25"))
+# Optional elevation raster (.npy + .json header, same layout as the risk raster, in metres)
+GRID_ELEVATION_FILE = os.getenv("GRID_ELEVATION_FILE") or None
+GRID_WINDOW_MAX_CELLS = int(os.getenv("GRID_WINDOW_MAX_CELLS", "250000"))
+
+TILE_SIZE = 256
+RASTER_NAME = "fire_risk"
+CONDITIONS = ["temperature", "humidity", "wind_speed", "precipitation", "elevation"]
+
+
+def grid_header(bbox, resolution):
+    """
+    Georeference of a north-up grid over bbox: row 0 is the northern edge,
+    and the centre of cell (row, col) is
+    (max_lat - (row + 0.5) * resolution, min_lon + (col + 0.5) * resolution).
+    """
+    rows = math.ceil(round((bbox["max_lat"] - bbox["min_lat"]) / resolution, 9))
+    cols = math.ceil(round((bbox["max_lon"] - bbox["min_lon"]) / resolution, 9))
+    return {
+        "min_lat": bbox["max_lat"] - rows * resolution,
+        "max_lat": bbox["max_lat"],
+        "min_lon": bbox["min_lon"],
+        "max_lon": bbox["min_lon"] + cols * resolution,
+        "resolution": resolution,
+        "rows": rows,
+        "cols": cols,
+    }
+
+
+def cell_centers(header, index):
+    """(lats, lons) of the cells with these flat (row-major) indices"""
+    rows, cols = np.divmod(index, header["cols"])
+    return (header["max_lat"] - (rows + 0.5) * header["resolution"],
+            header["min_lon"] + (cols + 0.5) * header["resolution"])
+
+
+class Raster:
+    """
+    A georeferenced north-up grid (see grid_header): a 2-D array of one
+    value per cell, or 3-D with several values per cell. Loaded rasters are
+    memory-mapped, so reading a window or a tile only touches its cells.
+    """
+    def __init__(self, header, array):
+        self.header = header
+        self.array = array
+
+    @classmethod
+    def load(cls, path):
+        """Raster from `path` (.npy) and its header (the .json next to it)"""
+        with open(os.path.splitext(path)[0] + ".json") as f:
+            header = json.load(f)
+        return cls(header, np.load(path, mmap_mode="r"))
+
+    def cells(self, lats, lons, clip=False):
+        """(rows, cols, inside) of the cells holding these points; with clip, outside points take the nearest edge cell"""
+        header = self.header
+        rows = np.floor((header["max_lat"] - np.asarray(lats)) / header["resolution"]).astype(np.int64)
+        cols = np.floor((np.asarray(lons) - header["min_lon"]) / header["resolution"]).astype(np.int64)
+        inside = (rows >= 0) & (rows < header["rows"]) & (cols >= 0) & (cols < header["cols"])
+        if clip:
+            inside[:] = True
+        return np.clip(rows, 0, header["rows"] - 1), np.clip(cols, 0, header["cols"] - 1), inside
+
+    def sample(self, lats, lons, clip=False):
+        """Value of the cell holding each point (NaN outside the raster, unless clip)"""
+        rows, cols, inside = self.cells(lats, lons, clip)
+        values = np.asarray(self.array[rows, cols], dtype=np.float32)
+        values[~inside] = np.nan
+        return values
+
+    def window(self, min_lat, max_lat, min_lon, max_lon, stride=1):
+        """(header, values) of the cells overlapping a lat/lon box, every `stride`-th cell per axis"""
+        header = self.header
+        res = header["resolution"]
+        # (rounded so that edges on cell boundaries do not pick up a neighbouring row or column)
+        row0 = max(0, math.floor(round((header["max_lat"] - max_lat) / res, 9)))
+        row1 = min(header["rows"], math.ceil(round((header["max_lat"] - min_lat) / res, 9)))
+        col0 = max(0, math.floor(round((min_lon - header["min_lon"]) / res, 9)))
+        col1 = min(header["cols"], math.ceil(round((max_lon - header["min_lon"]) / res, 9)))
+        values = self.array[row0:max(row0, row1):stride, col0:max(col0, col1):stride]
+        rows, cols = values.shape[:2]
+        window = {
+            "max_lat": header["max_lat"] - row0 * res,
+            "min_lat": header["max_lat"] - row0 * res - rows * res * stride,
+            "min_lon": header["min_lon"] + col0 * res,
+            "max_lon": header["min_lon"] + col0 * res + cols * res * stride,
+            "resolution": res * stride,
+            "rows": rows,
+            "cols": cols,
+        }
+        return window, values
+
+    def tile(self, z, x, y, size=TILE_SIZE):
+        """(size, size) values for web-mercator tile z/x/y, sampled at the pixel centres"""
+        scale = size * 2 ** z
+        pixels = np.arange(size) + 0.5
+        lons = (x * size + pixels) / scale * 360.0 - 180.0
+        lats = np.degrees(np.arctan(np.sinh(np.pi * (1 - 2 * (y * size + pixels) / scale))))
+        lat_grid, lon_grid = np.meshgrid(lats, lons, indexing="ij")
+        return self.sample(lat_grid.ravel(), lon_grid.ravel()).reshape(size, size)
+
+
+# Colour ramp for fire probability: green (low) -> yellow (0.30) -> red (0.60) -> dark red
+RAMP_STOPS = [0.0, 0.30, 0.60, 1.0]
+RAMP_COLOURS = np.array([[46, 204, 113], [241, 196, 15], [231, 76, 60], [120, 0, 0]], dtype=float)
+RAMP_ALPHA = 170
+
+
+def colourize(values):
+    """RGBA (h, w, 4) uint8 image of probabilities; NaN cells are transparent"""
+    rgba = np.zeros(values.shape + (4,), dtype=np.uint8)
+    known = ~np.isnan(values)
+    for channel in range(3):
+        rgba[..., channel][known] = np.interp(values[known], RAMP_STOPS, RAMP_COLOURS[:, channel])
+    rgba[..., 3][known] = RAMP_ALPHA
+    return rgba
+
+
+def encode_png(rgba):
+    """PNG bytes of an RGBA (h, w, 4) uint8 image"""
+    height, width, _ = rgba.shape
+    scanlines = np.zeros((height, width * 4 + 1), dtype=np.uint8)  # filter byte 0 (none) per row
+    scanlines[:, 1:] = rgba.reshape(height, width * 4)
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(scanlines.tobytes(), 6))
+            + chunk(b"IEND", b""))
+
+
+def scan_grid(predict_proba, path, conditions, resolution, bbox=NEPAL_BBOX, chunk_cells=GRID_SCAN_CHUNK_CELLS,
+              elevation=None, default_vpd=None, progress=None):
+    """
+    Score every cell of a `resolution`-degree grid over bbox and write the
+    float32 fire probabilities to `path` (.npy, memory-mapped while it is
+    filled) with the georeference header next to it (.json).
+
+    conditions is a 3-D Raster of the CONDITIONS per cell (usually much
+    coarser than the grid; each cell takes its nearest value); elevation,
+    if given, is a finer elevation Raster that overrides it where it has
+    data. Cells are assembled and scored `chunk_cells` at a time, so memory
+    use does not grow with the grid. Returns the header.
+    """
+    header = grid_header(bbox, resolution)
+    total = header["rows"] * header["cols"]
+    base = os.path.splitext(path)[0]
+    tmp_base = f"{base}.tmp"
+    risk = np.lib.format.open_memmap(f"{tmp_base}.npy", mode="w+", dtype=np.float32,
+                                     shape=(header["rows"], header["cols"]))
+    flat = risk.reshape(-1)
+    for start in range(0, total, chunk_cells):
+        index = np.arange(start, min(start + chunk_cells, total))
+        lats, lons = cell_centers(header, index)
+        temperature, humidity, wind_speed, precipitation, elev = conditions.sample(lats, lons, clip=True).T
+        if elevation is not None:
+            dem = elevation.sample(lats, lons)
+            elev = np.where(np.isnan(dem), elev, dem)
+        X = assemble_features(lats, lons, temperature, humidity, wind_speed, precipitation, elev)
+        if default_vpd is not None:
+            X[np.isnan(X[:, -1]), -1] = default_vpd
+        flat[start:start + len(index)] = predict_proba(X)
+        if progress is not None:
+            progress(start + len(index), total)
+    risk.flush()
+    del flat, risk
+
+    with open(f"{tmp_base}.json", "w") as f:
+        json.dump(dict(header, dtype="float32", nodata="NaN"), f)
+    # Header first: readers key their cached raster on the .npy, so they reload once it is replaced
+    os.replace(f"{tmp_base}.json", f"{base}.json")
+    os.replace(f"{tmp_base}.npy", f"{base}.npy")
+    return header
+
+
+class GridScanner:
+    """
+    Runs grid scans in a background thread, one at a time, and serves the
+    latest raster (reloaded when a newer scan replaces the file).
+    """
+    def __init__(self, directory=GRID_SCAN_DIR):
+        self.directory = directory
+        self.path = os.path.join(directory, f"{RASTER_NAME}.npy")
+        self.job = None  # status of the last scan started in this process
+        self._lock = threading.Lock()
+        self._raster = None
+        self._raster_mtime = None
+
+    @property
+    def running(self):
+        return self.job is not None and self.job["state"] == "running"
+
+    def start(self, predict_proba, conditions, resolution, chunk_cells=GRID_SCAN_CHUNK_CELLS, **options):
+        """Start scan_grid() in a thread; returns False if a scan is already running."""
+        with self._lock:
+            if self.running:
+                return False
+            header = grid_header(options.get("bbox", NEPAL_BBOX), resolution)
+            self.job = job = {
+                "state": "running",
+                "resolution": resolution,
+                "chunk_cells": chunk_cells,
+                "cells": header["rows"] * header["cols"],
+                "cells_done": 0,
+                "started_at": time.time(),
+                "seconds": None,
+                "error": None,
+            }
+
+        def progress(done, total):
+            job["cells_done"] = done
+
+        def run():
+            start = time.perf_counter()
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                scan_grid(predict_proba, self.path, conditions, resolution, chunk_cells=chunk_cells,
+                          progress=progress, **options)
+                job["state"] = "finished"
+            except Exception as e:
+                job["state"] = "failed"
+                job["error"] = str(e)
+                print(f"[ERROR] Grid scan failed: {e}")
+            job["seconds"] = round(time.perf_counter() - start, 3)
+
+        threading.Thread(target=run, name="grid-scan", daemon=True).start()
+        return True
+
+    def raster(self):
+        """The latest raster on disk, or None if no scan has finished yet"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if mtime != self._raster_mtime:
+                self._raster = Raster.load(self.path)
+                self._raster_mtime = mtime
+            return self._raster
+
+    def status(self):
+        raster = self.raster()
+        job = None
+        if self.job is not None:
+            job = dict(self.job, started_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.job["started_at"])))
+        return {"scan": job, "raster": raster.header if raster is not None else None}
+
+
+# Shared by the grid-scan routes (settings from GRID_* in .env)
+grid_scanner = GridScanner()
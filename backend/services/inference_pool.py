@@ -0,0 +1,206 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from dotenv import load_dotenv
+
+from services.metrics import observe_stage
+from utils.model_loader import MODEL_DIR, load_model
+
+load_dotenv()
+
+# Number of inference processes (0 keeps inference in the API process)
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "2"))
+
+# Per-process model, loaded once by _init_worker
+_worker_model = None
+_worker_scaler = None
+
+
+def _init_worker(model_dir):
+    global _worker_model, _worker_scaler
+    # The .rfm file is memory-mapped, so every worker shares the parent's page cache
+    _worker_model, _worker_scaler = load_model(model_dir)
+
+
+def _predict(X):
+    """(pid, seconds in scaler.transform or None, seconds in the forest, probabilities)"""
+    scale_seconds = None
+    if _worker_scaler is not None:
+        start = time.perf_counter()
+        X = _worker_scaler.transform(X)
+        scale_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    proba = _worker_model.predict_proba(X)[:, 1]
+    return os.getpid(), scale_seconds, time.perf_counter() - start, proba
+
+
+def _ping():
+    return os.getpid()
+
+
+class PoolUnavailable(RuntimeError):
+    """The pool cannot take work right now (a worker died and it is restarting, or it was shut down)."""
+
+
+class PoolClosed(PoolUnavailable):
+    """The pool was shut down (its model version was replaced) and takes no more work."""
+
+
+class InferencePool:
+    """
+    Runs forest predictions in a fixed set of worker processes so the
+    pure-Python tree walks never hold the API process's GIL. Each worker
+    loads the model once at start; inputs and results travel as pickled
+    NumPy arrays over the executor's pipes.
+    """
+    def __init__(self, workers=INFERENCE_WORKERS, model_dir=MODEL_DIR):
+        self.workers = workers
+        self.model_dir = model_dir
+        self._executor = None
+        self._started_at = None
+        self._lock = threading.Lock()  # done callbacks run on the executor's thread
+        self._closed = False
+        self.in_flight = 0
+        self.completed = 0
+        self.restarts = 0
+        self._busy = {}   # pid -> seconds spent predicting
+        self._tasks = {}  # pid -> predictions served
+
+    @property
+    def running(self):
+        return self._executor is not None
+
+    def _new_executor(self):
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_dir,),
+        )
+        for future in [executor.submit(_ping) for _ in range(self.workers)]:
+            future.result()
+        return executor
+
+    def start(self):
+        """Start the workers and wait until each one has loaded the model."""
+        if self.running or self.workers <= 0:
+            return
+        executor = self._new_executor()
+        with self._lock:
+            if self._closed:
+                executor.shutdown(wait=False)
+                return
+            self._executor = executor
+            self._started_at = time.perf_counter()
+
+    def _restart(self):
+        try:
+            self.start()
+            print("Inference pool restarted")
+        except Exception as e:
+            print(f"[ERROR] Could not restart the inference pool: {e}")
+
+    def _broken(self, executor):
+        """A worker of `executor` died: stop sending it work and start a fresh pool in the background."""
+        with self._lock:
+            if self._executor is not executor:
+                return  # already handled
+            self._executor = None
+            self.restarts += 1
+            closed = self._closed
+        executor.shutdown(wait=False)  # work it still held fails with BrokenProcessPool
+        print("[ERROR] An inference worker died; predicting in the API process until the pool is restarted")
+        if not closed:
+            threading.Thread(target=self._restart, name="inference-pool-restart", daemon=True).start()
+
+    def shutdown(self):
+        """Refuse new work (submit raises PoolClosed), finish the work already accepted, then stop the workers."""
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _done(self, executor, future):
+        with self._lock:
+            self.in_flight -= 1
+        if future.cancelled():
+            return
+        if isinstance(future.exception(), BrokenProcessPool):
+            self._broken(executor)
+            return
+        if future.exception() is not None:
+            return
+        pid, scale_seconds, forest_seconds, _ = future.result()
+        seconds = (scale_seconds or 0.0) + forest_seconds
+        with self._lock:
+            self.completed += 1
+            self._busy[pid] = self._busy.get(pid, 0.0) + seconds
+            self._tasks[pid] = self._tasks.get(pid, 0) + 1
+        if scale_seconds is not None:
+            observe_stage("scale", scale_seconds)
+        observe_stage("forest", forest_seconds)
+
+    def submit(self, X):
+        """Send X to a worker; raises PoolUnavailable if the pool cannot take it."""
+        with self._lock:
+            executor = self._executor
+            if self._closed:
+                raise PoolClosed("The inference pool was shut down")
+            if executor is None:
+                raise PoolUnavailable("The inference pool is not running")
+            try:
+                future = executor.submit(_predict, X)
+            except BrokenProcessPool:
+                broken = True
+            else:
+                broken = False
+                self.in_flight += 1  # only once the executor has accepted the work
+        if broken:
+            self._broken(executor)
+            raise PoolUnavailable("An inference worker died")
+        future.add_done_callback(partial(self._done, executor))
+        return future
+
+    def predict(self, X):
+        """Fire probability per row of X (blocks the calling thread); raises PoolUnavailable if the pool is down."""
+        try:
+            return self.submit(X).result()[-1]
+        except BrokenProcessPool as e:
+            raise PoolUnavailable("An inference worker died") from e
+
+    async def predict_async(self, X):
+        """Fire probability per row of X, awaited without blocking the event loop."""
+        try:
+            result = await asyncio.wrap_future(self.submit(X))
+        except BrokenProcessPool as e:
+            raise PoolUnavailable("An inference worker died") from e
+        return result[-1]
+
+    def stats(self):
+        uptime = time.perf_counter() - self._started_at if self.running else 0.0
+        with self._lock:
+            busy, tasks = dict(self._busy), dict(self._tasks)
+        return {
+            "running": self.running,
+            "pool_size": self.workers if self.running else 0,
+            "in_flight": self.in_flight,
+            "queue_depth": max(self.in_flight - self.workers, 0) if self.running else 0,
+            "completed": self.completed,
+            "restarts": self.restarts,
+            "workers": [
+                {
+                    "pid": pid,
+                    "tasks": tasks[pid],
+                    "busy_seconds": round(seconds, 6),
+                    "utilisation": round(seconds / uptime, 4) if uptime else 0.0,
+                }
+                for pid, seconds in sorted(busy.items())
+            ],
+        }
@@ -0,0 +1,326 @@
+from bisect import bisect_left
+import math
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# METRICS_ENABLED=0 turns every timer and counter below into a no-op
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() in ("1", "true", "yes")
+
+CONTENT_TYPE = "text/plain; version=0.0.4"  # Starlette adds the charset
+
+_now = time.perf_counter
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Sharded:
+    """
+    One series, kept as a separate list per thread so updates need no lock
+    (each list has a single writer); reads add the shards up.
+    """
+    __slots__ = ("_local", "_shards", "_lock")
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _new_shard(self):
+        shard = self._local.shard = self._empty()
+        with self._lock:
+            self._shards.append(shard)
+        return shard
+
+    def _total(self):
+        with self._lock:
+            shards = list(self._shards)
+        return [sum(values) for values in zip(*shards)] if shards else self._empty()
+
+
+class _CounterChild(_Sharded):
+    __slots__ = ()
+
+    def _empty(self):
+        return [0]
+
+    def inc(self, amount=1):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard[0] += amount
+
+    @property
+    def value(self):
+        return self._total()[0]
+
+
+class _HistogramChild(_Sharded):
+    __slots__ = ("bounds",)
+
+    def __init__(self, bounds):
+        super().__init__()
+        self.bounds = bounds
+
+    def _empty(self):
+        return [0] * (len(self.bounds) + 1) + [0.0]  # bucket counts (the last is +Inf), then the sum
+
+    def observe(self, seconds):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard[bisect_left(self.bounds, seconds)] += 1
+        shard[-1] += seconds
+
+    def snapshot(self):
+        """(bucket counts, sum of observations)"""
+        total = self._total()
+        return total[:-1], total[-1]
+
+
+class _Timer:
+    """
+    Context manager observing the time spent inside it (from its creation,
+    i.e. `with stage(...)`); an exception counts as a failure of `api`.
+    """
+    __slots__ = ("child", "api", "start")
+
+    def __init__(self, child, api):
+        self.child = child
+        self.api = api
+        self.start = _now()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = _now() - self.start
+        child = self.child
+        # child.observe(seconds), inlined: this runs for every stage of every request
+        try:
+            shard = child._local.shard
+        except AttributeError:
+            shard = child._new_shard()
+        shard[bisect_left(child.bounds, seconds)] += 1
+        shard[-1] += seconds
+        if exc_type is not None and self.api is not None:
+            count_failure(self.api)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help, labelnames=(), registry=None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        (REGISTRY if registry is None else registry).append(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """The series for these label values (created on first use)."""
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def samples(self):
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        lines += [f"{name}{labels} {_number(value)}" for name, labels, value in self.samples()]
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def samples(self):
+        for values, child in sorted(self._children.items()):
+            yield self.name, _labels(self.labelnames, values), child.value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, seconds):
+        self.labels().observe(seconds)
+
+    def samples(self):
+        for values, child in sorted(self._children.items()):
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.bounds + (math.inf,), counts):
+                cumulative += count
+                yield (f"{self.name}_bucket", _labels(self.labelnames, values, f'le="{_number(bound)}"'),
+                       cumulative)
+            yield f"{self.name}_sum", _labels(self.labelnames, values), total
+            yield f"{self.name}_count", _labels(self.labelnames, values), cumulative
+
+
+REGISTRY = []
+
+
+def render(registry=None):
+    """Every metric in Prometheus text exposition format."""
+    metrics = REGISTRY if registry is None else registry
+    return "".join(metric.render() + "\n" for metric in metrics)
+
+
+# ---- The app's metrics ----
+
+request_seconds = Histogram(
+    "http_request_duration_seconds", "Time to serve a request, by route template",
+    ["method", "route"])
+requests_total = Counter(
+    "http_requests_total", "Requests served, by route template and status code",
+    ["method", "route", "status"])
+stage_seconds = Histogram(
+    "stage_duration_seconds",
+    "Time spent per pipeline stage (weather, elevation, features, scale, forest, model, mongo, smtp...)",
+    ["stage"])
+model_calls = Counter("model_calls_total", "Calls into the fire model (one per batch of rows)")
+rows_scored = Counter("model_rows_scored_total", "Feature rows scored by the fire model")
+external_failures = Counter(
+    "external_api_failures_total", "Failed calls to external services, by service", ["api"])
+
+
+# Series used on every request, looked up once
+_stages = {}
+_model_calls = model_calls.labels()
+_rows_scored = rows_scored.labels()
+
+
+def _stage(name):
+    child = _stages.get(name)
+    if child is None:
+        child = _stages[name] = stage_seconds.labels(name)
+    return child
+
+
+def stage(name, api=None):
+    """
+    Time a block as pipeline stage `name`:
+
+        with stage("weather", api="openweathermap"):
+            ...
+
+    If `api` is given, an exception leaving the block counts as a failure of that service.
+    """
+    if not METRICS_ENABLED:
+        return _NULL_TIMER
+    return _Timer(_stages.get(name) or _stage(name), api)
+
+
+def observe_stage(name, seconds):
+    if METRICS_ENABLED:
+        _stage(name).observe(seconds)
+
+
+def count_model_call(rows):
+    if METRICS_ENABLED:
+        _model_calls.inc()
+        _rows_scored.inc(rows)
+
+
+def count_failure(api):
+    if METRICS_ENABLED:
+        external_failures.labels(api).inc()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording each request's latency and status under its
+    route template (e.g. /reports/{report_id}/resolve), so paths with IDs
+    share one series. Unmatched paths are grouped as "unmatched".
+    """
+    def __init__(self, app):
+        self.app = app
+        # (method, route object, status) -> (latency histogram, request counter), so the route
+        # template and label lookups happen once per route instead of once per request
+        self._series = {}
+
+    def _new_series(self, key):
+        method, route, status = key
+        labels = (method, getattr(route, "path", "unmatched"))
+        series = self._series[key] = (request_seconds.labels(*labels), requests_total.labels(*labels, str(status)))
+        return series
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = _now()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            seconds = _now() - start
+            key = (scope["method"], scope.get("route"), status)
+            latency, counter = self._series.get(key) or self._new_series(key)
+            latency.observe(seconds)
+            counter.inc()
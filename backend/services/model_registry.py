@@ -0,0 +1,233 @@
+import hashlib
+import os
+import threading
+import time
+
+import numpy as np
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from services.inference_pool import INFERENCE_WORKERS, InferencePool, PoolClosed, PoolUnavailable
+from services.metrics import count_model_call, stage
+from services.prediction_cache import prediction_cache
+from utils.features import FEATURES
+from utils.model_loader import MODEL_DIR, MODEL_FILE, PICKLE_FILE, load_model
+
+
+def _file_version(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:12]
+
+
+class ModelHandle:
+    """
+    One loaded model version. Routes take the registry's current handle once
+    per request and use it throughout, so a reload never changes the model
+    under a request that is already running. The one exception: a call that
+    reaches the workers after a reload has shut them down goes to the
+    version that replaced them (`successor`) instead of failing.
+    """
+    def __init__(self, model, scaler, version, source, loaded_at, load_seconds):
+        self.model = model
+        self.scaler = scaler
+        self.version = version
+        self.source = source
+        self.loaded_at = loaded_at
+        self.load_seconds = load_seconds
+        self.pool = None
+        self.successor = None  # the handle a reload replaced this one with
+
+    def predict_local(self, X):
+        """Fire probability per row of raw feature matrix X, computed in this process"""
+        if self.scaler is not None:
+            with stage("scale"):
+                X = self.scaler.transform(X)
+        with stage("forest"):
+            return self.model.predict_proba(X)[:, 1]
+
+    def predict_proba(self, X):
+        """
+        Fire probability per row of X, on the inference pool when it is running.
+        A pool round trip is timed as the "model" stage; in-process scoring
+        as its "scale" and "forest" stages only.
+        """
+        count_model_call(len(X))
+        handle = self
+        while handle.pool is not None:
+            try:
+                with stage("model"):
+                    return handle.pool.predict(X)
+            except PoolClosed:
+                if handle.successor is None:
+                    break
+                handle = handle.successor
+            except PoolUnavailable:
+                break  # a worker died and the pool is restarting: score here meanwhile
+        return handle.predict_local(X)
+
+    async def predict_proba_async(self, X):
+        """predict_proba for async routes: waits on the pool without blocking the event loop"""
+        count_model_call(len(X))
+        handle = self
+        while handle.pool is not None:
+            try:
+                with stage("model"):
+                    return await handle.pool.predict_async(X)
+            except PoolClosed:
+                if handle.successor is None:
+                    break
+                handle = handle.successor
+            except PoolUnavailable:
+                break
+        # No pool (INFERENCE_WORKERS=0, warm-up, restarting): score on a thread, not on the event loop
+        return await run_in_threadpool(handle.predict_local, X)
+
+    def info(self):
+        return {
+            "version": self.version,
+            "source": os.path.basename(self.source),
+            "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.loaded_at)),
+            "load_seconds": round(self.load_seconds, 3),
+            "workers": self.pool.workers if self.pool is not None and self.pool.running else 0,
+        }
+
+
+class ModelRegistry:
+    """
+    Loads the fire model once and hands every route the same ModelHandle.
+    reload() builds and warms the new version (including its inference
+    workers) in a background thread, then swaps it in atomically; the old
+    version's workers are shut down once their in-flight requests finish.
+    """
+    def __init__(self, model_dir=MODEL_DIR, workers=INFERENCE_WORKERS):
+        self.model_dir = model_dir
+        self.workers = workers
+        self._active = None
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self.load_error = None
+        self.last_reload_error = None
+
+    @property
+    def current(self):
+        """The active ModelHandle, or None until load() has succeeded. Never blocks."""
+        return self._active
+
+    @property
+    def loading(self):
+        """True until the first load() has finished (successfully or not)"""
+        return self._active is None and self.load_error is None
+
+    def require(self, detail="Model not loaded"):
+        """current for a route that needs the model: 503 while it is still loading, 500 if loading failed"""
+        handle = self._active
+        if handle is None:
+            if self.loading:
+                raise HTTPException(status_code=503, detail="Model is still loading")
+            raise HTTPException(status_code=500, detail=detail)
+        return handle
+
+    def load(self):
+        """
+        Load and warm the model if it is not loaded yet (the startup step;
+        blocks, so never call it on the event loop). Returns the active
+        ModelHandle, or None if loading failed.
+        """
+        if self._active is None and self.load_error is None:
+            with self._lock:
+                if self._active is None and self.load_error is None:
+                    try:
+                        self._active = self._build()
+                        prediction_cache.invalidate()
+                    except Exception as e:
+                        self.load_error = str(e)
+                        print(f"[ERROR] Could not load model or scaler: {e}")
+        return self._active
+
+    @property
+    def reloading(self):
+        return self._reload_lock.locked()
+
+    def _build(self):
+        start = time.perf_counter()
+        source = os.path.join(self.model_dir, MODEL_FILE)
+        if not os.path.exists(source):
+            source = os.path.join(self.model_dir, PICKLE_FILE)
+        version = _file_version(source)
+        model, scaler = load_model(self.model_dir)
+        handle = ModelHandle(model, scaler, version, source, time.time(), 0.0)
+        handle.predict_local(np.zeros((1, len(FEATURES))))  # warm up
+        handle.load_seconds = time.perf_counter() - start
+        return handle
+
+    def _start_pool(self, handle):
+        if self.workers > 0:
+            pool = InferencePool(self.workers, self.model_dir)
+            pool.start()
+            pool.predict(np.zeros((1, len(FEATURES))))
+            handle.pool = pool
+
+    def start_workers(self):
+        """Start the inference pool for the active model (called at app startup)."""
+        handle = self._active
+        if handle is not None and handle.pool is None:
+            self._start_pool(handle)
+
+    def reload(self):
+        """Load, warm and swap in the model currently on disk. Blocks until done."""
+        with self._reload_lock:
+            self._reload()
+
+    def reload_in_background(self):
+        """Start reload() in a thread; returns False if a reload is already running."""
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+
+        def run():
+            try:
+                self._reload()
+            finally:
+                self._reload_lock.release()
+
+        threading.Thread(target=run, name="model-reload", daemon=True).start()
+        return True
+
+    def _reload(self):
+        try:
+            handle = self._build()
+            if self._active is not None and self._active.pool is not None:
+                self._start_pool(handle)
+        except Exception as e:
+            self.last_reload_error = str(e)
+            print(f"[ERROR] Model reload failed, keeping the current version: {e}")
+            return
+        with self._lock:
+            old, self._active = self._active, handle
+            if old is not None:
+                old.successor = handle
+            self.load_error = self.last_reload_error = None
+        prediction_cache.invalidate()
+        print(f"Model version {handle.version} loaded")
+        if old is not None and old.pool is not None:
+            old.pool.shutdown()  # finishes the requests already sent to the old workers
+
+    def shutdown(self):
+        handle = self._active
+        if handle is not None and handle.pool is not None:
+            handle.pool.shutdown()
+
+    def status(self):
+        handle = self._active
+        return {
+            **(handle.info() if handle is not None else {"version": None}),
+            "reloading": self.reloading,
+            "load_error": self.load_error,
+            "last_reload_error": self.last_reload_error,
+        }
+
+
+# The one model instance shared by every route
+model_registry = ModelRegistry()
@@ -0,0 +1,56 @@
+import math
+
+from services.explanations import explain_codes, render_explanation
+from utils.features import features_from
+
+
+def describe_prediction(enriched, proba, codes=None):
+    """
+    Build the /predict-manual response for one row: risk level, confidence
+    and a plain-language explanation of the inputs that drove the prediction.
+    enriched holds the ManualInput fields plus vpd (None if it could not be computed);
+    codes is the row's explain_codes() output, if the caller already has it.
+    """
+    vpd = enriched["vpd"]
+
+    fire_flag = int(proba >= 0.5)
+
+    # Risk classification
+    # NOTE: This logic is inconsistent with the logic in admin_routes.py.
+    # This should be centralized in a single utility function.
+    if proba >= 0.75:
+        risk_level = "High"
+    elif proba >= 0.40:
+        risk_level = "Moderate"
+    else:
+        risk_level = "Low"
+
+    # Natural-language confidence level
+    confidence = (
+        "High confidence" if proba > 0.75 else
+        "Moderate confidence" if proba > 0.50 else
+        "Low confidence" if proba > 0.25 else
+        "Very low confidence"
+    )
+
+    # Explanation: rule codes (computed per batch by callers that have one), rendered to text here
+    if codes is None:
+        codes = explain_codes(features_from({**enriched, "vpd": math.nan if vpd is None else vpd}))[0]
+    explanation_text = render_explanation(codes, risk_level, vpd)
+
+    # Risk message
+    risk_message = {
+        "High": " High fire risk! Take precautions.",
+        "Moderate": "Moderate risk: Be alert.",
+        "Low": "Your forest is safe. Low fire risk."
+    }[risk_level]
+
+    return {
+        "fire_occurred": fire_flag,
+        "risk_level": risk_level,
+        "confidence": confidence,
+        "probability": float(proba),
+        "input": enriched,
+        "explanation": explanation_text,
+        "risk_message": risk_message
+    }
@@ -0,0 +1,137 @@
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+from utils.features import FEATURES
+
+load_dotenv()
+
+# Inputs closer together than these steps share a cache entry
+DEFAULT_RESOLUTION = {
+    "latitude": 0.01,
+    "longitude": 0.01,
+    "temperature": 0.1,
+    "humidity": 1.0,
+    "wind_speed": 0.1,
+    "precipitation": 0.1,
+    "elevation": 1.0,
+    "vpd": 0.01,
+}
+
+
+def parse_resolution(spec):
+    """'temperature=0.5,humidity=2' -> {'temperature': 0.5, 'humidity': 2.0}"""
+    resolution = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, _, value = item.partition("=")
+        if name.strip() not in FEATURES:
+            raise ValueError(f"Unknown feature in PREDICT_CACHE_RESOLUTION: {name.strip()}")
+        resolution[name.strip()] = float(value)
+    return resolution
+
+
+class PredictionCache:
+    """
+    LRU + TTL cache of fire probabilities keyed on the feature vector, with
+    each feature rounded to a grid of `resolution` (0 = exact value).
+
+    Entries are tagged with the cache generation that was current when the
+    prediction started; invalidate() bumps the generation so a prediction
+    still running against an old model is not stored afterwards.
+    """
+    def __init__(self, max_size=10000, ttl=600.0, resolution=None, features=FEATURES, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.features = list(features)
+        resolution = dict(DEFAULT_RESOLUTION, **(resolution or {}))
+        self.resolution = [resolution.get(name, 0.0) for name in self.features]
+        self.clock = clock
+        self.generation = 0
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_size=int(os.getenv("PREDICT_CACHE_SIZE", "10000")),
+            ttl=float(os.getenv("PREDICT_CACHE_TTL", "600")),
+            resolution=parse_resolution(os.getenv("PREDICT_CACHE_RESOLUTION")),
+        )
+
+    def key(self, row):
+        key = []
+        for value, step in zip(row, self.resolution):
+            if value is None or math.isnan(value):
+                key.append(None)
+            elif step > 0:
+                key.append(round(value / step))
+            else:
+                key.append(float(value))
+        return tuple(key)
+
+    def get(self, row):
+        """Cached value for row, or None on a miss."""
+        if self.max_size <= 0:
+            return None
+        key = self.key(row)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl and entry[1] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, row, value, generation=None):
+        """Store value for row, unless the cache was invalidated since `generation`."""
+        if self.max_size <= 0:
+            return
+        key = self.key(row)
+        expires_at = self.clock() + self.ttl if self.ttl else math.inf
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self):
+        """Drop every entry; call whenever the model is (re)loaded."""
+        with self._lock:
+            self._entries.clear()
+            self.generation += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "resolution": dict(zip(self.features, self.resolution)),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "generation": self.generation,
+        }
+
+
+# Shared by /predict-manual and the admin scan (settings from PREDICT_CACHE_* in .env)
+prediction_cache = PredictionCache.from_env()
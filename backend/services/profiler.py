@@ -0,0 +1,227 @@
+import fnmatch
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+# Innermost frames in these files mean the thread is idle (waiting for work or I/O readiness)
+IDLE_FILES = ("threading.py", "queue.py", "selectors.py", os.path.join("concurrent", "futures", "thread.py"))
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Samples the Python stacks of every other thread in the process every
+    `interval` seconds from a background thread, and aggregates them into a
+    flamegraph-compatible collapsed-stack report ("root;...;leaf count" per
+    line, as read by flamegraph.pl, speedscope or inferno).
+
+    Nothing is instrumented: the profiled code runs unchanged, and the cost
+    is one sys._current_frames() walk per interval while sampling is on.
+
+        with SamplingProfiler(interval=0.001) as profiler:
+            forest.fit(X, y)
+        print(profiler.collapsed())
+    """
+    def __init__(self, interval=0.005, include_idle=False):
+        self.interval = interval
+        self.include_idle = include_idle
+        self.stacks = Counter()
+        self.samples = 0
+        self._active = threading.Event()   # sample only while set
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, active=True):
+        """Start the sampling thread; with active=False it waits for resume()."""
+        if active:
+            self._active.set()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._active.set()  # wake the sampler so it can exit
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def pause(self):
+        self._active.clear()
+
+    def resume(self):
+        self._active.set()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.is_set():
+            self._active.wait()
+            if self._stop.is_set():
+                break
+            self.sample(skip=own)
+            time.sleep(self.interval)
+
+    def sample(self, skip=None):
+        """Record one sample of every thread's stack (except `skip`)."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == skip:
+                continue
+            if not self.include_idle and frame.f_code.co_filename.endswith(IDLE_FILES):
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, f"thread-{ident}"))
+            self.stacks[tuple(reversed(stack))] += 1
+        self.samples += 1
+
+    def collapsed(self):
+        """The samples in collapsed-stack format, heaviest stacks first."""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileSession:
+    """
+    One admin-requested profile: either the next `requests` requests whose
+    path matches `route` (a path or glob, e.g. /scan-nepal or /reports/*),
+    sampled only while such a request is running, or every thread for a
+    fixed window of `seconds`.
+    """
+    def __init__(self, route=None, requests=None, seconds=None, interval=0.005):
+        if (requests is None) == (seconds is None):
+            raise ValueError("Give either a number of requests or a time window in seconds")
+        if requests is not None and not route:
+            raise ValueError("Profiling the next N requests needs a route to match")
+        self.route = route
+        self.requests = requests
+        self.seconds = seconds
+        self.profiler = SamplingProfiler(interval)
+        self.started_at = time.time()
+        self.finished_at = None
+        self.matched = 0
+        self.completed = 0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._timer = None
+
+    @property
+    def finished(self):
+        return self.finished_at is not None
+
+    def start(self, on_finish):
+        self._on_finish = on_finish
+        self.profiler.start(active=self.seconds is not None)
+        if self.seconds is not None:
+            self._timer = threading.Timer(self.seconds, self.finish)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def finish(self):
+        with self._lock:
+            if self.finished:
+                return
+            self.finished_at = time.time()
+        if self._timer is not None:
+            self._timer.cancel()
+        self.profiler.stop()
+        self._on_finish(self)
+
+    def claim(self, path):
+        """Whether a request for `path` is one of the requests to profile (and count it if so)."""
+        if self.requests is None or not fnmatch.fnmatchcase(path, self.route):
+            return False
+        with self._lock:
+            if self.finished or self.matched >= self.requests:
+                return False
+            self.matched += 1
+            self.in_flight += 1
+            self.profiler.resume()
+        return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+            if self.in_flight == 0:
+                self.profiler.pause()
+            done = self.completed >= self.requests
+        if done:
+            self.finish()
+
+    def status(self):
+        return {
+            "state": "finished" if self.finished else "running",
+            "route": self.route,
+            "requests": self.requests,
+            "seconds": self.seconds,
+            "interval_ms": self.profiler.interval * 1000,
+            "matched_requests": self.matched,
+            "completed_requests": self.completed,
+            "samples": self.profiler.samples,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.started_at)),
+            "finished_at": (time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.finished_at))
+                            if self.finished else None),
+        }
+
+
+class ProfilerControl:
+    """The app's single profiling slot: at most one session runs at a time, the last report is kept."""
+    def __init__(self):
+        self.session = None  # the running session, None when profiling is off
+        self.last = None
+        self._lock = threading.Lock()
+
+    def start(self, **options):
+        with self._lock:
+            if self.session is not None:
+                raise RuntimeError("A profile is already running")
+            session = ProfileSession(**options)
+            self.session = self.last = session
+        session.start(self._finished)
+        return session
+
+    def _finished(self, session):
+        with self._lock:
+            if self.session is session:
+                self.session = None
+
+    def stop(self):
+        session = self.session
+        if session is not None:
+            session.finish()
+        return self.last
+
+
+profiler_control = ProfilerControl()
+
+
+class ProfilerMiddleware:
+    """
+    ASGI middleware handing requests to the running profile session. With
+    no session it is a single attribute check before calling the app.
+    """
+    def __init__(self, app, control=profiler_control):
+        self.app = app
+        self.control = control
+
+    async def __call__(self, scope, receive, send):
+        session = self.control.session
+        if session is None or scope["type"] != "http" or not session.claim(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            session.release()
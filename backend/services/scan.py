@@ -1,37 +1,46 @@
 import json
-import joblib
-from services.weather import get_weather_for_location
+from services.weather import get_weather_many
+from services.explanations import fire_risk_levels
+from services.metrics import stage
+from services.model_registry import model_registry
 from utils.elevation import get_elevation
+from utils.features import features_from
 from models.alert_model import FireAlert
 
-# Load model
-model = joblib.load("model/random_forest_final_model.pkl")
+# Districts are read on first scan, not at import
+_districts = None
+
+
+def load_districts():
+    global _districts
+    if _districts is None:
+        with open("data/mock_response_centers_nepal.json") as f:
+            _districts = json.load(f)
+    return _districts
+
+def predict_risk(lat, lon, weather, elevation):
+    """Risk level for one location from the shared model (same cutoffs as the admin scan); weather from the provider"""
+    with stage("features"):
+        features = features_from({**weather, "latitude": lat, "longitude": lon, "elevation": elevation})
+    return str(fire_risk_levels(model_registry.current.predict_proba(features))[0])
 
-# Load districts
-with open("data/mock_response_centers_nepal.json") as f:
-    
-    DISTRICTS = json.load(f)
 
 def scan_nepal_and_generate_alerts():
     results = []
+    districts = load_districts()
+    all_weather = get_weather_many([(d["location"]["lat"], d["location"]["lon"]) for d in districts])
 
-    for dist in DISTRICTS:
+    for dist, weather in zip(districts, all_weather):
         lat, lon = dist["location"]["lat"], dist["location"]["lon"]
         district = dist["district"]
 
         try:
-            weather = get_weather_for_location(lat, lon)
-            elevation = get_elevation(lat, lon)
-
-            features = [[
-                weather["temperature"],
-                weather["humidity"],
-                weather["wind_speed"],
-                weather["precipitation"],
-                elevation
-            ]]
+            if isinstance(weather, Exception):
+                raise weather
+            with stage("elevation", api="opentopodata"):
+                elevation = get_elevation(lat, lon)
 
-            risk = model.predict(features)[0]
+            risk = predict_risk(lat, lon, weather, elevation)
 
             if risk == "High":
                 results.append({
@@ -61,20 +70,17 @@ def scan_nepal_and_generate_alerts():
 # New function: scan Nepal and return high-risk districts only (no alert creation)
 def scan_nepal_only():
     results = []
-    for dist in DISTRICTS:
+    districts = load_districts()
+    all_weather = get_weather_many([(d["location"]["lat"], d["location"]["lon"]) for d in districts])
+    for dist, weather in zip(districts, all_weather):
         lat, lon = dist["location"]["lat"], dist["location"]["lon"]
         district = dist["district"]
         try:
-            weather = get_weather_for_location(lat, lon)
-            elevation = get_elevation(lat, lon)
-            features = [[
-                weather["temperature"],
-                weather["humidity"],
-                weather["wind_speed"],
-                weather["precipitation"],
-                elevation
-            ]]
-            risk = model.predict(features)[0]
+            if isinstance(weather, Exception):
+                raise weather
+            with stage("elevation", api="opentopodata"):
+                elevation = get_elevation(lat, lon)
+            risk = predict_risk(lat, lon, weather, elevation)
             if risk == "High":
                 results.append({
                     "district": district,
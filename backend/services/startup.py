@@ -0,0 +1,60 @@
+import importlib
+import inspect
+import os
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# FAST_START=1: answer requests straight away and run the startup steps
+# (model load, inference workers, admin user...) in a background task
+FAST_START = os.getenv("FAST_START", "0").lower() in ("1", "true", "yes")
+
+# Heavy modules only some routes need, imported during warm-up instead of at import time
+WARM_MODULES = ["requests", "pandas"]
+
+
+def preload_modules(names=WARM_MODULES):
+    for name in names:
+        importlib.import_module(name)
+
+
+class StartupState:
+    """
+    Progress of the app's startup steps. The app is live as soon as it
+    answers requests, and ready once every step has finished.
+    """
+    def __init__(self, names):
+        self.steps = {name: {"status": "pending"} for name in names}
+        self.task = None
+
+    async def run(self, name, fn):
+        step = self.steps[name]
+        step["status"] = "running"
+        start = time.perf_counter()
+        try:
+            result = fn()
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            step.update(status="failed", error=str(e), seconds=round(time.perf_counter() - start, 3))
+            raise
+        step.update(status="done", seconds=round(time.perf_counter() - start, 3))
+
+    async def run_all(self, steps, raise_errors=True, optional=()):
+        """Run the steps in order; a failure stops startup unless raise_errors is off or the step is optional."""
+        for name, fn in steps:
+            try:
+                await self.run(name, fn)
+            except Exception as e:
+                if raise_errors and name not in optional:
+                    raise
+                print(f"[ERROR] Startup step '{name}' failed: {e}")
+
+    @property
+    def ready(self):
+        return all(step["status"] == "done" for step in self.steps.values())
+
+    def status(self):
+        return {"ready": self.ready, "fast_start": FAST_START, "steps": self.steps}
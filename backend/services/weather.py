@@ -1,14 +1,24 @@
-import requests
+import asyncio
+import copy
 
-API_KEY = "YOUR_OPENWEATHER_API_KEY"
+from services.weather_client import AsyncWeatherClient
+from services.weather_providers import weather_provider
 
-def get_weather_for_location(lat, lon):
-    url = f"https://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={API_KEY}&units=metric"
-    res = requests.get(url).json()
 
-    return {
-        "temperature": res["main"]["temp"],
-        "humidity": res["main"]["humidity"],
-        "wind_speed": res["wind"]["speed"],
-        "precipitation": res.get("rain", {}).get("1h", 0)  # fallback
-    }
+def get_weather_many(points):
+    """
+    Current weather for every (lat, lon) in points, in order, from the bulk
+    weather provider (failed points come back as the exception). For sync
+    callers outside an event loop: runs its own loop, with an HTTP client
+    of its own that is closed before it returns (the shared client belongs
+    to the app's loop).
+    """
+    async def fetch():
+        provider = copy.copy(weather_provider)
+        provider.client = AsyncWeatherClient()
+        try:
+            return await provider.get_weather_many(points)
+        finally:
+            await provider.client.aclose()
+
+    return asyncio.run(fetch())
@@ -0,0 +1,225 @@
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+
+load_dotenv()
+
+
+class WeatherCache:
+    """
+    LRU + TTL cache of current-weather observations keyed on the grid cell
+    of (lat, lon), with cells `grid` degrees wide, so nearby points share
+    one provider call. The TTL defaults to the hour the observations stay
+    current for.
+
+    Concurrent misses for the same cell are merged: the first caller
+    fetches, the others (on any thread or event loop) wait for its result.
+    Failed fetches are not cached.
+
+    With a `path`, entries are written through to a JSON file and loaded
+    back on start, so a restart does not refetch cells that are still fresh.
+    Expiry times are wall-clock (time.time) for that reason.
+    """
+    def __init__(self, grid=0.1, ttl=3600.0, max_size=10000, path=None, clock=time.time):
+        self.grid = grid
+        self.ttl = ttl
+        self.max_size = max_size
+        self.path = path
+        self.clock = clock
+        self._entries = OrderedDict()  # cell -> (weather, expires_at)
+        self._pending = {}             # cell -> Future of the fetch in flight
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._save_queued = False
+        self.hits = 0
+        self.misses = 0
+        self.merged = 0
+        self.evictions = 0
+        self.expirations = 0
+        if path:
+            self.load()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            grid=float(os.getenv("WEATHER_CACHE_GRID", "0.1")),
+            ttl=float(os.getenv("WEATHER_CACHE_TTL", "3600")),
+            max_size=int(os.getenv("WEATHER_CACHE_SIZE", "10000")),
+            path=os.getenv("WEATHER_CACHE_FILE") or None,
+        )
+
+    def key(self, lat, lon):
+        if self.grid > 0:
+            return round(lat / self.grid), round(lon / self.grid)
+        return float(lat), float(lon)
+
+    def _lookup(self, key):
+        """(cached weather or None, pending fetch or None, whether the caller should fetch); hold the lock."""
+        entry = self._entries.get(key)
+        if entry is not None and self.ttl and entry[1] <= self.clock():
+            del self._entries[key]
+            self.expirations += 1
+            entry = None
+        if entry is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[0]), None, False
+        self.misses += 1
+        future = self._pending.get(key)
+        if future is not None:
+            self.merged += 1
+            return None, future, False
+        future = self._pending[key] = Future()
+        return None, future, True
+
+    def _store(self, key, weather):
+        expires_at = self.clock() + self.ttl if self.ttl else math.inf
+        with self._lock:
+            if self.max_size > 0:
+                self._entries[key] = (dict(weather), expires_at)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+            del self._pending[key]
+
+    async def _persist(self):
+        """save() on a worker thread, off the event loop; saves asked for while one is queued are merged into it"""
+        if not self.path:
+            return
+        with self._lock:
+            if self._save_queued:
+                return
+            self._save_queued = True
+        await run_in_threadpool(self._save_queued_entries)
+
+    def _save_queued_entries(self):
+        with self._lock:
+            self._save_queued = False  # entries stored from now on need another save
+        try:
+            self.save()
+        except OSError as exc:
+            print(f"Could not save weather cache to {self.path}: {exc}")
+
+    def _failed(self, key, future, exc):
+        with self._lock:
+            del self._pending[key]
+        if not isinstance(exc, Exception):
+            # The fetching request was cancelled (or interrupted): the requests waiting on it get
+            # an ordinary failure for this cell, not a cancellation of their own
+            failure = RuntimeError(f"The weather fetch for this cell was abandoned ({type(exc).__name__})")
+            failure.__cause__ = exc
+            exc = failure
+        future.set_exception(exc)
+
+    async def aget_many(self, points, fetch_many):
+        """
+        Weather for many (lat, lon) points at once. Cells that are cached or
+        already being fetched are not fetched again; the rest go to one
+        fetch_many(points) call, a coroutine returning a weather dict or an
+        exception per point. Returns a weather dict or the exception per point,
+        in the order of `points`.
+        """
+        keys = [self.key(lat, lon) for lat, lon in points]
+        found, leading, waiting = {}, {}, {}
+        with self._lock:
+            for key, point in zip(keys, points):
+                if key in found or key in leading or key in waiting:
+                    continue
+                weather, future, leader = self._lookup(key)
+                if weather is not None:
+                    found[key] = weather
+                elif leader:
+                    leading[key] = (point, future)
+                else:
+                    waiting[key] = future
+
+        if leading:
+            try:
+                fetched = await fetch_many([point for point, _ in leading.values()])
+            except BaseException as exc:
+                if not isinstance(exc, Exception):
+                    for key, (_, future) in leading.items():
+                        self._failed(key, future, exc)
+                    raise
+                fetched = [exc] * len(leading)
+            for (key, (_, future)), weather in zip(leading.items(), fetched):
+                if isinstance(weather, Exception):
+                    self._failed(key, future, weather)
+                    found[key] = weather
+                else:
+                    self._store(key, weather)
+                    future.set_result(weather)
+                    found[key] = weather
+            await self._persist()
+
+        for key, future in waiting.items():
+            try:
+                found[key] = await asyncio.shield(asyncio.wrap_future(future))
+            except Exception as exc:
+                found[key] = exc
+        # Points sharing a cell get their own copy of its weather
+        return [value if isinstance(value, Exception) else dict(value) for value in map(found.get, keys)]
+
+    def load(self):
+        """Read back the fresh entries saved by a previous run (a missing or unreadable file is ignored)."""
+        try:
+            with open(self.path) as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as exc:
+            if not isinstance(exc, FileNotFoundError):
+                print(f"Ignoring weather cache file {self.path}: {exc}")
+            return
+        if saved.get("grid") != self.grid:
+            return  # cells of another grid size mean other places
+        now = self.clock()
+        with self._lock:
+            for lat_cell, lon_cell, expires_at, weather in saved.get("entries", []):
+                if expires_at > now:
+                    self._entries[(lat_cell, lon_cell)] = (weather, expires_at)
+
+    def save(self):
+        """Write the fresh entries to `path` (atomically, via a temporary file)."""
+        now = self.clock()
+        with self._lock:
+            entries = [[*key, expires_at, weather]
+                       for key, (weather, expires_at) in self._entries.items() if expires_at > now]
+        data = {"grid": self.grid, "entries": entries}
+        with self._file_lock:
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "grid_degrees": self.grid,
+            "persisted_to": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "merged_misses": self.merged,
+            "in_flight": len(self._pending),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+# Shared by every weather lookup (settings from WEATHER_CACHE_* in .env)
+weather_cache = WeatherCache.from_env()
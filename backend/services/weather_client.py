@@ -0,0 +1,93 @@
+import asyncio
+import os
+import threading
+
+import httpx
+from dotenv import load_dotenv
+
+from services.metrics import stage
+
+load_dotenv()
+
+OPENWEATHER_URL = os.getenv("OPENWEATHER_URL", "http://api.openweathermap.org/data/2.5/weather")
+OPENWEATHER_API_KEY = os.getenv("OPENWEATHER_API_KEY", "5341c37b13eb4a2994bda9c8d710103a")
+
+# Per-request timeout (seconds) and the most weather requests in flight at once
+WEATHER_TIMEOUT = float(os.getenv("WEATHER_TIMEOUT", "10"))
+WEATHER_CONCURRENCY = int(os.getenv("WEATHER_CONCURRENCY", "10"))
+
+
+def parse_current_weather(data):
+    """OpenWeatherMap current-weather JSON -> temperature (°C), humidity (%), wind_speed (m/s), precipitation (mm/h)"""
+    return {
+        "temperature": data["main"]["temp"],
+        "humidity": data["main"]["humidity"],
+        "wind_speed": data["wind"]["speed"],
+        "precipitation": data.get("rain", {}).get("1h", 0),  # mm in last hour
+    }
+
+
+class AsyncWeatherClient:
+    """
+    Current weather from OpenWeatherMap over one pooled HTTP client, so many
+    locations can be fetched concurrently without blocking the event loop.
+    At most `concurrency` requests are in flight at once; each has its own
+    `timeout`. Other weather APIs share the pool through get_json().
+
+    The pool belongs to the event loop that first uses it: calls from any
+    other loop raise RuntimeError until aclose() (on the owning loop) has
+    released it.
+    """
+    def __init__(self, url=OPENWEATHER_URL, api_key=OPENWEATHER_API_KEY, timeout=WEATHER_TIMEOUT,
+                 concurrency=WEATHER_CONCURRENCY):
+        self.url = url
+        self.api_key = api_key
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self._client = None
+        self._semaphore = None
+        self._loop = None
+        self._lock = threading.Lock()  # sync callers may run loops on several threads
+
+    def _bound_to(self, loop):
+        if self._loop is not loop:
+            raise RuntimeError("This weather client belongs to another event loop; give this loop a client of its own")
+
+    def _session(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._client is None:
+                limits = httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency)
+                self._client = httpx.AsyncClient(timeout=self.timeout, limits=limits)
+                self._semaphore = asyncio.Semaphore(self.concurrency)
+                self._loop = loop
+            self._bound_to(loop)
+            return self._client, self._semaphore
+
+    async def get_json(self, url, params, api):
+        """GET url over the pooled client, timed as the "weather" stage; failures count against `api`."""
+        client, semaphore = self._session()
+        async with semaphore:
+            with stage("weather", api=api):
+                response = await client.get(url, params=params)
+                response.raise_for_status()
+        return response.json()
+
+    async def current(self, lat, lon):
+        """Current weather at (lat, lon); raises httpx.HTTPError on a failed or timed-out request."""
+        params = {"lat": lat, "lon": lon, "appid": self.api_key, "units": "metric"}
+        return parse_current_weather(await self.get_json(self.url, params, "openweathermap"))
+
+    async def aclose(self):
+        """Close the pool (on the loop that owns it); the next call from any loop opens a new one."""
+        with self._lock:
+            client = self._client
+            if client is None:
+                return
+            self._bound_to(asyncio.get_running_loop())
+            self._client = self._semaphore = self._loop = None
+        await client.aclose()
+
+
+# Shared by the admin scan and the weather providers (settings from OPENWEATHER_* / WEATHER_* in .env)
+weather_client = AsyncWeatherClient()
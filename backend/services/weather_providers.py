@@ -0,0 +1,112 @@
+import asyncio
+import os
+
+from dotenv import load_dotenv
+
+from services.weather_cache import weather_cache
+from services.weather_client import weather_client
+
+load_dotenv()
+
+OPEN_METEO_URL = os.getenv("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+# Locations per Open-Meteo request (the API takes comma-separated lists, bounded by the URL length)
+OPEN_METEO_MAX_POINTS = int(os.getenv("OPEN_METEO_MAX_POINTS", "100"))
+
+
+def parse_open_meteo(location):
+    """One location of an Open-Meteo forecast response (with current=...) -> the weather dict"""
+    current = location["current"]
+    return {
+        "temperature": current["temperature_2m"],
+        "humidity": current["relative_humidity_2m"],
+        "wind_speed": current["wind_speed_10m"],
+        "precipitation": current["precipitation"],
+    }
+
+
+class WeatherProvider:
+    """
+    Current weather (temperature °C, humidity %, wind_speed km/h (the unit
+    the model was trained on), precipitation mm) for many points, through the shared weather cache.
+
+    Subclasses implement fetch(points) for up to `max_points` points per
+    HTTP request; get_weather_many() splits the uncached points into such
+    chunks, sends them concurrently and maps the answers back to the
+    input order.
+    """
+    name = None
+    max_points = 1
+
+    def __init__(self, client=weather_client, cache=weather_cache):
+        self.client = client
+        self.cache = cache
+
+    async def fetch(self, points):
+        """Weather for each of (at most max_points) points, from one request."""
+        raise NotImplementedError
+
+    async def fetch_many(self, points):
+        """fetch() in chunks; every point of a failed chunk comes back as its exception."""
+        chunks = [points[i:i + self.max_points] for i in range(0, len(points), self.max_points)]
+        answers = await asyncio.gather(*(self.fetch(chunk) for chunk in chunks), return_exceptions=True)
+        results = []
+        for chunk, answer in zip(chunks, answers):
+            if isinstance(answer, BaseException) and not isinstance(answer, Exception):
+                raise answer
+            results.extend([answer] * len(chunk) if isinstance(answer, Exception) else answer)
+        return results
+
+    async def get_weather_many(self, points):
+        """Weather for every (lat, lon) in points, in order; failed points come back as the exception."""
+        return await self.cache.aget_many(list(points), self.fetch_many)
+
+
+class OpenWeatherMapProvider(WeatherProvider):
+    """OpenWeatherMap current weather: one location per request."""
+    name = "openweathermap"
+    max_points = 1
+
+    async def fetch(self, points):
+        results = []
+        for lat, lon in points:
+            weather = await self.client.current(lat, lon)
+            results.append({**weather, "wind_speed": weather["wind_speed"] * 3.6})  # m/s, convert to km/h
+        return results
+
+
+class OpenMeteoProvider(WeatherProvider):
+    """Open-Meteo current weather: up to max_points locations per request, no API key."""
+    name = "open-meteo"
+
+    def __init__(self, url=OPEN_METEO_URL, max_points=OPEN_METEO_MAX_POINTS, **kwargs):
+        super().__init__(**kwargs)
+        self.url = url
+        self.max_points = max_points
+
+    async def fetch(self, points):
+        params = {
+            "latitude": ",".join(str(lat) for lat, _ in points),
+            "longitude": ",".join(str(lon) for _, lon in points),
+            "current": "temperature_2m,relative_humidity_2m,wind_speed_10m,precipitation",
+            "wind_speed_unit": "kmh",
+        }
+        data = await self.client.get_json(self.url, params, self.name)
+        if isinstance(data, dict):
+            data = [data]  # a single location is not wrapped in a list
+        if len(data) != len(points):
+            raise ValueError(f"Open-Meteo answered {len(data)} locations for {len(points)}")
+        return [parse_open_meteo(location) for location in data]
+
+
+PROVIDERS = {provider.name: provider for provider in (OpenMeteoProvider, OpenWeatherMapProvider)}
+
+
+def provider_from_env():
+    name = os.getenv("WEATHER_PROVIDER", "open-meteo")
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown WEATHER_PROVIDER {name!r}; expected one of {', '.join(PROVIDERS)}")
+    return PROVIDERS[name]()
+
+
+# Used by the scans (settings from WEATHER_PROVIDER / OPEN_METEO_* in .env)
+weather_provider = provider_from_env()
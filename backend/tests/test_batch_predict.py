@@ -0,0 +1,45 @@
+# tests/test_batch_predict.py
+
+import asyncio
+import json
+import os
+import sys
+
+# Ensure the backend folder is in the path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.batch_predict import _json_array_records, stream_predictions
+
+ROW = dict(latitude=27.5, longitude=84.3, temperature=34, humidity=20, wind_speed=10, precipitation=0, elevation=300)
+
+
+async def _pieces(data, size=7):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def _collect(records, output, chunk_rows):
+    async def run():
+        return [out async for out in stream_predictions(records, lambda X: X[:, 2] / 100, output, chunk_rows)]
+    return asyncio.run(run())
+
+
+def test_json_array_is_parsed_across_chunk_boundaries_and_scored_in_chunks():
+    rows = [dict(ROW, temperature=t) for t in range(5)] + [dict(ROW, humidity="wet")]
+    data = json.dumps(rows).encode()
+    outputs = _collect(_json_array_records(_pieces(data)), "ndjson", chunk_rows=2)
+
+    assert len(outputs) == 3
+    results = [json.loads(line) for out in outputs for line in out.splitlines()]
+    assert [r["row"] for r in results] == list(range(6))
+    assert [r["probability"] for r in results[:5]] == [t / 100 for t in range(5)]
+    assert "humidity" in results[5]["error"]
+
+
+def test_truncated_input_is_reported_after_the_rows_that_parsed():
+    data = (json.dumps([ROW, ROW])[:-1] + ', {"latitude"').encode()
+    outputs = _collect(_json_array_records(_pieces(data)), "csv", chunk_rows=10)
+
+    lines = "".join(outputs).splitlines()
+    assert lines[0].startswith("row,latitude")
+    assert len(lines) == 4 and "truncated" in lines[-1]
@@ -0,0 +1,59 @@
+# tests/test_batcher.py
+
+import asyncio
+import gc
+import os
+import sys
+
+# Ensure the backend folder is in the path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.batcher import PredictionBatcher
+
+
+def test_concurrent_requests_share_one_batch():
+    calls = []
+
+    def predict(X):
+        calls.append(len(X))
+        return X.sum(axis=1)
+
+    async def run():
+        batcher = PredictionBatcher(predict, window_ms=50, max_rows=4)
+        results = await asyncio.gather(*(batcher.submit([i, 1.0]) for i in range(6)))
+        return batcher, results
+
+    batcher, results = asyncio.run(run())
+    assert results == [i + 1.0 for i in range(6)]
+    assert calls == [4, 2]  # full batch flushed at once, the rest after the window
+    stats = batcher.stats()
+    assert stats["batches"] == 2 and stats["full_batches"] == 1
+    assert stats["mean_batch_fill"] == 0.75
+
+
+def test_prediction_error_reaches_every_caller():
+    def predict(X):
+        raise ValueError("bad input")
+
+    async def run():
+        batcher = PredictionBatcher(predict, window_ms=1)
+        return await asyncio.gather(batcher.submit([1.0]), batcher.submit([2.0]), return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_async_predictions_are_kept_alive_until_delivered():
+    async def predict(X):
+        await asyncio.sleep(0.02)
+        return X.sum(axis=1)
+
+    async def run():
+        batcher = PredictionBatcher(predict, window_ms=0, max_rows=4)
+        pending = asyncio.ensure_future(batcher.submit([1.0, 2.0]))
+        await asyncio.sleep(0)
+        gc.collect()  # the resolving task must survive a collection while it waits
+        in_flight = len(batcher._resolving)
+        return in_flight, await pending, len(batcher._resolving)
+
+    assert asyncio.run(run()) == (1, 3.0, 0)
@@ -0,0 +1,239 @@
+# tests/test_custom_rf.py
+
+import sys
+import os
+
+import numpy as np
+import pytest
+
+# Ensure the backend folder is in the path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import custom_rf
+from custom_rf import (SPLITTERS, FlatForest, RandomForest, TreeNode, best_split, best_split_sorted, bin_features,
+                       build_tree, build_tree_hist, build_tree_level, partition_rows)
+
+
+def make_data(n=300, n_features=8, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, n_features))
+    # Coarse columns so that thresholds repeat across rows
+    X[:, 0] = np.round(X[:, 0], 1)
+    X[:, 5] = rng.integers(0, 4, size=n)
+    y = ((X[:, 0] + X[:, 2] - 0.5 * X[:, 5] + rng.normal(scale=0.5, size=n)) > 0).astype(int)
+    return X, y
+
+
+def tree_signature(node):
+    if node.is_leaf():
+        return ("leaf", node.value)
+    return (int(node.feature), float(node.threshold),
+            tree_signature(node.left), tree_signature(node.right))
+
+
+def tree_depth(node):
+    if node.is_leaf():
+        return 0
+    return 1 + max(tree_depth(node.left), tree_depth(node.right))
+
+
+def test_sorted_split_matches_naive():
+    X, y = make_data()
+    for features in ([0, 1, 2], [5, 3], list(range(8))):
+        assert best_split_sorted(X, y, features) == best_split(X, y, features)
+
+
+def test_sorted_engine_builds_same_tree():
+    X, y = make_data(n=200)
+    trees = {}
+    for splitter in ("naive", "sorted"):
+        np.random.seed(42)
+        trees[splitter] = tree_signature(build_tree(X, y, num_features=3, splitter=splitter))
+    assert trees["naive"] == trees["sorted"]
+
+
+def test_forest_engines_agree():
+    X, y = make_data(n=150)
+    preds = {}
+    for splitter in ("naive", "sorted"):
+        np.random.seed(7)
+        forest = RandomForest(n_trees=5, max_depth=5, splitter=splitter)
+        forest.fit(X, y)
+        preds[splitter] = forest.predict_proba(X)
+    np.testing.assert_array_equal(preds["naive"], preds["sorted"])
+
+
+def test_flat_forest_matches_recursive_predictions():
+    X, y = make_data(n=200)
+    np.random.seed(3)
+    forest = RandomForest(n_trees=8, max_depth=6)
+    forest.fit(X, y)
+    flat = forest.compile()
+
+    X_new, _ = make_data(n=100, seed=1)
+    np.testing.assert_array_equal(flat.predict_proba(X_new), forest.predict_proba(X_new))
+    np.testing.assert_array_equal(flat.predict(X_new), np.array(forest.predict(X_new)))
+
+
+def test_random_state_gives_same_forest_at_any_n_jobs():
+    X, y = make_data(n=150)
+    signatures = []
+    for n_jobs in (1, 2):
+        forest = RandomForest(n_trees=6, max_depth=5, n_jobs=n_jobs, random_state=11)
+        forest.fit(X, y)
+        signatures.append([tree_signature(t) for t in forest.trees])
+    assert signatures[0] == signatures[1]
+
+
+def test_histogram_mode_matches_exact_splits_when_values_fit_in_bins():
+    X, y = make_data(n=200)
+    X = np.round(X, 1) # Fewer than 255 distinct values per feature
+    signatures = []
+    for max_bins in (None, 255):
+        forest = RandomForest(n_trees=5, max_depth=6, random_state=5, max_bins=max_bins)
+        forest.fit(X, y)
+        signatures.append([tree_signature(t) for t in forest.trees])
+    assert signatures[0] == signatures[1]
+
+
+def test_histogram_mode_thresholds_are_raw_values():
+    X, y = make_data(n=2000)
+    forest = RandomForest(n_trees=3, max_depth=6, random_state=0, max_bins=32)
+    forest.fit(X, y)
+    flat = forest.compile()
+    internal = flat.feature >= 0
+    for feature_idx, threshold in zip(flat.feature[internal], flat.threshold[internal]):
+        assert threshold in X[:, feature_idx]
+    assert (flat.predict(X) == y).mean() > 0.8
+
+
+def test_partition_rewrites_the_index_array_in_place():
+    idx = np.arange(10, 20)
+    buffer = idx
+    mid = partition_rows(idx, 2, 8, idx[2:8] % 2 == 0)
+    assert idx is buffer and mid == 5
+    np.testing.assert_array_equal(idx, [10, 11, 12, 14, 16, 13, 15, 17, 18, 19])  # stable, outside [2, 8) untouched
+
+
+def test_every_node_scores_a_view_of_one_index_array(monkeypatch):
+    X, y = make_data(n=300)
+    seen = []
+
+    def recording_splitter(X, y, features, rows=None, sample_weight=None):
+        seen.append(rows)
+        return best_split_sorted(X, y, features, rows, sample_weight)
+
+    monkeypatch.setitem(SPLITTERS, "sorted", recording_splitter)
+    build_tree(X, y, max_depth=6, rng=np.random.default_rng(0))
+    assert len(seen) > 1
+    buffer = seen[0].base
+    assert buffer is not None and all(rows.base is buffer for rows in seen)
+
+
+def test_sample_bootstrap_grows_from_the_drawn_rows_without_copying_X(monkeypatch):
+    X, y = make_data(n=300)
+    indices = np.random.default_rng(4).choice(len(X), len(X), replace=True)
+    copied = build_tree(X[indices], y[indices], max_depth=8, num_features=3, rng=np.random.default_rng(5))
+    indexed = build_tree(X, y, max_depth=8, num_features=3, rng=np.random.default_rng(5), rows=indices)
+    assert tree_signature(indexed) == tree_signature(copied)
+
+    grown_from = []
+    monkeypatch.setattr(custom_rf, "build_tree", lambda X, y, **kwargs: grown_from.append(X) or TreeNode(value=0))
+    RandomForest(n_trees=3, random_state=1).fit(X, y)
+    assert len(grown_from) == 3 and all(tree_X is X for tree_X in grown_from)
+
+
+def test_weighted_bootstrap_matches_copied_sample():
+    X, y = make_data(n=300)
+    for max_bins in (None, 255):
+        signatures = []
+        for bootstrap in ("sample", "weighted"):
+            forest = RandomForest(n_trees=6, max_depth=8, random_state=9,
+                                  max_bins=max_bins, bootstrap=bootstrap)
+            forest.fit(X, y)
+            signatures.append([tree_signature(t) for t in forest.trees])
+        assert signatures[0] == signatures[1]
+
+
+def test_oob_score_uses_only_out_of_bag_trees():
+    X, y = make_data(n=400)
+    forest = RandomForest(n_trees=15, max_depth=6, random_state=2, oob_score=True)
+    forest.fit(X, y)
+
+    assert forest.oob_proba_.shape == (len(X), 2)
+    scored = ~np.isnan(forest.oob_proba_[:, 0])
+    np.testing.assert_allclose(forest.oob_proba_[scored].sum(axis=1), 1.0)
+    # Out-of-bag accuracy is an honest estimate, so below the training accuracy
+    train_accuracy = (forest.compile().predict(X) == y).mean()
+    assert 0.6 < forest.oob_score_ < train_accuracy
+
+
+def test_oob_score_is_nan_with_a_warning_when_no_row_is_out_of_bag():
+    X, y = make_data(n=1)
+    forest = RandomForest(n_trees=3, max_depth=2, random_state=0, oob_score=True)
+    with pytest.warns(UserWarning, match="out-of-bag"):
+        forest.fit(X, y)  # a one-row bootstrap always draws that row
+    assert np.isnan(forest.oob_score_) and np.isnan(forest.oob_proba_).all()
+
+
+class InOrderFeatures:
+    """Stand-in rng whose feature bagging keeps every feature in index order."""
+    def choice(self, n, size, replace=False):
+        return np.arange(n)[:size]
+
+
+def test_level_wise_growth_matches_depth_first():
+    X, y = make_data(n=500)
+    X_binned, bin_edges = bin_features(X, max_bins=16)
+    classes, y_codes = np.unique(y, return_inverse=True)
+    drawn = np.random.default_rng(0).choice(len(X), len(X))
+    counts = np.bincount(drawn, minlength=len(X))
+    samples = [(drawn, None), (np.flatnonzero(counts), counts)]
+    for (rows, sample_weight), (max_depth, min_samples) in zip(samples, ((4, 5), (8, 20))):
+        trees = [builder(X_binned, y_codes, rows.copy(), bin_edges, classes, max_depth=max_depth,
+                         min_samples=min_samples, rng=InOrderFeatures(), sample_weight=sample_weight)
+                 for builder in (build_tree_hist, build_tree_level)]
+        assert tree_signature(trees[0]) == tree_signature(trees[1])
+        assert tree_depth(trees[1]) <= max_depth
+
+
+def test_level_wise_forest_fits():
+    X, y = make_data(n=1000)
+    forest = RandomForest(n_trees=5, max_depth=8, random_state=0, max_bins=64,
+                          growth="level", bootstrap="weighted", oob_score=True)
+    forest.fit(X, y)
+    assert forest.oob_score_ > 0.7
+
+
+def test_model_file_round_trip_is_memory_mapped(tmp_path):
+    X, y = make_data(n=200)
+    forest = RandomForest(n_trees=4, max_depth=5, random_state=0)
+    forest.fit(X, y)
+    flat = forest.compile()
+    flat.metadata = {"features": [f"f{i}" for i in range(8)], "scaler": {"mean": [0.0] * 8, "scale": [1.0] * 8}}
+
+    path = tmp_path / "forest.rfm"
+    flat.save(path)
+    loaded = FlatForest.load(path)
+
+    assert isinstance(loaded.threshold.base, np.memmap) or isinstance(loaded.threshold, np.memmap)
+    assert loaded.metadata == flat.metadata
+    np.testing.assert_array_equal(loaded.predict_proba(X), flat.predict_proba(X))
+
+
+def test_folded_scaler_predicts_identically_on_raw_features():
+    rng = np.random.default_rng(3)
+    X_raw, y = make_data(n=400)
+    X_raw = X_raw * rng.uniform(0.1, 300, 8) + rng.uniform(-100, 3000, 8)
+    mean, scale = X_raw.mean(axis=0), X_raw.std(axis=0)
+    X_scaled = (X_raw - mean) / scale
+
+    forest = RandomForest(n_trees=5, max_depth=8, random_state=0)
+    forest.fit(X_scaled, y)
+    flat = forest.compile()
+    folded = flat.fold_scaler(mean, scale)
+
+    # Training rows sit exactly on split thresholds, so this checks the boundary cases too
+    X_test = np.vstack([X_raw, X_raw + rng.normal(0, 1e-9, X_raw.shape) * np.abs(X_raw)])
+    np.testing.assert_array_equal(folded.predict_proba(X_test), flat.predict_proba((X_test - mean) / scale))
+    assert folded.metadata["scaler_folded"]
@@ -0,0 +1,25 @@
+# tests/test_explanations.py
+
+import os
+import sys
+
+import numpy as np
+
+# Ensure the backend folder is in the path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.explanations import explain_codes, explanation_points, render_explanation
+from utils.features import assemble_features
+
+
+def test_codes_pick_the_first_matching_rule_per_group():
+    X = assemble_features(27.5, 84.3, [36.0, 31.0, 20.0], [15.0, 70.0, 50.0], [20.0, 5.0, 1.0],
+                          [0.0, 10.0, 1.0], 300.0, vpd=[4.0, 1.0, np.nan])
+    codes = explain_codes(X)
+    assert codes.dtype == np.uint8
+    np.testing.assert_array_equal(codes, [[1, 1, 1, 3, 1], [2, 4, 0, 2, 3], [0, 0, 3, 0, 0]])
+
+    assert explanation_points(codes[2]) == ["Calm winds help limit fire spread."]
+    assert render_explanation(codes[1], "Low", vpd=1.0).endswith(
+        "VPD value of 1.0 kPa indicates moderately dry air conditions. Overall, the fire risk here is low.")
+    assert "No specific dominant factors" in render_explanation(np.zeros(5, dtype=np.uint8), "Moderate")
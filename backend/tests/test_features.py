@@ -0,0 +1,34 @@
+# tests/test_features.py
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Ensure the backend folder is in the path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.features import FEATURES, INPUT_FIELDS, assemble_features, compute_vpd, features_from
+
+DATASET = os.path.join(os.path.dirname(__file__), "..", "..", "fire_dataset_enriched.csv")
+
+
+def test_assemble_features_matches_feature_order():
+    row = dict(zip(INPUT_FIELDS, [27.5, 84.3, 34.0, 20.0, 10.0, 0.0, 300.0]))
+    X = features_from(row)
+    assert X.shape == (1, len(FEATURES)) and X.dtype == np.float64
+    np.testing.assert_array_equal(X[0, :-1], [row[name] for name in INPUT_FIELDS])
+    assert X[0, -1] == compute_vpd(34.0, 20.0)
+
+    # Scalars broadcast against arrays; missing values become NaN
+    X = assemble_features(27.5, 84.3, [30.0, 35.0], [40.0, 20.0], 5.0, None, 300.0)
+    assert X.shape == (2, len(FEATURES))
+    assert np.isnan(X[:, FEATURES.index("precipitation")]).all()
+    np.testing.assert_array_equal(X[:, -1], compute_vpd([30.0, 35.0], [40.0, 20.0]))
+
+
+def test_vpd_matches_training_dataset():
+    df = pd.read_csv(DATASET).dropna()
+    np.testing.assert_allclose(compute_vpd(df["temperature"], df["humidity"]), df["vpd"], atol=1e-9)
+    np.testing.assert_array_equal(features_from(df), df[FEATURES].to_numpy(dtype=np.float64))
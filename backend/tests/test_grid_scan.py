@@ -0,0 +1,85 @@
+# tests/test_grid_scan.py
+
+import os
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+
+# Ensure the backend folder is in the path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.grid_scan import (NEPAL_BBOX, GridScanner, Raster, colourize, encode_png, grid_header,
+                                scan_grid)
+
+BBOX = {"min_lat": 27.0, "max_lat": 28.0, "min_lon": 84.0, "max_lon": 86.0}
+
+
+def coarse_conditions():
+    """Two weather cells: a hot, dry west half and a cool, wet east half"""
+    header = grid_header(BBOX, 1.0)
+    values = np.array([[[38, 15, 20, 0, 300], [12, 90, 2, 8, 2500]]], dtype=np.float32)
+    return Raster(header, values)
+
+
+class Model:
+    """Stands in for the forest: the probability is temperature / 40; records chunk sizes"""
+    def __init__(self):
+        self.chunks = []
+
+    def __call__(self, X):
+        self.chunks.append(len(X))
+        return X[:, 2] / 40
+
+
+def test_grid_is_scored_in_bounded_chunks_into_a_georeferenced_raster(tmp_path):
+    model = Model()
+    path = str(tmp_path / "risk.npy")
+    header = scan_grid(model, path, coarse_conditions(), 0.01, bbox=BBOX, chunk_cells=5000)
+
+    assert (header["rows"], header["cols"]) == (100, 200)
+    assert max(model.chunks) == 5000 and sum(model.chunks) == 20000
+    raster = Raster.load(path)
+    assert raster.array.dtype == np.float32 and raster.array.shape == (100, 200)
+    assert raster.header["resolution"] == 0.01
+    np.testing.assert_allclose(raster.sample(np.array([27.5, 27.5, 30.0]), np.array([84.5, 85.5, 85.0])),
+                               [0.95, 0.3, np.nan])
+    assert not os.path.exists(str(tmp_path / "risk.tmp.npy"))
+
+
+def test_windows_and_tiles_of_the_raster(tmp_path):
+    path = str(tmp_path / "risk.npy")
+    scan_grid(Model(), path, coarse_conditions(), 0.01, bbox=BBOX)
+    raster = Raster.load(path)
+
+    window, values = raster.window(27.2, 27.4, 84.9, 85.1, stride=2)
+    assert (window["rows"], window["cols"]) == values.shape == (10, 10)
+    assert window["resolution"] == 0.02
+    np.testing.assert_allclose(values[:, :5], 0.95)
+    np.testing.assert_allclose(values[:, 5:], 0.3)
+
+    tile = raster.tile(7, 94, 53)  # covers most of the test box
+    assert tile.shape == (256, 256)
+    assert np.isnan(tile).any()
+    np.testing.assert_allclose(np.unique(tile[~np.isnan(tile)]), [0.3, 0.95], rtol=1e-6)
+
+    png = encode_png(colourize(tile))
+    assert png.startswith(b"\x89PNG\r\n\x1a\n")
+    width, height = struct.unpack(">II", png[16:24])
+    idat_length = struct.unpack(">I", png[33:37])[0]
+    pixels = np.frombuffer(zlib.decompress(png[41:41 + idat_length]), dtype=np.uint8).reshape(256, 1025)
+    assert (width, height) == (256, 256)
+    assert (pixels[:, 4::4][np.isnan(tile)] == 0).all()  # no data -> transparent
+
+
+def test_scanner_runs_in_the_background_and_serves_the_latest_raster(tmp_path):
+    scanner = GridScanner(str(tmp_path))
+    assert scanner.raster() is None
+    assert scanner.start(Model(), coarse_conditions(), 0.05, bbox=BBOX)
+    while scanner.running:
+        time.sleep(0.01)
+    status = scanner.status()
+    assert status["scan"]["state"] == "finished" and status["scan"]["cells_done"] == 800
+    assert status["raster"]["rows"] == 20 and grid_header(NEPAL_BBOX, 0.01)["rows"] == 410
@@ -0,0 +1,70 @@
+# tests/test_inference_pool.py
+
+import os
+import signal
+import sys
+import time
+
+import numpy as np
+import pytest
+
+# Ensure the backend folder is in the path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.inference_pool import InferencePool, PoolClosed, PoolUnavailable
+from utils.model_loader import load_model
+
+
+def sample_rows():
+    model, scaler = load_model()
+    rng = np.random.default_rng(0)
+    X = np.column_stack([rng.uniform(26, 30, 50), rng.uniform(80, 88, 50), rng.uniform(0, 40, 50),
+                         rng.uniform(5, 100, 50), rng.uniform(0, 20, 50), rng.uniform(0, 10, 50),
+                         rng.uniform(60, 4000, 50), rng.uniform(0, 5, 50)])
+    return X, model.predict_proba(X if scaler is None else scaler.transform(X))[:, 1]
+
+
+def test_pool_predictions_match_in_process_model():
+    X, expected = sample_rows()
+
+    pool = InferencePool(workers=1)
+    pool.start()
+    try:
+        np.testing.assert_array_equal(pool.predict(X), expected)
+        stats = pool.stats()
+    finally:
+        pool.shutdown()
+    assert stats["pool_size"] == 1 and stats["completed"] == 1 and stats["in_flight"] == 0
+    assert stats["workers"][0]["tasks"] == 1
+
+
+def test_pool_restarts_after_a_worker_dies():
+    X, expected = sample_rows()
+    pool = InferencePool(workers=1)
+    pool.start()
+    try:
+        pool.predict(X)
+        os.kill(pool.stats()["workers"][0]["pid"], signal.SIGKILL)
+        with pytest.raises(PoolUnavailable):
+            pool.predict(X)
+        deadline = time.monotonic() + 60
+        while not pool.running and time.monotonic() < deadline:
+            time.sleep(0.1)
+        np.testing.assert_array_equal(pool.predict(X), expected)
+        stats = pool.stats()
+    finally:
+        pool.shutdown()
+    assert stats["restarts"] == 1 and stats["in_flight"] == 0
+
+
+def test_shutdown_finishes_accepted_work_and_refuses_new_work():
+    X, expected = sample_rows()
+    pool = InferencePool(workers=1)
+    pool.start()
+    futures = [pool.submit(X) for _ in range(5)]
+    pool.shutdown()
+    for future in futures:
+        np.testing.assert_array_equal(future.result()[-1], expected)
+    with pytest.raises(PoolClosed):
+        pool.submit(X)
+    assert pool.stats()["in_flight"] == 0
@@ -0,0 +1,53 @@
+# tests/test_metrics.py
+
+import os
+import sys
+import threading
+
+# Ensure the backend folder is in the path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services import metrics
+from services.metrics import Counter, Histogram, render
+
+
+def test_histogram_and_counter_render_prometheus_text():
+    registry = []
+    latency = Histogram("demo_seconds", "Demo latency", ["stage"], buckets=(0.1, 1.0), registry=registry)
+    calls = Counter("demo_total", "Demo calls", registry=registry)
+
+    def work():
+        for _ in range(1000):
+            latency.labels("forest").observe(0.05)
+            calls.inc()
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latency.labels("forest").observe(0.5)
+    latency.labels("forest").observe(5.0)
+
+    lines = render(registry).splitlines()
+    assert "# TYPE demo_seconds histogram" in lines
+    assert 'demo_seconds_bucket{stage="forest",le="0.1"} 4000' in lines
+    assert 'demo_seconds_bucket{stage="forest",le="1.0"} 4001' in lines
+    assert 'demo_seconds_bucket{stage="forest",le="+Inf"} 4002' in lines
+    assert 'demo_seconds_count{stage="forest"} 4002' in lines
+    assert "demo_total 4000" in lines
+
+
+def test_stage_counts_exceptions_as_api_failures():
+    failures = metrics.external_failures.labels("demo-api")
+    before = failures.value
+    try:
+        with metrics.stage("demo", api="demo-api"):
+            raise ConnectionError("down")
+    except ConnectionError:
+        pass
+    with metrics.stage("demo", api="demo-api"):
+        pass
+    assert failures.value == before + 1
+    counts, _ = metrics.stage_seconds.labels("demo").snapshot()
+    assert sum(counts) == 2
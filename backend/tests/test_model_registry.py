@@ -0,0 +1,108 @@
+# tests/test_model_registry.py
+
+import asyncio
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+# Ensure the backend folder is in the path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from custom_rf import RandomForest
+from services.model_registry import ModelRegistry
+from services.prediction_cache import prediction_cache
+from utils.model_loader import MODEL_FILE
+
+
+def small_models(seeds=(1, 2)):
+    versions = []
+    for seed in seeds:
+        rng = np.random.default_rng(seed)
+        X_train = rng.normal(size=(200, 8))
+        forest = RandomForest(n_trees=3, max_depth=4, random_state=seed)
+        forest.fit(X_train, (X_train[:, seed] > 0).astype(int))
+        flat = forest.compile()
+        flat.metadata = {"scaler": {"mean": [0.0] * 8, "scale": [1.0] * 8}, "scaler_folded": True}
+        versions.append(flat)
+    return versions
+
+
+def test_reload_swaps_in_new_version_and_keeps_old_handle_usable(tmp_path):
+    X = np.random.default_rng(0).normal(size=(50, 8))
+    versions = small_models()
+
+    versions[0].save(tmp_path / MODEL_FILE)
+    registry = ModelRegistry(model_dir=str(tmp_path), workers=0)
+    old = registry.load()
+    np.testing.assert_array_equal(old.predict_proba(X), versions[0].predict_proba(X)[:, 1])
+
+    versions[1].save(tmp_path / MODEL_FILE)
+    generation = prediction_cache.generation
+    registry.reload()
+
+    new = registry.current
+    assert new is not old and new.version != old.version
+    assert prediction_cache.generation == generation + 1
+    np.testing.assert_array_equal(new.predict_proba(X), versions[1].predict_proba(X)[:, 1])
+    # A request that took the old handle before the swap still completes on it
+    np.testing.assert_array_equal(old.predict_proba(X), versions[0].predict_proba(X)[:, 1])
+    assert registry.status()["version"] == new.version and not registry.status()["reloading"]
+
+
+def test_async_prediction_without_workers_runs_off_the_event_loop(tmp_path):
+    X = np.random.default_rng(0).normal(size=(50, 8))
+    small_models(seeds=(1,))[0].save(tmp_path / MODEL_FILE)
+    handle = ModelRegistry(model_dir=str(tmp_path), workers=0).load()
+    threads = []
+    predict_local = handle.predict_local
+    handle.predict_local = lambda X: threads.append(threading.get_ident()) or predict_local(X)
+
+    async def predict():
+        return threading.get_ident(), await handle.predict_proba_async(X)
+
+    loop_thread, proba = asyncio.run(predict())
+    np.testing.assert_array_equal(proba, predict_local(X))
+    assert threads and threads[0] != loop_thread
+
+
+def test_current_never_loads_and_routes_get_503_until_the_model_is_loaded(tmp_path):
+    small_models(seeds=(1,))[0].save(tmp_path / MODEL_FILE)
+    registry = ModelRegistry(model_dir=str(tmp_path), workers=0)
+    assert registry.current is None and registry.loading
+    with pytest.raises(HTTPException) as exc:
+        registry.require()
+    assert exc.value.status_code == 503
+
+    handle = registry.load()
+    assert registry.current is handle and registry.require() is handle and not registry.loading
+
+
+def test_require_answers_500_when_loading_failed(tmp_path):
+    registry = ModelRegistry(model_dir=str(tmp_path), workers=0)
+    assert registry.load() is None and registry.load_error and not registry.loading
+    with pytest.raises(HTTPException) as exc:
+        registry.require()
+    assert exc.value.status_code == 500
+
+
+def test_calls_on_a_replaced_handle_move_to_its_successor_once_its_workers_are_gone(tmp_path):
+    X = np.random.default_rng(0).normal(size=(50, 8))
+    versions = small_models()
+    versions[0].save(tmp_path / MODEL_FILE)
+    registry = ModelRegistry(model_dir=str(tmp_path), workers=1)
+    old = registry.load()
+    registry.start_workers()
+    try:
+        versions[1].save(tmp_path / MODEL_FILE)
+        registry.reload()
+        new = registry.current
+        assert old.successor is new and not old.pool.running
+        expected = versions[1].predict_proba(X)[:, 1]
+        np.testing.assert_array_equal(old.predict_proba(X), expected)
+        np.testing.assert_array_equal(asyncio.run(old.predict_proba_async(X)), expected)
+    finally:
+        registry.shutdown()
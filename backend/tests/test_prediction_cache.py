@@ -0,0 +1,51 @@
+# tests/test_prediction_cache.py
+
+import os
+import sys
+
+# Ensure the backend folder is in the path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.prediction_cache import PredictionCache, parse_resolution
+
+ROW = [27.5, 84.3, 34.0, 20.0, 10.0, 0.0, 300.0, 4.255]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_quantized_inputs_share_an_entry():
+    cache = PredictionCache(max_size=10, ttl=0, resolution={"temperature": 0.5})
+    cache.put(ROW, 0.7)
+    assert cache.get([27.5, 84.3, 34.1, 20.0, 10.0, 0.0, 300.0, 4.255]) == 0.7
+    assert cache.get([27.5, 84.3, 35.0, 20.0, 10.0, 0.0, 300.0, 4.255]) is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_eviction_ttl_and_invalidation():
+    clock = FakeClock()
+    cache = PredictionCache(max_size=2, ttl=60, clock=clock)
+    rows = [[float(i)] + ROW[1:] for i in range(3)]
+    cache.put(rows[0], 0.1)
+    cache.put(rows[1], 0.2)
+    assert cache.get(rows[0]) == 0.1        # rows[0] is now most recently used
+    cache.put(rows[2], 0.3)
+    assert cache.get(rows[1]) is None and cache.evictions == 1
+
+    clock.now = 61
+    assert cache.get(rows[0]) is None and cache.expirations == 1
+
+    generation = cache.generation
+    cache.invalidate()
+    cache.put(rows[0], 0.5, generation)     # computed with the old model: dropped
+    assert cache.get(rows[0]) is None and cache.stats()["size"] == 0
+
+
+def test_parse_resolution():
+    assert parse_resolution("temperature=0.5, humidity=2") == {"temperature": 0.5, "humidity": 2.0}
+    assert parse_resolution(None) == {}
@@ -0,0 +1,48 @@
+# tests/test_profiler.py
+
+import os
+import sys
+import threading
+import time
+
+# Ensure the backend folder is in the path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.profiler import ProfilerControl, SamplingProfiler
+
+
+def busy_loop(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_reports_collapsed_stacks_of_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_loop, args=(stop,), name="busy")
+    worker.start()
+    with SamplingProfiler(interval=0.001) as profiler:
+        time.sleep(0.2)
+    stop.set()
+    worker.join()
+
+    assert profiler.samples > 0
+    lines = profiler.collapsed().splitlines()
+    busy = [line for line in lines if line.startswith("busy;")]
+    assert busy and all("busy_loop (test_profiler.py:" in line for line in busy)
+    assert all(int(line.rsplit(" ", 1)[1]) > 0 for line in lines)
+
+
+def test_session_profiles_only_the_next_matching_requests():
+    control = ProfilerControl()
+    session = control.start(route="/scan-*", requests=2, interval=0.001)
+
+    assert not session.claim("/predict-manual")
+    assert session.claim("/scan-nepal")
+    assert session.claim("/scan-nepal")
+    assert not session.claim("/scan-nepal")  # only two were asked for
+    session.release()
+    assert control.session is session
+    session.release()
+
+    assert session.finished and control.session is None
+    assert session.status()["completed_requests"] == 2
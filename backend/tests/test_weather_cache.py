@@ -0,0 +1,147 @@
+# tests/test_weather_cache.py
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+# Ensure the backend folder is in the path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.weather_cache import WeatherCache
+
+WEATHER = {"temperature": 30.0, "humidity": 25, "wind_speed": 3.0, "precipitation": 0}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def lookup(cache, points, fetch):
+    """aget_many() from sync code, with fetch(lat, lon) answering each point it is asked for"""
+    async def fetch_many(points):
+        return [fetch(lat, lon) for lat, lon in points]
+
+    return asyncio.run(cache.aget_many(points, fetch_many))
+
+
+def test_points_in_one_grid_cell_share_an_entry_until_it_expires():
+    clock = FakeClock()
+    cache = WeatherCache(grid=0.1, ttl=3600, clock=clock)
+    calls = []
+
+    def fetch(lat, lon):
+        calls.append((lat, lon))
+        return dict(WEATHER)
+
+    assert lookup(cache, [(27.71, 85.32)], fetch) == [WEATHER]
+    lookup(cache, [(27.69, 85.28)], fetch)[0]["temperature"] = -1  # same 0.1° cell; callers get copies
+    assert lookup(cache, [(27.71, 85.32), (27.81, 85.32)], fetch) == [WEATHER] * 2  # and the next cell north
+    assert calls == [(27.71, 85.32), (27.81, 85.32)]
+
+    clock.now += 3600
+    lookup(cache, [(27.71, 85.32)], fetch)
+    assert len(calls) == 3 and cache.expirations == 1
+
+
+def test_concurrent_misses_for_a_cell_are_fetched_once():
+    cache = WeatherCache(grid=0.1)
+    calls = []
+
+    def fetch(lat, lon):
+        calls.append((lat, lon))
+        time.sleep(0.1)
+        return dict(WEATHER)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.extend(lookup(cache, [(27.7, 85.3)], fetch)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [WEATHER] * 8 and len(calls) == 1
+
+    async def afetch_many(points):
+        calls.extend(points)
+        await asyncio.sleep(0.1)
+        return [dict(WEATHER) for _ in points]
+
+    async def scan():
+        return await asyncio.gather(*(cache.aget_many([(28.2, 83.9)], afetch_many) for _ in range(8)))
+
+    assert asyncio.run(scan()) == [[WEATHER]] * 8 and len(calls) == 2
+    assert cache.merged == 14
+
+
+def test_failed_fetches_reach_every_waiter_and_are_not_cached():
+    cache = WeatherCache(grid=0.1)
+
+    async def failing(points):
+        await asyncio.sleep(0.05)
+        raise RuntimeError("provider down")
+
+    async def scan():
+        return await asyncio.gather(*(cache.aget_many([(27.7, 85.3)], failing) for _ in range(3)))
+
+    assert [type(result) for result, in asyncio.run(scan())] == [RuntimeError] * 3
+    assert lookup(cache, [(27.7, 85.3)], lambda lat, lon: dict(WEATHER)) == [WEATHER]
+
+
+def test_fresh_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / "weather.json")
+    clock = FakeClock()
+    cache = WeatherCache(grid=0.1, ttl=3600, path=path, clock=clock)
+    lookup(cache, [(27.7, 85.3)], lambda lat, lon: dict(WEATHER))
+    clock.now += 1800
+    lookup(cache, [(28.2, 83.9)], lambda lat, lon: dict(WEATHER, temperature=20.0))
+
+    clock.now += 1801  # the first entry is stale by now
+    restarted = WeatherCache(grid=0.1, ttl=3600, path=path, clock=clock)
+    assert restarted.stats()["size"] == 1
+    assert lookup(restarted, [(28.2, 83.9)], lambda lat, lon: pytest.fail("refetched"))[0]["temperature"] == 20.0
+    assert WeatherCache(grid=0.05, path=path, clock=clock).stats()["size"] == 0  # other grid, other cells
+
+
+def test_a_cancelled_fetch_fails_its_waiters_instead_of_cancelling_them():
+    cache = WeatherCache(grid=0.1)
+
+    async def slow(points):
+        await asyncio.sleep(10)
+
+    async def scan():
+        leader = asyncio.ensure_future(cache.aget_many([(27.7, 85.3)], slow))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.ensure_future(cache.aget_many([(27.7, 85.3)], slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await waiter
+
+    [result] = asyncio.run(scan())
+    assert isinstance(result, RuntimeError) and cache.stats()["in_flight"] == 0
+
+
+def test_the_cache_file_is_written_off_the_event_loop(tmp_path):
+    cache = WeatherCache(grid=0.1, path=str(tmp_path / "weather.json"))
+    threads = []
+    save = cache.save
+    cache.save = lambda: threads.append(threading.get_ident()) or save()
+
+    async def scan():
+        loop_thread = threading.get_ident()
+        await asyncio.gather(*(cache.aget_many([(27.7 + i, 85.3)], fetch_many) for i in range(5)))
+        return loop_thread
+
+    async def fetch_many(points):
+        return [dict(WEATHER) for _ in points]
+
+    loop_thread = asyncio.run(scan())
+    assert threads and loop_thread not in threads
+    assert WeatherCache(grid=0.1, path=cache.path).stats()["size"] == 5
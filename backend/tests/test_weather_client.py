@@ -0,0 +1,118 @@
+# tests/test_weather_client.py
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+
+# Ensure the backend folder is in the path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.weather_client import AsyncWeatherClient
+
+
+class StandInWeather(BaseHTTPRequestHandler):
+    """Answers like OpenWeatherMap after `delay` seconds; lat=500 fails, lat=99 hangs."""
+    delay = 0.2
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        try:
+            lat = float(parse_qs(urlparse(self.path).query)["lat"][0])
+            time.sleep(5 if lat == 99 else cls.delay)
+            if lat == 500:
+                self.send_response(500)
+                self.end_headers()
+                return
+            body = json.dumps({"main": {"temp": lat, "humidity": 40}, "wind": {"speed": 3.0}}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def weather_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInWeather)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    StandInWeather.max_in_flight = 0
+    yield f"http://127.0.0.1:{server.server_address[1]}/data/2.5/weather"
+    server.shutdown()
+
+
+def test_many_locations_are_fetched_concurrently_up_to_the_limit(weather_url):
+    client = AsyncWeatherClient(url=weather_url, api_key="test", timeout=2, concurrency=4)
+
+    async def run():
+        try:
+            return await asyncio.gather(*(client.current(lat, 84.0) for lat in range(12)))
+        finally:
+            await client.aclose()
+
+    start = time.perf_counter()
+    results = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+
+    assert [weather["temperature"] for weather in results] == list(range(12))
+    assert results[0] == {"temperature": 0, "humidity": 40, "wind_speed": 3.0, "precipitation": 0}
+    assert StandInWeather.max_in_flight == 4
+    assert elapsed < 12 * StandInWeather.delay / 2  # 3 waves of 4, not 12 requests in a row
+
+
+def test_failed_and_timed_out_requests_come_back_as_exceptions(weather_url):
+    client = AsyncWeatherClient(url=weather_url, api_key="test", timeout=0.5, concurrency=4)
+
+    async def run():
+        try:
+            points = [(27.0, 84.0), (500, 84.0), (99, 84.0)]
+            return await asyncio.gather(*(client.current(lat, lon) for lat, lon in points), return_exceptions=True)
+        finally:
+            await client.aclose()
+
+    ok, failed, timed_out = asyncio.run(run())
+    assert ok["temperature"] == 27.0
+    assert isinstance(failed, httpx.HTTPStatusError)
+    assert isinstance(timed_out, httpx.TimeoutException)
+
+
+def test_client_belongs_to_one_event_loop_until_closed(weather_url):
+    client = AsyncWeatherClient(url=weather_url, api_key="test", timeout=2, concurrency=4)
+    owner = asyncio.new_event_loop()
+    try:
+        assert owner.run_until_complete(client.current(27.0, 84.0))["temperature"] == 27.0
+        with pytest.raises(RuntimeError):
+            asyncio.run(client.current(28.0, 84.0))
+        with pytest.raises(RuntimeError):
+            asyncio.run(client.aclose())
+        owner.run_until_complete(client.aclose())
+    finally:
+        owner.close()
+
+    async def run():
+        try:
+            return await client.current(29.0, 84.0)
+        finally:
+            await client.aclose()
+
+    assert asyncio.run(run())["temperature"] == 29.0  # released: another loop can use it now
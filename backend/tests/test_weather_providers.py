@@ -0,0 +1,99 @@
+# tests/test_weather_providers.py
+
+import asyncio
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import httpx
+import pytest
+
+# Ensure the backend folder is in the path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from services.weather_cache import WeatherCache
+from services.weather_client import AsyncWeatherClient
+from services.weather_providers import OpenMeteoProvider
+
+
+class StandInOpenMeteo(BaseHTTPRequestHandler):
+    """Answers like the Open-Meteo forecast API, with temperature = latitude; a latitude of 500 fails the request."""
+    requests = []
+    wind_units = set()
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        lats = [float(lat) for lat in query["latitude"][0].split(",")]
+        type(self).requests.append(len(lats))
+        type(self).wind_units.update(query["wind_speed_unit"])
+        if 500 in lats:
+            self.send_response(500)
+            self.end_headers()
+            return
+        locations = [{"current": {"temperature_2m": lat, "relative_humidity_2m": 40,
+                                  "wind_speed_10m": 2.5, "precipitation": 0.0}} for lat in lats]
+        body = json.dumps(locations[0] if len(locations) == 1 else locations).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def provider():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInOpenMeteo)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    StandInOpenMeteo.requests = []
+    yield OpenMeteoProvider(url=f"http://127.0.0.1:{server.server_address[1]}/v1/forecast", max_points=100,
+                            client=AsyncWeatherClient(timeout=2), cache=WeatherCache(grid=0.01))
+    server.shutdown()
+
+
+def test_points_are_packed_into_requests_and_mapped_back_in_order(provider):
+    points = [(-60 + i * 0.05, 84.0) for i in range(250)]
+
+    async def scan():
+        first = await provider.get_weather_many(points)
+        again = await provider.get_weather_many(points[::-1])
+        await provider.client.aclose()
+        return first, again
+
+    first, again = asyncio.run(scan())
+    assert sorted(StandInOpenMeteo.requests) == [50, 100, 100]  # the repeat is served by the cache
+    assert StandInOpenMeteo.wind_units == {"kmh"}  # the unit the model was trained on
+    assert [weather["temperature"] for weather in first] == pytest.approx([lat for lat, _ in points])
+    assert [weather["temperature"] for weather in again] == pytest.approx([lat for lat, _ in points[::-1]])
+    assert first[0] == {"temperature": -60, "humidity": 40, "wind_speed": 2.5, "precipitation": 0.0}
+
+
+def test_a_failed_request_only_fails_its_own_points(provider):
+    provider.max_points = 2
+    points = [(10.0, 84.0), (500, 84.0), (20.0, 84.0), (30.0, 84.0)]
+
+    async def scan():
+        try:
+            return await provider.get_weather_many(points)
+        finally:
+            await provider.client.aclose()
+
+    results = asyncio.run(scan())
+    assert all(isinstance(result, httpx.HTTPStatusError) for result in results[:2])
+    assert [weather["temperature"] for weather in results[2:]] == [20.0, 30.0]
+
+
+def test_sync_lookups_use_a_client_of_their_own_per_call(provider, monkeypatch):
+    import services.weather as weather
+
+    monkeypatch.setattr(weather, "weather_provider", provider)
+    first = weather.get_weather_many([(10.0, 84.0), (20.0, 84.0)])
+    second = weather.get_weather_many([(30.0, 84.0)])  # a new event loop: must not reuse the first one's client
+    assert [result["temperature"] for result in first + second] == [10.0, 20.0, 30.0]
+    assert provider.client._client is None  # the shared client was never bound to those loops
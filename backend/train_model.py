@@ -0,0 +1,69 @@
+"""
+Train the fire model from the enriched dataset, the same way as Final_RF.ipynb,
+but building X with utils.features so training and the API cannot disagree on
+the feature columns or their order.
+
+Usage (from backend/):
+    python train_model.py [--csv ../fire_dataset_enriched.csv] [--out-dir model]
+                          [--trees 100] [--n-jobs 1] [--profile fit.folded]
+
+Then run convert_model.py to write the .rfm file the API loads.
+"""
+import argparse
+import os
+import sys
+
+import joblib
+import pandas as pd
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+# Add the current directory to Python path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from custom_rf import RandomForest
+from services.profiler import SamplingProfiler
+from utils.features import FEATURES, features_from
+from utils.model_loader import MODEL_DIR, PICKLE_FILE, SCALER_FILE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--csv", default=os.path.join(os.path.dirname(__file__), "..", "fire_dataset_enriched.csv"))
+    parser.add_argument("--out-dir", default=MODEL_DIR)
+    parser.add_argument("--trees", type=int, default=100)
+    parser.add_argument("--n-jobs", type=int, default=1)
+    parser.add_argument("--profile", help="write a collapsed-stack profile of forest.fit to this file")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.csv).dropna(subset=FEATURES + ["fire_occurred"])
+    X = features_from(df)
+    y = df["fire_occurred"].to_numpy()
+
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+
+    forest = RandomForest(n_trees=args.trees, max_depth=10, min_samples=5, n_jobs=args.n_jobs)
+    print(f"Training on {len(X_train)} rows...")
+    profiler = SamplingProfiler(interval=0.001) if args.profile else None
+    if profiler is not None:
+        profiler.start()
+    forest.fit(X_train_scaled, y_train)
+    if profiler is not None:
+        profiler.stop()
+        with open(args.profile, "w") as f:
+            f.write(profiler.collapsed())
+        print(f"Wrote {profiler.samples} profile samples to {args.profile}")
+    accuracy = accuracy_score(y_test, forest.predict(scaler.transform(X_test)))
+    print(f"Test accuracy: {accuracy:.4f} ({len(X_test)} rows)")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    joblib.dump(forest, os.path.join(args.out_dir, PICKLE_FILE))
+    joblib.dump(scaler, os.path.join(args.out_dir, SCALER_FILE))
+    print(f"Saved model and scaler to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
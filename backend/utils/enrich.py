@@ -1,8 +1,9 @@
-import requests
-import math
 from datetime import datetime
 
+from utils.features import compute_vpd
+
 def enrich_point(lat, lon, date_str):
+    import requests
     try:
         date = datetime.strptime(date_str, "%Y-%m-%d").date()
 
@@ -30,10 +31,8 @@ def enrich_point(lat, lon, date_str):
         # ELEVATION from OpenTopodata
         elev = fetch_elevation(lat, lon)
 
-        # VPD Calculation
-        es = 0.6108 * math.exp((17.27 * temp) / (temp + 237.3))
-        ea = es * (humidity / 100.0)
-        vpd = round(es - ea, 3)
+        # VPD Calculation (same function the API uses at prediction time)
+        vpd = float(compute_vpd(temp, humidity))
 
         return {
             "latitude": lat,
@@ -51,6 +50,7 @@ def enrich_point(lat, lon, date_str):
         return None
 
 def fetch_elevation(lat, lon):
+    import requests
     try:
         url = f"https://api.opentopodata.org/v1/srtm90m?locations={lat},{lon}"
         r = requests.get(url)
@@ -0,0 +1,55 @@
+"""
+Feature assembly shared by training (dataset enrichment, train_model.py) and
+serving (every prediction route), so the model always sees the same columns
+in the same order with VPD computed the same way.
+"""
+import numpy as np
+
+# Feature list expected by the model (matches the order in which X was created in notebook)
+FEATURES = [
+    'latitude', 'longitude', 'temperature', 'humidity',
+    'wind_speed', 'precipitation', 'elevation', 'vpd'
+]
+
+# ManualInput fields: every feature except vpd, which is derived
+INPUT_FIELDS = FEATURES[:-1]
+
+
+def compute_vpd(temperature, humidity):
+    """
+    Vapor Pressure Deficit in kPa, rounded to 3 decimals (same formula as the
+    notebook's calculate_vpd). Works on scalars or arrays; NaN where undefined.
+    """
+    temperature = np.asarray(temperature, dtype=np.float64)
+    humidity = np.asarray(humidity, dtype=np.float64)
+    with np.errstate(all="ignore"):
+        es = 0.6108 * np.exp((17.27 * temperature) / (temperature + 237.3))
+        ea = (humidity / 100) * es
+        vpd = np.round(es - ea, 3)
+    return np.where(np.isfinite(vpd), vpd, np.nan)
+
+
+def assemble_features(latitude, longitude, temperature, humidity, wind_speed, precipitation, elevation, vpd=None):
+    """
+    (n, 8) float64 feature matrix in FEATURES order. Each argument is a scalar
+    or an array (broadcast against the others); vpd is computed from
+    temperature and humidity unless given. Missing values (None) become NaN.
+    """
+    columns = [latitude, longitude, temperature, humidity, wind_speed, precipitation, elevation]
+    columns = [np.asarray(np.nan if value is None else value, dtype=np.float64) for value in columns]
+    if vpd is None:
+        vpd = compute_vpd(columns[2], columns[3])
+    columns = np.broadcast_arrays(*columns, np.asarray(vpd, dtype=np.float64))
+    X = np.empty((columns[0].size, len(FEATURES)), dtype=np.float64)
+    for i, column in enumerate(columns):
+        X[:, i] = column.ravel()
+    return X
+
+
+def features_from(columns):
+    """
+    assemble_features from a mapping of field name -> scalar or array (a
+    request dict, a DataFrame...). Uses its 'vpd' column if present.
+    """
+    vpd = columns["vpd"] if "vpd" in columns else None
+    return assemble_features(*(columns[name] for name in INPUT_FIELDS), vpd=vpd)
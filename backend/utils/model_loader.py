@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+
+from custom_rf import FlatForest
+
+# Base directory of the backend
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_DIR = os.path.join(BASE_DIR, "model")
+
+MODEL_FILE = "random_forest_final_model.rfm"
+PICKLE_FILE = "random_forest_final_model.pkl"
+SCALER_FILE = "scaler.pkl"
+
+
+class ScalerParams:
+    """
+    StandardScaler.transform rebuilt from the mean/scale stored in a .rfm
+    header. Same arithmetic as scikit-learn, so results are bit-identical.
+    """
+    def __init__(self, mean, scale):
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+
+    def transform(self, X):
+        X = np.array(X, dtype=np.float64)
+        X -= self.mean_
+        X /= self.scale_
+        return X
+
+
+def scaler_params(scaler):
+    """mean/scale of a fitted StandardScaler (or ScalerParams) as JSON-friendly lists."""
+    n = getattr(scaler, "n_features_in_", None) or len(scaler.mean_)
+    mean = scaler.mean_ if getattr(scaler, "with_mean", True) else np.zeros(n)
+    scale = scaler.scale_ if getattr(scaler, "with_std", True) else np.ones(n)
+    return {"mean": [float(v) for v in mean], "scale": [float(v) for v in scale]}
+
+
+def load_model(model_dir=MODEL_DIR, fold_scaler=True):
+    """
+    Return (forest, scaler) for serving.
+    Prefers the memory-mapped .rfm file written by convert_model.py and falls
+    back to the joblib pickles (which need custom_rf importable at load time).
+
+    With fold_scaler the scaler is compiled into the forest's thresholds once,
+    here, and None is returned in its place: the forest then takes raw
+    feature values and no transform runs per request.
+    """
+    model_path = os.path.join(model_dir, MODEL_FILE)
+    if os.path.exists(model_path):
+        forest = FlatForest.load(model_path)
+        if forest.metadata.get("scaler_folded"):
+            return forest, None
+        scaler = ScalerParams(**forest.metadata["scaler"])
+    else:
+        import joblib
+        model = joblib.load(os.path.join(model_dir, PICKLE_FILE))
+        if model is None:
+            raise ValueError("Model is None, check the file path or model format.")
+        scaler = joblib.load(os.path.join(model_dir, SCALER_FILE))
+        forest = FlatForest.from_forest(model)
+
+    if fold_scaler:
+        return forest.fold_scaler(**scaler_params(scaler)), None
+    return forest, scaler
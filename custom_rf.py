@@ -1,5 +1,11 @@
-import numpy as np
+import json
+import os
+import tempfile
+import warnings
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 
 # Gini Impurity Function
 def gini(y):
@@ -14,7 +20,14 @@ def split_dataset(X, y, feature_index, threshold):
     return (X[left_indices], y[left_indices]), (X[right_indices], y[right_indices])
 
 # Best Split Calculation
-def best_split(X, y, features):
+def best_split(X, y, features, rows=None, sample_weight=None):
+    if sample_weight is not None:
+        # Integer weights are row multiplicities; expand them for this engine
+        rows = np.arange(len(y)) if rows is None else rows
+        rows = np.repeat(rows, sample_weight[rows])
+    if rows is not None:
+        # The original engine works on a copy of the node's rows
+        X, y = X[rows], y[rows]
     best_gain = 0
     best_feature, best_threshold = None, None
     current_gini = gini(y)
@@ -38,6 +51,75 @@ def best_split(X, y, features):
                 best_threshold = t
     return best_feature, best_threshold
 
+# Sort-based Best Split Calculation
+def best_split_sorted(X, y, features, rows=None, sample_weight=None):
+    """
+    Same search as best_split, but each candidate feature is sorted once and
+    every threshold is scored in a single NumPy pass from cumulative class
+    counts. Candidates are visited in the same order and compared with the
+    same strict '>' so both engines pick the same (feature, threshold).
+    If rows is given only those rows of X are scored, one column at a time.
+    sample_weight holds integer row counts (see RandomForest bootstrap="weighted").
+    """
+    if rows is not None:
+        y = y[rows]
+    weights = None
+    if sample_weight is not None:
+        weights = sample_weight if rows is None else sample_weight[rows]
+    best_gain = 0
+    best_feature, best_threshold = None, None
+
+    classes, y_codes = np.unique(y, return_inverse=True)
+    class_ids = np.arange(len(classes))
+    if weights is None:
+        n = len(y)
+        current_gini = gini(y)
+    else:
+        class_counts = np.bincount(y_codes, weights=weights).astype(np.int64)
+        n = class_counts.sum()
+        current_gini = 1 - np.sum((class_counts / n) ** 2)
+
+    for feature_idx in features:
+        column = X[:, feature_idx] if rows is None else X[rows, feature_idx]
+        order = np.argsort(column, kind="stable")
+        values = column[order]
+        sorted_codes = y_codes[order]
+        sorted_weights = None if weights is None else weights[order]
+        del column, order
+
+        # A threshold is only valid at the last occurrence of a value
+        positions = np.flatnonzero(values[:-1] < values[1:])
+        if len(positions) == 0:
+            continue
+
+        # Class counts of the rows at or below each candidate position
+        one_hot = sorted_codes[:, None] == class_ids
+        if sorted_weights is not None:
+            one_hot = one_hot * sorted_weights[:, None]
+        cum_counts = np.cumsum(one_hot, axis=0)
+        left_counts = cum_counts[positions]
+        right_counts = cum_counts[-1] - left_counts
+        del one_hot, cum_counts, sorted_codes
+        n_left = positions + 1 if weights is None else left_counts.sum(axis=1)
+        n_right = n - n_left
+
+        gini_left = 1 - np.sum((left_counts / n_left[:, None]) ** 2, axis=1)
+        gini_right = 1 - np.sum((right_counts / n_right[:, None]) ** 2, axis=1)
+        gain = current_gini - ((n_left / n) * gini_left + (n_right / n) * gini_right)
+
+        pos = int(np.argmax(gain))
+        if gain[pos] > best_gain:
+            best_gain = gain[pos]
+            best_feature = feature_idx
+            best_threshold = values[positions[pos]]
+    return best_feature, best_threshold
+
+# Split engines selectable by name in build_tree / RandomForest
+SPLITTERS = {
+    "naive": best_split,
+    "sorted": best_split_sorted,
+}
+
 # Tree Node Class
 class TreeNode:
     def __init__(self, feature=None, threshold=None, left=None, right=None, *, value=None):
@@ -50,38 +132,376 @@ class TreeNode:
     def is_leaf(self):
         return self.value is not None
 
+# In-place Node Partition
+def partition_rows(idx, start, end, go_left):
+    """
+    Stable partition of idx[start:end] so that rows going left come first.
+    Only the index array is rewritten; returns where the right child starts.
+    """
+    rows = idx[start:end]
+    idx[start:end] = np.concatenate((rows[go_left], rows[~go_left]))
+    return start + int(np.count_nonzero(go_left))
+
+# Most common class of a node (weighted by row counts if given)
+def leaf_value(y_node, w_node=None):
+    if w_node is None:
+        return Counter(y_node).most_common(1)[0][0]
+    classes, codes = np.unique(y_node, return_inverse=True)
+    return classes[majority_code(codes, np.bincount(codes, weights=w_node))]
+
 # Build Decision Tree
-def build_tree(X, y, depth=0, max_depth=10, min_samples=5, num_features=None):
+def build_tree(X, y, depth=0, max_depth=10, min_samples=5, num_features=None, splitter="sorted", rng=None,
+               sample_weight=None, rows=None):
+    # rng: np.random.Generator for feature bagging; None uses the global np.random state
+    rng = np.random if rng is None else rng
+    # sample_weight: integer count per row of X (a weighted bootstrap); rows with 0 are left out.
+    # rows: the rows to grow from, in order (ties between classes go to the class seen first)
+    if sample_weight is not None:
+        sample_weight = np.asarray(sample_weight, dtype=np.int64)
+    if rows is not None:
+        idx = np.array(rows)
+    elif sample_weight is not None:
+        idx = np.flatnonzero(sample_weight)
+    else:
+        idx = np.arange(len(y))
+    # One index array per tree; every node owns the slice [start, end) of it
+    return _grow_tree(X, y, sample_weight, idx, 0, len(idx), depth,
+                      max_depth, min_samples, num_features, splitter, rng)
+
+def _grow_tree(X, y, sample_weight, idx, start, end, depth, max_depth, min_samples, num_features, splitter, rng):
+    rows = idx[start:end]
+    y_node = y[rows]
+    w_node = None if sample_weight is None else sample_weight[rows]
+    n_node = len(y_node) if w_node is None else w_node.sum()
+
     # Stop splitting if conditions are met
-    if len(y) == 0:
+    if len(y_node) == 0:
         # Return a leaf node with a default value (e.g., 0)
         return TreeNode(value=0)
-    if len(set(y)) == 1 or len(y) < min_samples or depth >= max_depth:
+    if len(set(y_node)) == 1 or n_node < min_samples or depth >= max_depth:
         # Return leaf node with most common class
-        return TreeNode(value=Counter(y).most_common(1)[0][0])
+        return TreeNode(value=leaf_value(y_node, w_node))
 
     n_features = X.shape[1]
     # Select a subset of features for Random Forest (feature bagging)
-    features_to_consider = np.random.choice(n_features, num_features or n_features, replace=False)
+    features_to_consider = rng.choice(n_features, num_features or n_features, replace=False)
     
-    best_feat, best_thresh = best_split(X, y, features_to_consider)
+    best_feat, best_thresh = SPLITTERS[splitter](X, y, features_to_consider, rows, sample_weight)
 
     # If no split improves Gini impurity, make it a leaf node
     if best_feat is None:
-        return TreeNode(value=Counter(y).most_common(1)[0][0])
+        return TreeNode(value=leaf_value(y_node, w_node))
+
+    go_left = X[rows, best_feat] <= best_thresh
 
-    (X_left, y_left), (X_right, y_right) = split_dataset(X, y, best_feat, best_thresh)
-    
     # If either split is empty, return a leaf node with the most common class
-    if len(y_left) == 0 or len(y_right) == 0:
-        return TreeNode(value=Counter(y).most_common(1)[0][0])
+    if go_left.all() or not go_left.any():
+        return TreeNode(value=leaf_value(y_node, w_node))
+
+    mid = partition_rows(idx, start, end, go_left)
 
     # Recursively build left and right sub-trees
-    left_branch = build_tree(X_left, y_left, depth + 1, max_depth, min_samples, num_features)
-    right_branch = build_tree(X_right, y_right, depth + 1, max_depth, min_samples, num_features)
+    args = (max_depth, min_samples, num_features, splitter, rng)
+    left_branch = _grow_tree(X, y, sample_weight, idx, start, mid, depth + 1, *args)
+    right_branch = _grow_tree(X, y, sample_weight, idx, mid, end, depth + 1, *args)
 
     return TreeNode(feature=best_feat, threshold=best_thresh, left=left_branch, right=right_branch)
 
+# Feature Binning for histogram mode
+def bin_features(X, max_bins=255):
+    """
+    Quantize every column of X into at most max_bins quantile bins.
+
+    Returns the uint8 bin codes and, per feature, the upper edge of each bin.
+    Edges are actual data values and code <= b holds exactly when
+    x <= edges[b], so a split found on codes maps back to a raw threshold.
+    Columns with no more than max_bins distinct values get one bin per value.
+    """
+    if not 1 < max_bins <= 255:
+        raise ValueError("max_bins must be between 2 and 255")
+    X = np.asarray(X, dtype=np.float64)
+    X_binned = np.empty(X.shape, dtype=np.uint8)
+    bin_edges = []
+    for feature_idx in range(X.shape[1]):
+        column = X[:, feature_idx]
+        edges = np.unique(column)
+        if len(edges) > max_bins:
+            quantiles = np.linspace(0, 1, max_bins + 1)[1:]
+            edges = np.unique(np.quantile(column, quantiles, method="inverted_cdf"))
+        X_binned[:, feature_idx] = np.searchsorted(edges, column, side="left")
+        bin_edges.append(edges)
+    return X_binned, bin_edges
+
+# Class histogram of a node: counts[feature, bin, class]
+def node_histogram(X_binned, y_codes, rows, n_bins, n_classes, sample_weight=None):
+    n_features = X_binned.shape[1]
+    offsets = np.arange(n_features) * (n_bins * n_classes)
+    keys = X_binned[rows].astype(np.intp) * n_classes + y_codes[rows][:, None] + offsets
+    weights = None
+    if sample_weight is not None:
+        weights = np.broadcast_to(sample_weight[rows][:, None], keys.shape).ravel()
+    counts = np.bincount(keys.ravel(), weights=weights, minlength=n_features * n_bins * n_classes)
+    return counts.astype(np.int64).reshape(n_features, n_bins, n_classes)
+
+# Majority class with Counter.most_common tie-breaking (first class seen wins)
+def majority_code(y_node, class_counts):
+    tied = np.flatnonzero(class_counts == class_counts.max())
+    if len(tied) == 1:
+        return tied[0]
+    return tied[np.argmin([np.argmax(y_node == c) for c in tied])]
+
+# Best Split from a node histogram
+def best_split_hist(hist, features):
+    """
+    Score every bin boundary of the candidate features from the node's class
+    histogram. Only bins that hold rows of this node are candidates, which
+    mirrors the unique-value thresholds of best_split.
+    Returns (feature, bin) or (None, None).
+    """
+    best_gain = 0
+    best_feature, best_bin = None, None
+
+    class_counts = hist[0].sum(axis=0)
+    n = class_counts.sum()
+    current_gini = 1 - np.sum((class_counts / n) ** 2)
+
+    for feature_idx in features:
+        feature_hist = hist[feature_idx]
+        left_counts = np.cumsum(feature_hist, axis=0)
+        n_left = left_counts.sum(axis=1)
+        candidates = np.flatnonzero((feature_hist.sum(axis=1) > 0) & (n_left < n))
+        if len(candidates) == 0:
+            continue
+
+        left_counts = left_counts[candidates]
+        right_counts = class_counts - left_counts
+        n_left = n_left[candidates]
+        n_right = n - n_left
+
+        gini_left = 1 - np.sum((left_counts / n_left[:, None]) ** 2, axis=1)
+        gini_right = 1 - np.sum((right_counts / n_right[:, None]) ** 2, axis=1)
+        gain = current_gini - ((n_left / n) * gini_left + (n_right / n) * gini_right)
+
+        pos = int(np.argmax(gain))
+        if gain[pos] > best_gain:
+            best_gain = gain[pos]
+            best_feature = feature_idx
+            best_bin = candidates[pos]
+    return best_feature, best_bin
+
+# Build Decision Tree from binned data
+def build_tree_hist(X_binned, y_codes, rows, bin_edges, classes, max_depth=10,
+                    min_samples=5, num_features=None, rng=None, sample_weight=None):
+    """
+    Histogram counterpart of build_tree. X_binned/y_codes are never copied:
+    rows holds the tree's sample (a bootstrap may repeat rows) and is
+    partitioned in place, each node owning a [start, end) slice of it.
+    With sample_weight, rows are distinct and weighted by their counts.
+    Only the smaller child's histogram is counted; the larger one is the
+    parent's histogram minus it.
+    """
+    rng = np.random if rng is None else rng
+    tree = dict(X_binned=X_binned, y_codes=y_codes, idx=rows, sample_weight=sample_weight,
+                bin_edges=bin_edges, classes=classes,
+                n_bins=max(len(edges) for edges in bin_edges), max_depth=max_depth,
+                min_samples=min_samples, num_features=num_features, rng=rng)
+    return _grow_tree_hist(tree, 0, len(rows), 0, None)
+
+def _grow_tree_hist(tree, start, end, depth, hist):
+    X_binned, y_codes, idx, classes = tree["X_binned"], tree["y_codes"], tree["idx"], tree["classes"]
+    sample_weight = tree["sample_weight"]
+    n_bins, n_classes = tree["n_bins"], len(classes)
+
+    rows = idx[start:end]
+    if len(rows) == 0:
+        return TreeNode(value=0)
+    y_node = y_codes[rows]
+    w_node = None if sample_weight is None else sample_weight[rows]
+    class_counts = np.bincount(y_node, weights=w_node, minlength=n_classes).astype(np.int64)
+    if (np.count_nonzero(class_counts) == 1 or class_counts.sum() < tree["min_samples"]
+            or depth >= tree["max_depth"]):
+        return TreeNode(value=classes[majority_code(y_node, class_counts)])
+
+    if hist is None:
+        hist = node_histogram(X_binned, y_codes, rows, n_bins, n_classes, sample_weight)
+
+    n_features = X_binned.shape[1]
+    # Select a subset of features for Random Forest (feature bagging)
+    features_to_consider = tree["rng"].choice(n_features, tree["num_features"] or n_features, replace=False)
+
+    best_feat, best_bin = best_split_hist(hist, features_to_consider)
+    if best_feat is None:
+        return TreeNode(value=classes[majority_code(y_node, class_counts)])
+
+    mid = partition_rows(idx, start, end, X_binned[rows, best_feat] <= best_bin)
+
+    # Children at max_depth become leaves and need no histogram
+    left_hist = right_hist = None
+    if depth + 1 < tree["max_depth"]:
+        if mid - start <= end - mid:
+            left_hist = node_histogram(X_binned, y_codes, idx[start:mid], n_bins, n_classes, sample_weight)
+            right_hist = hist - left_hist
+        else:
+            right_hist = node_histogram(X_binned, y_codes, idx[mid:end], n_bins, n_classes, sample_weight)
+            left_hist = hist - right_hist
+
+    left_branch = _grow_tree_hist(tree, start, mid, depth + 1, left_hist)
+    right_branch = _grow_tree_hist(tree, mid, end, depth + 1, right_hist)
+
+    # Map the bin boundary back to a raw feature value for inference
+    threshold = tree["bin_edges"][best_feat][best_bin]
+    return TreeNode(feature=best_feat, threshold=threshold, left=left_branch, right=right_branch)
+
+# Class histograms of many nodes at once: counts[node, feature, bin, class]
+def grouped_histogram(X_binned, y_codes, rows, node_ids, weights, n_nodes, n_bins, n_classes):
+    n_features = X_binned.shape[1]
+    keys = (node_ids[:, None] * n_features + np.arange(n_features)) * n_bins
+    keys = (keys + X_binned[rows]) * n_classes + y_codes[rows][:, None]
+    counts = np.bincount(keys.ravel(), weights=np.broadcast_to(weights[:, None], keys.shape).ravel(),
+                         minlength=n_nodes * n_features * n_bins * n_classes)
+    return counts.astype(np.int64).reshape(n_nodes, n_features, n_bins, n_classes)
+
+# Best Split for every node of a level
+def best_split_level(hist, class_counts, candidates):
+    """
+    Vectorized best_split_hist over a batch of nodes.
+    hist: (nodes, features, bins, classes); candidates: (nodes, k) features per node,
+    scanned in that order so ties resolve as in the depth-first builder.
+    Returns feature, bin and whether a split with positive gain was found, per node.
+    """
+    n_nodes, n_bins = len(hist), hist.shape[2]
+    node_idx = np.arange(n_nodes)
+    feature_hist = hist[node_idx[:, None], candidates]
+    left_counts = np.cumsum(feature_hist, axis=2)
+    n_left = left_counts.sum(axis=3)
+    n = class_counts.sum(axis=1)[:, None, None]
+    valid = (feature_hist.sum(axis=3) > 0) & (n_left < n)
+    right_counts = class_counts[:, None, None, :] - left_counts
+    n_right = n - n_left
+
+    current_gini = 1 - np.sum((class_counts / class_counts.sum(axis=1)[:, None]) ** 2, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gini_left = 1 - np.sum((left_counts / n_left[..., None]) ** 2, axis=3)
+        gini_right = 1 - np.sum((right_counts / n_right[..., None]) ** 2, axis=3)
+    gain = current_gini[:, None, None] - ((n_left / n) * gini_left + (n_right / n) * gini_right)
+    gain[~valid] = -np.inf
+
+    gain = gain.reshape(n_nodes, -1)
+    pos = np.argmax(gain, axis=1)
+    found = gain[node_idx, pos] > 0
+    feature = candidates[node_idx, pos // n_bins]
+    return feature, pos % n_bins, found
+
+# Build Decision Tree level by level from binned data
+def build_tree_level(X_binned, y_codes, rows, bin_edges, classes, max_depth=10,
+                     min_samples=5, num_features=None, rng=None, sample_weight=None):
+    """
+    Breadth-first counterpart of build_tree_hist. Each row of the sample
+    carries the id of the open node it sits in, and all nodes of a level
+    get their class histograms from one bincount keyed by (node, feature,
+    bin, class). Their splits are then scored together. The max_depth and
+    min_samples rules are the same as in the depth-first builders.
+    """
+    rng = np.random if rng is None else rng
+    rows = np.asarray(rows)
+    n_features, n_classes = X_binned.shape[1], len(classes)
+    n_bins = max(len(edges) for edges in bin_edges)
+    weights = np.ones(len(rows), dtype=np.int64) if sample_weight is None else sample_weight[rows]
+    codes = y_codes[rows]
+
+    # Flat node table, filled as levels are processed
+    feature, threshold, left, right, value = [0], [0.0], [-1], [-1], [None]
+    frontier = np.array([0])
+    node_of = np.zeros(len(rows), dtype=np.intp) # Position in the frontier, -1 once in a leaf
+    hist = None
+
+    for depth in range(max_depth + 1):
+        n_open = len(frontier)
+        active = np.flatnonzero(node_of >= 0)
+        active_nodes = node_of[active]
+        class_counts = np.bincount(active_nodes * n_classes + codes[active], weights=weights[active],
+                                   minlength=n_open * n_classes).astype(np.int64).reshape(n_open, n_classes)
+
+        splittable = ((np.count_nonzero(class_counts, axis=1) > 1)
+                      & (class_counts.sum(axis=1) >= min_samples) & (depth < max_depth))
+        split_nodes = np.flatnonzero(splittable)
+        best_feat = np.zeros(n_open, dtype=np.intp)
+        best_bin = np.zeros(n_open, dtype=np.intp)
+        if len(split_nodes):
+            if hist is None:
+                hist = grouped_histogram(X_binned, y_codes, rows[active], active_nodes, weights[active],
+                                         n_open, n_bins, n_classes)
+            # Select a subset of features for Random Forest (feature bagging), in frontier order
+            candidates = np.array([rng.choice(n_features, num_features or n_features, replace=False)
+                                   for _ in split_nodes])
+            feat, bin_, found = best_split_level(hist[split_nodes], class_counts[split_nodes], candidates)
+            best_feat[split_nodes], best_bin[split_nodes] = feat, bin_
+            splittable[split_nodes[~found]] = False
+            split_nodes = split_nodes[found]
+
+        # Every other open node becomes a leaf with its majority class
+        leaf_nodes = np.flatnonzero(~splittable)
+        leaf_counts = class_counts[leaf_nodes]
+        is_top = leaf_counts == leaf_counts.max(axis=1, keepdims=True)
+        leaf_codes = np.argmax(leaf_counts, axis=1)
+        tied = is_top.sum(axis=1) > 1
+        if tied.any():
+            # Ties go to the class seen first in the node, as with Counter.most_common
+            first_seen = np.full((n_open, n_classes), len(rows))
+            np.minimum.at(first_seen, (active_nodes, codes[active]), active)
+            first_seen = np.where(is_top, first_seen[leaf_nodes], len(rows))
+            leaf_codes[tied] = np.argmin(first_seen[tied], axis=1)
+        for node, code in zip(frontier[leaf_nodes], leaf_codes):
+            value[node] = classes[code]
+
+        if len(split_nodes) == 0:
+            break
+
+        # Open two children per split node: frontier position 2j (left) and 2j + 1 (right)
+        child_base = np.full(n_open, -1)
+        child_base[split_nodes] = 2 * np.arange(len(split_nodes))
+        next_frontier = np.arange(len(feature), len(feature) + 2 * len(split_nodes))
+        for j, node in enumerate(split_nodes):
+            tree_node = frontier[node]
+            feature[tree_node] = best_feat[node]
+            threshold[tree_node] = bin_edges[best_feat[node]][best_bin[node]]
+            left[tree_node], right[tree_node] = next_frontier[2 * j], next_frontier[2 * j + 1]
+        feature += [0] * len(next_frontier)
+        threshold += [0.0] * len(next_frontier)
+        left += [-1] * len(next_frontier)
+        right += [-1] * len(next_frontier)
+        value += [None] * len(next_frontier)
+
+        # Route every active row to its child (or retire it in a leaf)
+        base = child_base[active_nodes]
+        node_of[active[base < 0]] = -1
+        moving = active[base >= 0]
+        moving_nodes = active_nodes[base >= 0]
+        go_right = X_binned[rows[moving], best_feat[moving_nodes]] > best_bin[moving_nodes]
+        node_of[moving] = base[base >= 0] + go_right
+
+        # Children at max_depth become leaves and need no histogram
+        parent_hist, hist = hist, None
+        if depth + 1 < max_depth:
+            # Count only the smaller child of each pair; the other is parent minus it
+            sizes = np.bincount(node_of[moving], minlength=len(next_frontier)).reshape(-1, 2)
+            small = 2 * np.arange(len(split_nodes)) + (sizes[:, 1] < sizes[:, 0])
+            large = small ^ 1
+            in_small = np.zeros(len(next_frontier), dtype=bool)
+            in_small[small] = True
+            counted = moving[in_small[node_of[moving]]]
+            hist = grouped_histogram(X_binned, y_codes, rows[counted], node_of[counted], weights[counted],
+                                     len(next_frontier), n_bins, n_classes)
+            hist[large] = parent_hist[split_nodes] - hist[small]
+        frontier = next_frontier
+
+    def to_tree_node(node):
+        if value[node] is not None:
+            return TreeNode(value=value[node])
+        return TreeNode(feature=feature[node], threshold=threshold[node],
+                        left=to_tree_node(left[node]), right=to_tree_node(right[node]))
+    return to_tree_node(0)
+
 # Tree Prediction
 def predict_tree(x, tree):
     if tree.is_leaf():
@@ -97,33 +517,174 @@ def predict_tree(x, tree):
     else:
         return predict_tree(x, tree.right)
 
+# Single Tree Fit (bootstrap sample + tree)
+def _fit_tree(X, y, seed, params):
+    """Fit one tree; returns (tree, out-of-bag rows as a packed bit mask or None)."""
+    # seed None keeps the legacy behaviour of drawing from the global np.random state
+    rng = np.random if seed is None else np.random.default_rng(seed)
+    params = dict(params)
+    weighted = params.pop("bootstrap") == "weighted"
+    record_oob = params.pop("oob_score")
+
+    # Bootstrap sampling
+    indices = rng.choice(len(X), len(X), replace=True)
+    draw_counts = np.bincount(indices, minlength=len(X)) if weighted or record_oob else None
+    tree = _grow_bootstrap_tree(X, y, indices, draw_counts if weighted else None, rng, params)
+
+    # Rows never drawn are this tree's out-of-bag set
+    oob = np.packbits(draw_counts == 0) if record_oob else None
+    return tree, oob
+
+def _grow_bootstrap_tree(X, y, indices, sample_weight, rng, params):
+    if sample_weight is not None:
+        # Per-row draw counts instead of a copy of the drawn rows. The distinct rows are
+        # kept in order of first draw so majority ties resolve exactly as on a copied sample.
+        _, first_draw = np.unique(indices, return_index=True)
+        rows = indices[np.sort(first_draw)]
+    if "bin_edges" in params:
+        # Histogram mode: X holds bin codes and y class codes; the tree indexes them directly
+        params = dict(params)
+        builder = build_tree_level if params.pop("growth") == "level" else build_tree_hist
+        if sample_weight is not None:
+            return builder(X, y, rows, rng=rng, sample_weight=sample_weight, **params)
+        return builder(X, y, indices, rng=rng, **params)
+    if sample_weight is not None:
+        return build_tree(X, y, rng=rng, sample_weight=sample_weight, rows=rows, **params)
+    # The drawn rows (repeats included) become the tree's index array: X itself is never copied
+    return build_tree(X, y, rng=rng, rows=indices, **params)
+
+# Worker-side state for parallel fits: the training data is memory-mapped
+# once per worker process instead of being pickled with every task
+_worker_data = {}
+
+def _init_worker(data_dir, params):
+    _worker_data["X"] = np.load(os.path.join(data_dir, "X.npy"), mmap_mode="r")
+    _worker_data["y"] = np.load(os.path.join(data_dir, "y.npy"), mmap_mode="r")
+    _worker_data["params"] = params
+
+def _fit_tree_worker(seed):
+    return _fit_tree(_worker_data["X"], _worker_data["y"], seed, _worker_data["params"])
+
+def _resolve_n_jobs(n_jobs):
+    # Same convention as scikit-learn: -1 means all cores, -2 all but one, ...
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return max(1, n_jobs)
+
 # Random Forest Class
 class RandomForest:
-    def __init__(self, n_trees=100, max_depth=10, min_samples=5):
+    def __init__(self, n_trees=100, max_depth=10, min_samples=5, splitter="sorted",
+                 n_jobs=1, random_state=None, max_bins=None, bootstrap="sample", oob_score=False,
+                 growth="depth"):
+        if splitter not in SPLITTERS:
+            raise ValueError(f"Unknown splitter '{splitter}', expected one of {list(SPLITTERS)}")
+        if bootstrap not in ("sample", "weighted"):
+            raise ValueError("bootstrap must be 'sample' or 'weighted'")
+        if growth not in ("depth", "level"):
+            raise ValueError("growth must be 'depth' or 'level'")
+        if growth == "level" and not max_bins:
+            raise ValueError("growth='level' works on binned features; set max_bins as well")
         self.n_trees = n_trees
         self.max_depth = max_depth
         self.min_samples = min_samples
+        self.splitter = splitter # "sorted" (vectorized) or "naive" (original per-threshold scan)
+        self.n_jobs = n_jobs # Worker processes used by fit (-1 = all cores)
+        self.random_state = random_state # Seed for reproducible forests at any n_jobs
+        self.max_bins = max_bins # If set (<= 255), train on quantile-binned features with histogram splits
+        self.bootstrap = bootstrap # "sample" grows from the drawn rows, "weighted" from per-row draw counts
+        self.oob_score = oob_score # If True, fit sets oob_score_ and oob_proba_ from out-of-bag votes
+        self.growth = growth # "depth" grows node by node, "level" grows a whole level per pass (binned only)
         self.trees = []
 
+    def __setstate__(self, state):
+        # Forests pickled before an option existed load with that option's default
+        self.__dict__.update(splitter="sorted", n_jobs=1, random_state=None, max_bins=None,
+                             bootstrap="sample", oob_score=False, growth="depth")
+        self.__dict__.update(state)
+
+    def _tree_seeds(self, n_jobs):
+        """One independent seed per tree, so tree i is the same whichever process builds it."""
+        if self.random_state is None and n_jobs == 1:
+            return [None] * self.n_trees
+        return np.random.SeedSequence(self.random_state).spawn(self.n_trees)
+
     def fit(self, X, y):
-        self.trees = []
+        X = X_raw = np.asarray(X)
+        y = y_raw = np.asarray(y)
         n_features_sqrt = int(np.sqrt(X.shape[1])) # Features to consider at each split
-        for _ in range(self.n_trees):
-            # Bootstrap sampling
-            indices = np.random.choice(len(X), len(X), replace=True)
-            X_sample = X[indices]
-            y_sample = y[indices]
-            
-            # Build a tree
-            tree = build_tree(X_sample, y_sample, max_depth=self.max_depth, 
-                              min_samples=self.min_samples, num_features=n_features_sqrt)
-            self.trees.append(tree)
+        params = dict(max_depth=self.max_depth, min_samples=self.min_samples,
+                      num_features=n_features_sqrt, splitter=self.splitter,
+                      bootstrap=self.bootstrap, oob_score=self.oob_score)
+        if self.max_bins:
+            # Quantize once; trees then only see uint8 bin codes and class codes
+            X, bin_edges = bin_features(X, self.max_bins)
+            classes, y = np.unique(y, return_inverse=True)
+            del params["splitter"]
+            params.update(bin_edges=bin_edges, classes=classes, growth=self.growth)
+
+        n_jobs = min(_resolve_n_jobs(self.n_jobs), self.n_trees)
+        seeds = self._tree_seeds(n_jobs)
+        if n_jobs == 1:
+            fitted = [_fit_tree(X, y, seed, params) for seed in seeds]
+        else:
+            fitted = self._fit_parallel(X, y, seeds, params, n_jobs)
+        self.trees = [tree for tree, _ in fitted]
+
+        if self.oob_score:
+            self._set_oob_score(X_raw, y_raw, np.stack([oob for _, oob in fitted]))
+
+    def _set_oob_score(self, X, y, oob_masks, batch_size=8192):
+        """
+        Score every training row using only the trees that did not see it.
+        oob_masks holds one packed bit mask of out-of-bag rows per tree.
+        Rows that were in-bag for every tree get NaN probabilities; if every
+        row was, oob_score_ is NaN too (with a warning).
+        """
+        flat = self.compile()
+        classes, y_codes = np.unique(y, return_inverse=True)
+        oob_votes = np.zeros((len(X), len(classes)))
+
+        # batch_size is a multiple of 8 so each batch starts on a byte of the masks
+        for start in range(0, len(X), batch_size):
+            stop = min(start + batch_size, len(X))
+            is_oob = np.unpackbits(oob_masks[:, start // 8:(stop + 7) // 8], axis=1,
+                                   count=stop - start).T.astype(bool)
+            votes = flat.tree_votes(X[start:stop])
+            for class_idx, label in enumerate(classes):
+                oob_votes[start:stop, class_idx] = ((votes == label) & is_oob).sum(axis=1)
+
+        n_votes = oob_votes.sum(axis=1)
+        scored = n_votes > 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.oob_proba_ = oob_votes / n_votes[:, None]
+        if not scored.any():
+            warnings.warn("No training row was out-of-bag for any tree, so oob_score_ is NaN; "
+                          "use more trees or more rows to get an out-of-bag estimate")
+            self.oob_score_ = float("nan")
+            return
+        self.oob_score_ = float(np.mean(np.argmax(oob_votes[scored], axis=1) == y_codes[scored]))
+
+    def _fit_parallel(self, X, y, seeds, params, n_jobs):
+        # Workers share X and y through one memory-mapped copy on disk (page cache)
+        with tempfile.TemporaryDirectory(prefix="custom_rf_") as data_dir:
+            np.save(os.path.join(data_dir, "X.npy"), X)
+            np.save(os.path.join(data_dir, "y.npy"), y)
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                     initargs=(data_dir, params)) as pool:
+                chunksize = max(1, len(seeds) // (n_jobs * 4))
+                return list(pool.map(_fit_tree_worker, seeds, chunksize=chunksize))
 
     def predict(self, X):
         # Get predictions from all trees
         tree_preds = np.array([[predict_tree(x, tree) for tree in self.trees] for x in X])
         # Majority vote for final prediction
         return [Counter(row).most_common(1)[0][0] for row in tree_preds]
+
+    def compile(self):
+        """Return a FlatForest for fast batch prediction with this forest's trees."""
+        return FlatForest.from_forest(self)
     
     def predict_proba(self, X):
         """
@@ -143,4 +704,265 @@ class RandomForest:
             prob_1 = counts.get(1, 0) / total
             probabilities.append([prob_0, prob_1])
         
-        return np.array(probabilities)
\ No newline at end of file
+        return np.array(probabilities)
+
+# Compact model file (.rfm) written by FlatForest.save
+MODEL_MAGIC = b"RFMODEL\n"
+MODEL_FORMAT_VERSION = 1
+
+def _align(offset, alignment=64):
+    return -(-offset // alignment) * alignment
+
+# Array-backed Forest for fast batch inference
+def _float_key(x):
+    """Map float64 values to int64 keys with the same ordering (-0.0 and 0.0 share a key)."""
+    bits = np.asarray(x, dtype=np.float64).view(np.int64)
+    return np.where(bits >= 0, bits, -(bits & np.int64(0x7FFFFFFFFFFFFFFF)))
+
+
+def _key_float(key):
+    """Inverse of _float_key."""
+    bits = np.where(key >= 0, key, (-key) | np.int64(-0x8000000000000000))
+    return bits.view(np.float64)
+
+
+class FlatForest:
+    """
+    Compiled, read-only form of a trained RandomForest.
+
+    Every node of every tree lives in one set of contiguous arrays
+    (feature, threshold, left, right, value) and each tree is identified by
+    the index of its root. Leaves have feature -1 and point back to
+    themselves, so all (row, tree) pairs can be advanced one level at a time
+    with plain array indexing until every pair sits on a leaf.
+    """
+    def __init__(self, feature, threshold, left, right, value, roots, depth, metadata=None):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.right = np.ascontiguousarray(right, dtype=np.int32)
+        self.value = np.ascontiguousarray(value, dtype=np.int64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.depth = int(depth) # Number of levels needed to reach every leaf
+        self.classes = np.unique(self.value[self.feature < 0])
+        self.metadata = dict(metadata or {}) # Feature names, scaler parameters, ... (see save)
+
+    @classmethod
+    def from_forest(cls, forest):
+        """Flatten the TreeNode objects of a (possibly unpickled) RandomForest."""
+        feature, threshold, left, right, value, roots = [], [], [], [], [], []
+        max_depth = 0
+
+        for tree in forest.trees:
+            roots.append(len(feature))
+            # Pre-order walk; children are patched in once they get an index
+            stack = [(tree, None, False, 0)]
+            while stack:
+                node, parent, is_right, depth = stack.pop()
+                idx = len(feature)
+                if parent is not None:
+                    (right if is_right else left)[parent] = idx
+
+                if node.is_leaf():
+                    feature.append(-1)
+                    threshold.append(0.0)
+                    left.append(idx)
+                    right.append(idx)
+                    value.append(node.value)
+                    max_depth = max(max_depth, depth)
+                else:
+                    feature.append(node.feature)
+                    threshold.append(node.threshold)
+                    left.append(-1)
+                    right.append(-1)
+                    value.append(-1)
+                    stack.append((node.right, idx, True, depth + 1))
+                    stack.append((node.left, idx, False, depth + 1))
+
+        return cls(feature, threshold, left, right, value, roots, max_depth)
+
+    # Node arrays in the .rfm file, in storage order
+    _ARRAYS = {
+        "feature": "<i4",
+        "threshold": "<f8",
+        "left": "<i4",
+        "right": "<i4",
+        "value": "<i8",
+        "roots": "<i4",
+    }
+
+    def save(self, path):
+        """
+        Write the forest as a single .rfm file:
+
+            MODEL_MAGIC | header length (uint64, little-endian) | JSON header | node arrays
+
+        The header holds the format version, the offset/dtype/shape of every
+        node array and self.metadata. Arrays start on 64-byte boundaries so
+        load() can map them straight from the file.
+        """
+        arrays = {name: np.ascontiguousarray(getattr(self, name), dtype=dtype)
+                  for name, dtype in self._ARRAYS.items()}
+        header = {
+            "format_version": MODEL_FORMAT_VERSION,
+            "depth": self.depth,
+            "metadata": self.metadata,
+            "arrays": {},
+        }
+
+        relative, offset = {}, 0
+        for name, array in arrays.items():
+            relative[name] = offset
+            offset = _align(offset + array.nbytes)
+
+        # Offsets depend on the header size and vice versa; grow until they agree
+        data_start = 0
+        while True:
+            for name, array in arrays.items():
+                header["arrays"][name] = {"dtype": array.dtype.str, "shape": list(array.shape),
+                                          "offset": data_start + relative[name]}
+            header_bytes = json.dumps(header).encode("utf-8")
+            needed = _align(len(MODEL_MAGIC) + 8 + len(header_bytes))
+            if needed <= data_start:
+                break
+            data_start = needed
+        header_bytes += b" " * (data_start - len(MODEL_MAGIC) - 8 - len(header_bytes))
+
+        # Write next to the target and rename over it, so processes that have
+        # the old file memory-mapped keep reading the old contents
+        tmp_path = f"{os.fspath(path)}.tmp{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            f.write(MODEL_MAGIC)
+            f.write(len(header_bytes).to_bytes(8, "little"))
+            f.write(header_bytes)
+            for name, array in arrays.items():
+                f.seek(header["arrays"][name]["offset"])
+                f.write(array.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        """
+        Read a .rfm file written by save(). With mmap_mode="r" (the default) the
+        node arrays are read-only views of one memory map, so every process
+        serving the same file shares its pages through the OS page cache.
+        """
+        with open(path, "rb") as f:
+            if f.read(len(MODEL_MAGIC)) != MODEL_MAGIC:
+                raise ValueError(f"{path} is not a forest model file")
+            header_len = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_len).decode("utf-8"))
+        if header["format_version"] > MODEL_FORMAT_VERSION:
+            raise ValueError(f"{path} uses model format {header['format_version']}, "
+                             f"this code reads up to {MODEL_FORMAT_VERSION}")
+
+        if mmap_mode:
+            buffer = np.memmap(path, dtype=np.uint8, mode=mmap_mode)
+        else:
+            with open(path, "rb") as f:
+                buffer = np.frombuffer(f.read(), dtype=np.uint8)
+        arrays = {}
+        for name, entry in header["arrays"].items():
+            dtype = np.dtype(entry["dtype"])
+            count = int(np.prod(entry["shape"]))
+            start = entry["offset"]
+            arrays[name] = buffer[start:start + count * dtype.itemsize].view(dtype).reshape(entry["shape"])
+        return cls(depth=header["depth"], metadata=header["metadata"], **arrays)
+
+    def fold_scaler(self, mean, scale):
+        """
+        Return a copy of this forest that takes raw features instead of
+        standardized ones. A node test (x - mean) / scale <= t is rewritten
+        as x <= r, where r is the largest float whose standardized value
+        (computed exactly as StandardScaler.transform does) is still <= t.
+        Both tests then agree for every input, so predictions are identical.
+        """
+        mean = np.asarray(mean, dtype=np.float64)
+        scale = np.asarray(scale, dtype=np.float64)
+        if np.any(scale <= 0):
+            raise ValueError("scale must be positive to fold the scaler into thresholds")
+
+        internal = self.feature >= 0
+        feature_mean = mean[self.feature[internal]]
+        feature_scale = scale[self.feature[internal]]
+        scaled = self.threshold[internal]
+
+        def standardize(x):
+            return (x - feature_mean) / feature_scale
+
+        # Search over float64 bit patterns mapped to ordered integers: first
+        # gallop to a bracket lo <= r < hi around the algebraic inverse, then bisect
+        def fits(key):
+            return standardize(_key_float(key)) <= scaled
+
+        lo = _float_key(scaled * feature_scale + feature_mean)
+        lowest, highest = _float_key(np.array([-np.inf, np.inf]))
+        step = np.ones_like(lo)
+        bad = ~fits(lo)
+        while bad.any():
+            lo[bad] = np.maximum(lo[bad], lowest + step[bad]) - step[bad]
+            step[bad] = np.minimum(step[bad] * 2, 2 ** 61)
+            bad = ~fits(lo)
+        hi = np.minimum(lo + 1, highest)
+        step[:] = 1
+        good = fits(hi) & (hi < highest)
+        while good.any():
+            lo[good] = hi[good]
+            hi[good] = np.minimum(hi[good], highest - step[good]) + step[good]
+            step[good] = np.minimum(step[good] * 2, 2 ** 61)
+            good = fits(hi) & (hi < highest)
+        while True:
+            open_ = hi - lo > 1
+            if not open_.any():
+                break
+            mid = lo + (hi - lo) // 2
+            ok = fits(mid)
+            lo = np.where(open_ & ok, mid, lo)
+            hi = np.where(open_ & ~ok, mid, hi)
+        raw = _key_float(lo)
+
+        threshold = np.array(self.threshold)
+        threshold[internal] = raw
+        metadata = dict(self.metadata, scaler_folded=True)
+        return FlatForest(self.feature, threshold, self.left, self.right, self.value,
+                          self.roots, self.depth, metadata)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    def apply(self, X):
+        """Return the leaf index reached by every row in every tree, shape (n_rows, n_trees)."""
+        X = np.asarray(X, dtype=np.float64)
+        rows = np.arange(len(X))[:, None]
+        nodes = np.broadcast_to(self.roots, (len(X), self.n_trees)).copy()
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def tree_votes(self, X, batch_size=10000):
+        """Class voted by every tree for every row, shape (n_rows, n_trees)."""
+        X = np.asarray(X, dtype=np.float64)
+        votes = np.empty((len(X), self.n_trees), dtype=np.int64)
+        for start in range(0, len(X), batch_size):
+            votes[start:start + batch_size] = self.value[self.apply(X[start:start + batch_size])]
+        return votes
+
+    def predict(self, X):
+        # Majority vote; ties go to the tied class voted first, as with Counter.most_common
+        votes = self.tree_votes(X)
+        counts = np.stack([(votes == c).sum(axis=1) for c in self.classes], axis=1)
+        first_vote = np.stack([np.argmax(votes == c, axis=1) for c in self.classes], axis=1)
+        first_vote[counts < counts.max(axis=1, keepdims=True)] = self.n_trees
+        return self.classes[np.argmin(first_vote, axis=1)]
+
+    def predict_proba(self, X):
+        """
+        Predict class probabilities for X.
+        Returns an array of rows [prob_class_0, prob_class_1], like RandomForest.predict_proba
+        """
+        votes = self.tree_votes(X)
+        prob_0 = (votes == 0).sum(axis=1) / self.n_trees
+        prob_1 = (votes == 1).sum(axis=1) / self.n_trees
+        return np.column_stack([prob_0, prob_1])